@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Columns kept in the cached snapshot, in model field order (User.from_db needs it);
+# any other field is deferred and loaded on first access
+SNAPSHOT_FIELDS = [
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in {"id", "email", "full_name", "employee_code", "is_active", "is_staff", "is_superuser"}
+]
+
+
+def _snapshot_key(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+def drop_user_snapshot(user_id):
+    cache.delete(_snapshot_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that does not read accounts.User on every request.
+
+    The user id comes from the validated token; the user row's
+    SNAPSHOT_FIELDS are kept in the Django cache for AUTH_USER_CACHE_TTL
+    seconds and dropped when the user is saved or deleted
+    (accounts.signals). request.user is a User with only those fields
+    loaded: it works as a foreign key value and for permission checks,
+    and other fields are read from the database when first accessed.
+    """
+
+    def get_user(self, validated_token):
+        if settings.AUTH_USER_CACHE_TTL <= 0 or api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares the password hash, which is not cached
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = _snapshot_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = User.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values_list(*SNAPSHOT_FIELDS).first()
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, values, timeout=settings.AUTH_USER_CACHE_TTL)
+
+        user = User.from_db(DEFAULT_DB_ALIAS, SNAPSHOT_FIELDS, values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
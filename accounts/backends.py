@@ -0,0 +1,70 @@
+import time
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+# Bumped for one user (groups, direct permissions, flags) or for everyone
+# (a group's permissions changed); stale permission sets are never read again.
+GLOBAL_VERSION_KEY = "auth:perm_version"
+
+
+def _user_version_key(user_id) -> str:
+    return f"auth:perm_version:{user_id}"
+
+
+def _new_version() -> int:
+    # Not a counter: a version key evicted from the cache must not come back
+    # as a value an old permission set was stored under
+    return time.time_ns()
+
+
+def bump_user_permissions(user_ids: Iterable[int]):
+    """Invalidate the cached permission sets of these users."""
+    version = _new_version()
+    cache.set_many({_user_version_key(user_id): version for user_id in user_ids}, timeout=None)
+
+
+def bump_all_permissions():
+    """Invalidate every cached permission set."""
+    cache.set(GLOBAL_VERSION_KEY, _new_version(), timeout=None)
+
+
+def _versions(user_id) -> tuple:
+    keys = [GLOBAL_VERSION_KEY, _user_version_key(user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend whose per-user permission set ("app_label.codename"
+    strings) is kept in the Django cache across requests, so has_perm()
+    and get_all_permissions() do not query user_permissions and
+    groups__permissions on every request.
+
+    Entries are keyed by a global and a per-user version that
+    accounts.signals bumps when groups or permissions change; they also
+    expire after AUTH_PERMISSION_CACHE_TTL seconds.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if settings.AUTH_PERMISSION_CACHE_TTL <= 0:
+            return super().get_all_permissions(user_obj, obj)
+
+        if not hasattr(user_obj, "_perm_cache"):
+            global_version, user_version = _versions(user_obj.pk)
+            key = f"auth:perms:{user_obj.pk}:{global_version}:{user_version}"
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, timeout=settings.AUTH_PERMISSION_CACHE_TTL)
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
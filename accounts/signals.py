@@ -0,0 +1,66 @@
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .authentication import drop_user_snapshot
+from .backends import bump_all_permissions, bump_user_permissions
+from .models import User
+
+CHANGE_ACTIONS = {"post_add", "post_remove", "post_clear"}
+
+
+def _bump_for_user_m2m(instance, action, reverse, pk_set):
+    if action not in CHANGE_ACTIONS:
+        return
+    if not reverse:
+        bump_user_permissions([instance.pk])
+    elif pk_set:
+        bump_user_permissions(pk_set)
+    else:
+        # group.user_set.clear() / permission.user_set.clear(): users unknown
+        bump_all_permissions()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    _bump_for_user_m2m(instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    _bump_for_user_m2m(instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in CHANGE_ACTIONS:
+        bump_all_permissions()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # is_active / is_superuser change the set; a login only touches last_login
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    bump_user_permissions([instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_row_changed(sender, instance, **kwargs):
+    """Drop the cached auth snapshot (again at commit, in case a request re-cached the old row)."""
+    drop_user_snapshot(instance.pk)
+    transaction.on_commit(lambda: drop_user_snapshot(instance.pk))
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def permission_deleted(sender, **kwargs):
+    bump_all_permissions()
+
+
+@receiver(post_migrate)
+def permissions_migrated(sender, **kwargs):
+    # Data migrations edit group permissions without sending these signals
+    bump_all_permissions()
@@ -1,3 +1,139 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import CachedJWTAuthentication, _snapshot_key
+from .backends import CachedPermissionBackend
+from .models import User
+
+
+@override_settings(AUTH_USER_CACHE_TTL=60)
+class CachedJWTAuthenticationTests(APITestCase):
+    """Tests for the cached user snapshot behind JWT authentication"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email="auth@example.com", password="testpass123",
+            full_name="Auth User", employee_code="EMP001"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_deactivated_user_rejected_right_after_save(self):
+        self.assertEqual(self.client.get("/api/v1/accounts/me/").status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(cache.get(_snapshot_key(self.user.pk)))
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get("/api/v1/accounts/me/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(AUTH_USER_CACHE_TTL=60)
+class CachedJWTUserCacheTests(TestCase):
+    """Tests for CachedJWTAuthentication's user snapshot cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email="snapshot@example.com", password="testpass123",
+            full_name="Snapshot User", employee_code="EMP002"
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def test_user_served_from_cache(self):
+        CachedJWTAuthentication().get_user(self.token)
+
+        with self.assertNumQueries(0):
+            user = CachedJWTAuthentication().get_user(self.token)
+        self.assertEqual((user.pk, user.email), (self.user.pk, "snapshot@example.com"))
+
+    def test_saved_user_read_again(self):
+        CachedJWTAuthentication().get_user(self.token)
+
+        self.user.full_name = "Renamed User"
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            user = CachedJWTAuthentication().get_user(self.token)
+        self.assertEqual(user.full_name, "Renamed User")
+
+
+@override_settings(AUTH_PERMISSION_CACHE_TTL=300)
+class CachedPermissionBackendTests(TestCase):
+    """Tests for the cached per-user permission set"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email="perms@example.com", password="testpass123",
+            full_name="Perms User", employee_code="EMP003"
+        )
+        self.permission = Permission.objects.get(content_type__app_label="accounts", codename="view_user")
+        self.group = Group.objects.create(name="Viewers")
+
+    def _perms(self):
+        # A fresh instance, as in a new request
+        return CachedPermissionBackend().get_all_permissions(User.objects.get(pk=self.user.pk))
+
+    def test_permissions_served_from_cache(self):
+        self.user.user_permissions.add(self.permission)
+        self.assertEqual(self._perms(), {"accounts.view_user"})
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedPermissionBackend().get_all_permissions(user), {"accounts.view_user"})
+
+    def test_user_permission_change_invalidates(self):
+        self.assertEqual(self._perms(), set())
+
+        self.user.user_permissions.add(self.permission)
+        self.assertEqual(self._perms(), {"accounts.view_user"})
+
+        self.user.user_permissions.remove(self.permission)
+        self.assertEqual(self._perms(), set())
+
+    def test_group_membership_change_invalidates(self):
+        self.group.permissions.add(self.permission)
+        self.assertEqual(self._perms(), set())
+
+        self.user.groups.add(self.group)
+        self.assertEqual(self._perms(), {"accounts.view_user"})
+
+        self.group.user_set.remove(self.user)
+        self.assertEqual(self._perms(), set())
+
+    def test_group_permission_change_invalidates(self):
+        self.user.groups.add(self.group)
+        self.assertEqual(self._perms(), set())
+
+        self.group.permissions.add(self.permission)
+        self.assertEqual(self._perms(), {"accounts.view_user"})
+
+        self.group.delete()
+        self.assertEqual(self._perms(), set())
+
+    def test_is_active_change_invalidates(self):
+        self.user.user_permissions.add(self.permission)
+        self.assertEqual(self._perms(), {"accounts.view_user"})
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self._perms(), set())
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self._perms(), {"accounts.view_user"})
+
+    def test_superuser_change_invalidates(self):
+        self.assertEqual(self._perms(), set())
+
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertIn("accounts.view_user", self._perms())
@@ -0,0 +1,84 @@
+import time
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Company, UserCompany
+
+# Bumped for one user (a UserCompany row of theirs changed) or for everyone
+# (a company changed); entries under an old version are never read again.
+GLOBAL_VERSION_KEY = "company:member_version"
+
+# Plain column values are cached, never model instances; each request
+# builds its own UserCompany and Company from them
+USER_COMPANY_FIELDS = [field.attname for field in UserCompany._meta.concrete_fields]
+COMPANY_FIELDS = [field.attname for field in Company._meta.concrete_fields]
+
+
+def _user_version_key(user_id) -> str:
+    return f"company:member_version:{user_id}"
+
+
+def _new_version() -> int:
+    # Not a counter: an evicted version key must not come back as an old value
+    return time.time_ns()
+
+
+def bump_user_memberships(user_ids: Iterable[int]):
+    """Invalidate the cached memberships of these users."""
+    version = _new_version()
+    cache.set_many({_user_version_key(user_id): version for user_id in user_ids}, timeout=None)
+
+
+def bump_all_memberships():
+    """Invalidate every cached membership."""
+    cache.set(GLOBAL_VERSION_KEY, _new_version(), timeout=None)
+
+
+def _versions(user_id) -> tuple:
+    keys = [GLOBAL_VERSION_KEY, _user_version_key(user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def _load(user_id: int, company_code: str):
+    row = UserCompany.objects.filter(
+        user_id=user_id,
+        is_active=True,
+        company__code=company_code
+    ).values_list(*USER_COMPANY_FIELDS, *(f"company__{name}" for name in COMPANY_FIELDS)).first()
+    if row is None:
+        return None
+    return row[:len(USER_COMPANY_FIELDS)], row[len(USER_COMPANY_FIELDS):]
+
+
+def get_user_company(user_id: int, company_code: str) -> Optional[UserCompany]:
+    """
+    The user's active UserCompany for ``company_code`` with its Company
+    loaded, or None. With COMPANY_MEMBERSHIP_CACHE_TTL set, the column
+    values come from the Django cache; a miss is cached too, so a denied
+    header does not query on every call.
+    """
+    ttl = settings.COMPANY_MEMBERSHIP_CACHE_TTL
+    if ttl <= 0:
+        values = _load(user_id, company_code)
+    else:
+        global_version, user_version = _versions(user_id)
+        key = f"company:member:{user_id}:{company_code}:{global_version}:{user_version}"
+        values = cache.get(key)
+        if values is None:
+            values = _load(user_id, company_code) or False
+            cache.set(key, values, timeout=ttl)
+
+    if not values:
+        return None
+    user_company_values, company_values = values
+    user_company = UserCompany.from_db(DEFAULT_DB_ALIAS, USER_COMPANY_FIELDS, user_company_values)
+    user_company.company = Company.from_db(DEFAULT_DB_ALIAS, COMPANY_FIELDS, company_values)
+    return user_company
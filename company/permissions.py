@@ -2,7 +2,7 @@
 
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import PermissionDenied
-from .models import UserCompany
+from .membership import get_user_company
 
 
 class HasCompanyContext(BasePermission):
@@ -16,14 +16,9 @@ class HasCompanyContext(BasePermission):
         if not company_code:
             raise PermissionDenied("Company-Code header is missing.")
 
-        # 
-        try:
-            user_company = UserCompany.objects.get(
-                user=request.user,
-                is_active=True,
-                company__code=company_code
-            )
-        except UserCompany.DoesNotExist:
+        # Cached per (user, company code); invalidated by company.signals
+        user_company = get_user_company(request.user.id, company_code)
+        if user_company is None:
             raise PermissionDenied("You do not have access to any companies.")
 
         # Attach for later use
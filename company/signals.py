@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .membership import bump_all_memberships, bump_user_memberships
+from .models import Company, UserCompany
+
+
+def _now_and_on_commit(func):
+    # Again at commit: a request may have cached the old row in between
+    func()
+    transaction.on_commit(func)
+
+
+@receiver(pre_save, sender=UserCompany)
+def remember_previous_user(sender, instance, **kwargs):
+    """A row moved to another user must also drop the previous user's entries."""
+    instance._previous_user_id = (
+        UserCompany.objects.filter(pk=instance.pk).values_list("user_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=UserCompany)
+def invalidate_membership(sender, instance, **kwargs):
+    """
+    Drop the cached memberships of this row's user, and of its previous
+    user when it moved; a move to another company is covered by the user's
+    version too.
+    """
+    user_ids = {instance.user_id, getattr(instance, "_previous_user_id", None)} - {None}
+    _now_and_on_commit(lambda: bump_user_memberships(user_ids))
+
+
+@receiver([post_save, post_delete], sender=Company)
+def invalidate_company_memberships(sender, instance, **kwargs):
+    """
+    A company change (code renamed, deactivated, deleted) can affect every
+    member; companies change rarely, so every membership is dropped.
+    """
+    _now_and_on_commit(bump_all_memberships)
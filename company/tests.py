@@ -1,3 +1,120 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .membership import get_user_company
+from .models import Company, UserCompany, UserRole
+
+User = get_user_model()
+
+
+@override_settings(COMPANY_MEMBERSHIP_CACHE_TTL=60)
+class MembershipCacheTests(TestCase):
+    """Tests for the cached (user, company code) membership lookup"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email="member@example.com", password="testpass123",
+            full_name="Member User", employee_code="EMP100"
+        )
+        self.other_user = User.objects.create_user(
+            email="other@example.com", password="testpass123",
+            full_name="Other User", employee_code="EMP101"
+        )
+        self.role = UserRole.objects.create(name="Store")
+        self.company = Company.objects.create(name="Jivo Oil", code="JIVO_OIL")
+        self.other_company = Company.objects.create(name="Jivo Mart", code="JIVO_MART")
+        self.membership = UserCompany.objects.create(user=self.user, company=self.company, role=self.role)
+
+    def test_membership_served_from_cache(self):
+        get_user_company(self.user.pk, "JIVO_OIL")
+
+        with self.assertNumQueries(0):
+            user_company = get_user_company(self.user.pk, "JIVO_OIL")
+        self.assertEqual((user_company.pk, user_company.company.code), (self.membership.pk, "JIVO_OIL"))
+
+    def test_missing_membership_cached(self):
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_MART"))
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_user_company(self.user.pk, "JIVO_MART"))
+
+    def test_saved_membership_invalidates(self):
+        get_user_company(self.user.pk, "JIVO_OIL")
+
+        self.membership.is_active = False
+        self.membership.save()
+
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_OIL"))
+
+    def test_new_membership_invalidates_cached_miss(self):
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_MART"))
+
+        UserCompany.objects.create(user=self.user, company=self.other_company, role=self.role)
+
+        self.assertIsNotNone(get_user_company(self.user.pk, "JIVO_MART"))
+
+    def test_deleted_membership_invalidates(self):
+        get_user_company(self.user.pk, "JIVO_OIL")
+
+        self.membership.delete()
+
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_OIL"))
+
+    def test_membership_moved_to_another_company(self):
+        get_user_company(self.user.pk, "JIVO_OIL")
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_MART"))
+
+        self.membership.company = self.other_company
+        self.membership.save()
+
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_OIL"))
+        self.assertEqual(get_user_company(self.user.pk, "JIVO_MART").pk, self.membership.pk)
+
+    def test_membership_moved_to_another_user(self):
+        get_user_company(self.user.pk, "JIVO_OIL")
+        self.assertIsNone(get_user_company(self.other_user.pk, "JIVO_OIL"))
+
+        self.membership.user = self.other_user
+        self.membership.save()
+
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_OIL"))
+        self.assertEqual(get_user_company(self.other_user.pk, "JIVO_OIL").pk, self.membership.pk)
+
+    def test_company_change_invalidates_every_member(self):
+        UserCompany.objects.create(user=self.other_user, company=self.company, role=self.role)
+        get_user_company(self.user.pk, "JIVO_OIL")
+        get_user_company(self.other_user.pk, "JIVO_OIL")
+
+        self.company.is_active = False
+        self.company.save()
+
+        self.assertFalse(get_user_company(self.user.pk, "JIVO_OIL").company.is_active)
+        self.assertFalse(get_user_company(self.other_user.pk, "JIVO_OIL").company.is_active)
+
+    def test_renamed_company_code_invalidates(self):
+        get_user_company(self.user.pk, "JIVO_OIL")
+
+        self.company.code = "JIVO_OIL_NEW"
+        self.company.save()
+
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_OIL"))
+        self.assertEqual(get_user_company(self.user.pk, "JIVO_OIL_NEW").pk, self.membership.pk)
+
+    @override_settings(COMPANY_MEMBERSHIP_CACHE_TTL=0)
+    @patch("company.membership.cache")
+    def test_disabled_cache_reads_database(self, mock_cache):
+        """Test TTL 0 (the default without a shared cache) bypasses the cache"""
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(get_user_company(self.user.pk, "JIVO_OIL").pk, self.membership.pk)
+
+        UserCompany.objects.filter(pk=self.membership.pk).update(is_active=False)
+
+        self.assertIsNone(get_user_company(self.user.pk, "JIVO_OIL"))
+        mock_cache.get.assert_not_called()
+        mock_cache.set.assert_not_called()
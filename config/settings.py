@@ -4,10 +4,12 @@ Generated by 'django-admin startproject' using Django 6.0.1.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from decouple import config, Csv
 from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -125,13 +127,38 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 15 * 1024 * 1024
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ],
 }
 
 # Custom user model
 AUTH_USER_MODEL = "accounts.User"
 
+# Django cache; set CACHE_REDIS_URL (needs the redis package) so every worker process
+# shares it and sees permission and user changes at once
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}
+        if CACHE_REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
+# Caches below are invalidated by signals in the process that made the change. A
+# per-process LocMem cache would keep serving stale entries in every other worker,
+# so without a shared cache they are off (TTL 0) whatever the environment says.
+SHARED_CACHE = bool(CACHE_REDIS_URL)
+
+# ModelBackend with the user's permission set cached in the Django cache
+AUTHENTICATION_BACKENDS = ["accounts.backends.CachedPermissionBackend"]
+AUTH_PERMISSION_CACHE_TTL = (
+    config('AUTH_PERMISSION_CACHE_TTL', default=300, cast=int) if SHARED_CACHE else 0
+)  # seconds, 0 disables
+
+# CachedJWTAuthentication: seconds a user row (is_active, email, ...) is served from cache, 0 disables
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int) if SHARED_CACHE else 0
+
 # Simple JWT
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=1500),
@@ -152,10 +179,95 @@ HANA_PORT = config('HANA_PORT', cast=int)
 HANA_USER = config('HANA_USER')
 HANA_PASSWORD = config('HANA_PASSWORD')
 
+# HANA connection pool (one pool per company schema, per process)
+HANA_POOL_MAX_SIZE = config('HANA_POOL_MAX_SIZE', default=5, cast=int)
+HANA_POOL_IDLE_TIMEOUT = config('HANA_POOL_IDLE_TIMEOUT', default=300, cast=int)  # seconds
+HANA_POOL_ACQUIRE_TIMEOUT = config('HANA_POOL_ACQUIRE_TIMEOUT', default=10, cast=int)  # seconds
+HANA_FETCH_SIZE = config('HANA_FETCH_SIZE', default=500, cast=int)  # rows per fetchmany() when streaming results
+
 SL_URL = config('SL_URL')
 SL_USER = config('SL_USER')
 SL_PASSWORD = config('SL_PASSWORD')
 
+# Shared Service Layer sessions (keep-alive pool per company)
+SL_POOL_MAX_SIZE = config('SL_POOL_MAX_SIZE', default=10, cast=int)
+SL_SESSION_TIMEOUT = config('SL_SESSION_TIMEOUT', default=30, cast=int)  # minutes, if Login doesn't say
+
+# Async Service Layer client (httpx, HTTP/2) used by the GRPO outbox worker
+SL_ASYNC_MAX_CONNECTIONS = config('SL_ASYNC_MAX_CONNECTIONS', default=4, cast=int)
+SL_ASYNC_TIMEOUT = config('SL_ASYNC_TIMEOUT', default=30, cast=int)  # seconds
+
+# Circuit breaker per (company, HANA / Service Layer), per process
+SAP_CIRCUIT_FAILURE_THRESHOLD = config('SAP_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)  # consecutive failures, 0 disables
+SAP_CIRCUIT_RESET_TIMEOUT = config('SAP_CIRCUIT_RESET_TIMEOUT', default=30, cast=int)  # seconds open before probing
+SAP_CIRCUIT_HALF_OPEN_MAX_CALLS = config('SAP_CIRCUIT_HALF_OPEN_MAX_CALLS', default=1, cast=int)  # concurrent probes
+
+# Consolidated (all-company) SAP calls run on a shared, bounded thread pool
+SAP_FAN_OUT_MAX_WORKERS = config('SAP_FAN_OUT_MAX_WORKERS', default=6, cast=int)
+SAP_FAN_OUT_TIMEOUT = config('SAP_FAN_OUT_TIMEOUT', default=30, cast=int)  # seconds for the whole fan-out
+
+# SAP call tracing (sap_client/metrics.py); samples are buffered per process
+SAP_METRICS_ENABLED = config('SAP_METRICS_ENABLED', default=True, cast=bool)
+SAP_METRICS_FLUSH_SIZE = config('SAP_METRICS_FLUSH_SIZE', default=50, cast=int)
+SAP_METRICS_FLUSH_INTERVAL = config('SAP_METRICS_FLUSH_INTERVAL', default=10, cast=int)  # seconds
+SAP_METRICS_BUFFER_MAX = config('SAP_METRICS_BUFFER_MAX', default=5000, cast=int)
+SAP_METRICS_RETENTION_HOURS = config('SAP_METRICS_RETENTION_HOURS', default=72, cast=int)
+SAP_METRICS_PURGE_INTERVAL = config('SAP_METRICS_PURGE_INTERVAL', default=3600, cast=int)  # seconds between purges on flush
+
+# Max GRPO documents sent in one Service Layer $batch request
+GRPO_BATCH_MAX_SIZE = config('GRPO_BATCH_MAX_SIZE', default=20, cast=int)
+
+# GRPO outbox: POST /api/grpo/post/ queues a job (202) drained by process_grpo_outbox
+GRPO_OUTBOX_ENABLED = config('GRPO_OUTBOX_ENABLED', default=False, cast=bool)
+GRPO_OUTBOX_MAX_ATTEMPTS = config('GRPO_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+GRPO_OUTBOX_RETRY_BASE_DELAY = config('GRPO_OUTBOX_RETRY_BASE_DELAY', default=30, cast=int)  # seconds
+GRPO_OUTBOX_RETRY_MAX_DELAY = config('GRPO_OUTBOX_RETRY_MAX_DELAY', default=3600, cast=int)  # seconds
+GRPO_OUTBOX_LOCK_TIMEOUT = config('GRPO_OUTBOX_LOCK_TIMEOUT', default=300, cast=int)  # seconds before a stuck job is re-claimed
+GRPO_OUTBOX_POLL_INTERVAL = config('GRPO_OUTBOX_POLL_INTERVAL', default=5, cast=int)  # seconds
+GRPO_OUTBOX_CONCURRENCY = config('GRPO_OUTBOX_CONCURRENCY', default=10, cast=int)  # postings in flight per worker, 1 = one at a time
+
+# Time zone of SAP's document dates (OPDN CreateDate); reconcile_grpo uses its days
+SAP_TIME_ZONE = config('SAP_TIME_ZONE', default=TIME_ZONE)
+
+# OPDN user field (e.g. U_GRPO_KEY) that stores GRPOPosting.idempotency_key; a retried
+# posting adopts the SAP GRPO holding its key instead of creating a duplicate. Empty = off
+GRPO_IDEMPOTENCY_FIELD = config('GRPO_IDEMPOTENCY_FIELD', default='')
+if GRPO_OUTBOX_ENABLED and not GRPO_IDEMPOTENCY_FIELD:
+    # The outbox retries jobs that timed out after SAP may have committed them
+    raise ImproperlyConfigured("GRPO_OUTBOX_ENABLED requires GRPO_IDEMPOTENCY_FIELD (e.g. U_GRPO_KEY)")
+
+# Seconds a posting stays reserved by an attempt that is posting it to SAP; a reservation
+# left behind by a crashed worker is taken over after this
+GRPO_RESERVATION_TIMEOUT = config('GRPO_RESERVATION_TIMEOUT', default=300, cast=int)
+
+# GET /api/grpo/pending/ cursor pages (?page_size= / ?cursor=)
+GRPO_PENDING_PAGE_SIZE = config('GRPO_PENDING_PAGE_SIZE', default=50, cast=int)
+GRPO_PENDING_PAGE_MAX_SIZE = config('GRPO_PENDING_PAGE_MAX_SIZE', default=200, cast=int)
+
+# In-process cache of open POs per (company, supplier)
+SAP_OPEN_PO_CACHE_TTL = config('SAP_OPEN_PO_CACHE_TTL', default=60, cast=int)  # seconds, 0 disables
+SAP_OPEN_PO_CACHE_MAX_SIZE = config('SAP_OPEN_PO_CACHE_MAX_SIZE', default=512, cast=int)
+
+# (user, Company-Code) memberships checked by HasCompanyContext, in the Django cache;
+# needs the shared cache like the auth caches above
+COMPANY_MEMBERSHIP_CACHE_TTL = (
+    config('COMPANY_MEMBERSHIP_CACHE_TTL', default=60, cast=int) if SHARED_CACHE else 0
+)  # seconds, 0 disables
+
+# Local open PO line snapshot (sync_open_po_lines); older snapshots are bypassed for live SAP
+SAP_OPEN_PO_SNAPSHOT_MAX_AGE = config('SAP_OPEN_PO_SNAPSHOT_MAX_AGE', default=900, cast=int)  # seconds, 0 disables
+
+# Cursor pagination of GET /open-pos/ (?page_size= / ?cursor=), in POs per page
+SAP_OPEN_PO_PAGE_SIZE = config('SAP_OPEN_PO_PAGE_SIZE', default=50, cast=int)
+SAP_OPEN_PO_PAGE_MAX_SIZE = config('SAP_OPEN_PO_PAGE_MAX_SIZE', default=200, cast=int)
+
+# Local SAP stand-in (sap_client/standin) instead of the real HANA / Service Layer
+SAP_STANDIN_ENABLED = config('SAP_STANDIN_ENABLED', default=False, cast=bool)
+SAP_STANDIN_DATA_DIR = config('SAP_STANDIN_DATA_DIR', default=os.path.join(tempfile.gettempdir(), 'sap_standin'))
+SAP_STANDIN_SL_URL = config('SAP_STANDIN_SL_URL', default='http://127.0.0.1:50080')
+SAP_STANDIN_HANA_LATENCY_MS = config('SAP_STANDIN_HANA_LATENCY_MS', default=0, cast=int)  # per connect / query
+SAP_STANDIN_HANA_ERROR_RATE = config('SAP_STANDIN_HANA_ERROR_RATE', default=0.0, cast=float)  # 0.0 - 1.0
+
 COMPANY_DB = {
     "JIVO_OIL": config('COMPANY_DB_JIVO_OIL'),
     "JIVO_MART": config('COMPANY_DB_JIVO_MART'),
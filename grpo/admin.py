@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GRPOPosting, GRPOLinePosting
+from .models import GRPOPosting, GRPOLinePosting, GRPOPostingJob
 
 
 class GRPOLinePostingInline(admin.TabularInline):
@@ -49,3 +49,28 @@ class GRPOPostingAdmin(admin.ModelAdmin):
     def get_po_number(self, obj):
         return obj.po_receipt.po_number
     get_po_number.short_description = "PO Number"
+
+
+@admin.register(GRPOPostingJob)
+class GRPOPostingJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "grpo_posting",
+        "company_code",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "created_at"
+    ]
+    list_filter = ["status", "company_code"]
+    search_fields = ["grpo_posting__po_receipt__po_number", "last_error"]
+    readonly_fields = [
+        "grpo_posting",
+        "company_code",
+        "payload",
+        "locked_at",
+        "last_error",
+        "created_by",
+        "created_at",
+        "updated_at"
+    ]
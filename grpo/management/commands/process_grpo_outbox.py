@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from grpo.services import GRPOOutboxWorker
+from sap_client.metrics import recorder
+
+
+class Command(BaseCommand):
+    help = "Post queued GRPOs to SAP, retrying failed jobs with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=10,
+            help="Jobs claimed per poll (default: 10)"
+        )
+        parser.add_argument(
+            "--poll-interval", type=int, default=settings.GRPO_OUTBOX_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty "
+                 f"(default: {settings.GRPO_OUTBOX_POLL_INTERVAL})"
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Process the jobs that are due now, then exit"
+        )
+
+    def handle(self, *args, **options):
+        worker = GRPOOutboxWorker()
+        processed = 0
+
+        try:
+            while True:
+                jobs = worker.claim_jobs(options["batch_size"])
+                for job, job_status in zip(jobs, worker.process_jobs(jobs)):
+                    processed += 1
+                    self.stdout.write(f"GRPO job {job.id}: {job_status}")
+
+                if not jobs:
+                    if options["once"]:
+                        break
+                    recorder.flush_if_due()
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            recorder.flush()
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} GRPO job(s)"))
@@ -0,0 +1,75 @@
+import json
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from grpo.reconciliation import reconcile_grpo_postings
+from sap_client.exceptions import SAPConnectionError, SAPDataError, SAPValidationError
+from sap_client.metrics import recorder
+from sap_client.registry import COMPANY_SAP_REGISTRY
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare GRPO postings with the GRPO documents in SAP (OPDN/PDN1) for a date "
+        "range and report, or with --fix correct, the ones that disagree"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--company", action="append", choices=sorted(COMPANY_SAP_REGISTRY),
+            help="Company to reconcile (repeatable, default: all companies)"
+        )
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD (default: today)")
+        parser.add_argument(
+            "--days", type=int, default=7,
+            help="Days back from --to when --from is not given (default: 7)"
+        )
+        parser.add_argument(
+            "--fix", action="store_true",
+            help="Mark postings found in SAP by idempotency key as POSTED and cancelled ones as FAILED"
+        )
+        parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+
+    def handle(self, *args, **options):
+        date_to = options["date_to"] or timezone.localdate()
+        date_from = options["date_from"] or date_to - timedelta(days=options["days"])
+        if date_from > date_to:
+            raise CommandError("--from must not be after --to")
+
+        reports = []
+        failures = 0
+        try:
+            for company_code in options["company"] or sorted(COMPANY_SAP_REGISTRY):
+                try:
+                    report = reconcile_grpo_postings(company_code, date_from, date_to, fix=options["fix"])
+                except (SAPConnectionError, SAPDataError, SAPValidationError) as e:
+                    failures += 1
+                    self.stderr.write(self.style.ERROR(f"{company_code}: {e}"))
+                    continue
+                reports.append(report)
+                if not options["json"]:
+                    self._write_report(report)
+        finally:
+            recorder.flush()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(reports, indent=2, default=str))
+        if failures:
+            raise CommandError(f"{failures} reconciliation(s) failed")
+
+    def _write_report(self, report: dict):
+        style = self.style.WARNING if report["issues"] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{report['company_code']} {report['date_from']}..{report['date_to']}: "
+            f"{report['postings']} postings, {report['sap_documents']} SAP GRPOs, "
+            f"{report['confirmed']} confirmed, {len(report['issues'])} issue(s), "
+            f"{report['fixed']} fixed, {report['unmatched_sap_documents']} SAP GRPOs not from this app"
+        ))
+        for issue in report["issues"]:
+            self.stdout.write(
+                f"  {issue['type']}: posting {issue['grpo_posting_id']} PO {issue['po_number']} "
+                f"({issue['status']}), SAP DocEntry {issue['sap_doc_entry']}: {issue['detail']}"
+            )
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grpo', '0007_alter_grpolineposting_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GRPOPostingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_code', models.CharField(max_length=50)),
+                ('payload', models.JSONField(help_text='SAP PurchaseDeliveryNotes payload')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('PROCESSING', 'Processing'), ('RETRY', 'Waiting to Retry'), ('DONE', 'Done'), ('DEAD', 'Dead Letter')], default='QUEUED', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='grpo_posting_jobs', to=settings.AUTH_USER_MODEL)),
+                ('grpo_posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='grpo.grpoposting')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='grpo_grpopo_status_447976_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 05:10
+
+import uuid
+
+from django.db import migrations, models
+
+
+def gen_idempotency_keys(apps, schema_editor):
+    GRPOPosting = apps.get_model("grpo", "GRPOPosting")
+    postings = list(GRPOPosting.objects.only("id"))
+    for posting in postings:
+        posting.idempotency_key = uuid.uuid4()
+    GRPOPosting.objects.bulk_update(postings, ["idempotency_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grpo', '0008_grpopostingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grpoposting',
+            name='idempotency_key',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(gen_idempotency_keys, reverse_code=migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='grpoposting',
+            name='idempotency_key',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, help_text='Sent to SAP (GRPO_IDEMPOTENCY_FIELD) to find a GRPO created by an earlier attempt', unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grpo', '0009_grpoposting_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grpoposting',
+            name='reserved_at',
+            field=models.DateTimeField(blank=True, help_text='Set while an attempt is posting to SAP; another attempt is refused until it finishes or GRPO_RESERVATION_TIMEOUT passes', null=True),
+        ),
+    ]
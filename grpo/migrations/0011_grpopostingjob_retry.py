@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grpo', '0010_grpoposting_reserved_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grpopostingjob',
+            name='retry',
+            field=models.BooleanField(default=False, help_text='The posting had an earlier attempt that may already be in SAP; look it up before posting'),
+        ),
+    ]
@@ -1,5 +1,8 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from driver_management.models import VehicleEntry
 from raw_material_gatein.models import POReceipt, POItemReceipt
 
@@ -43,6 +46,20 @@ class GRPOPosting(models.Model):
 
     error_message = models.TextField(blank=True, null=True)
 
+    idempotency_key = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        help_text="Sent to SAP (GRPO_IDEMPOTENCY_FIELD) to find a GRPO created by an earlier attempt"
+    )
+
+    reserved_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Set while an attempt is posting to SAP; another attempt is refused until it "
+                  "finishes or GRPO_RESERVATION_TIMEOUT passes"
+    )
+
     # Audit fields
     posted_at = models.DateTimeField(null=True, blank=True)
     posted_by = models.ForeignKey(
@@ -96,3 +113,64 @@ class GRPOLinePosting(models.Model):
 
     def __str__(self):
         return f"{self.po_item_receipt.item_name} - {self.quantity_posted}"
+
+
+class GRPOJobStatus(models.TextChoices):
+    QUEUED = "QUEUED", "Queued"
+    PROCESSING = "PROCESSING", "Processing"
+    RETRY = "RETRY", "Waiting to Retry"
+    DONE = "DONE", "Done"
+    DEAD = "DEAD", "Dead Letter"
+
+
+class GRPOPostingJob(models.Model):
+    """
+    Outbox row for a GRPO waiting to be posted to SAP.
+    Created in the request transaction; drained by the process_grpo_outbox
+    management command, which retries with exponential backoff and moves
+    jobs that keep failing to DEAD.
+    """
+    ACTIVE_STATUSES = [GRPOJobStatus.QUEUED, GRPOJobStatus.PROCESSING, GRPOJobStatus.RETRY]
+
+    grpo_posting = models.ForeignKey(
+        GRPOPosting,
+        on_delete=models.CASCADE,
+        related_name="jobs"
+    )
+
+    company_code = models.CharField(max_length=50)
+    payload = models.JSONField(help_text="SAP PurchaseDeliveryNotes payload")
+
+    status = models.CharField(
+        max_length=20,
+        choices=GRPOJobStatus.choices,
+        default=GRPOJobStatus.QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    retry = models.BooleanField(
+        default=False,
+        help_text="The posting had an earlier attempt that may already be in SAP; look it up before posting"
+    )
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="grpo_posting_jobs"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"GRPO job {self.id} for posting {self.grpo_posting_id} - {self.status}"
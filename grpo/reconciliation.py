@@ -0,0 +1,292 @@
+"""
+Reconcile GRPOPosting rows against the GRPO documents (OPDN/PDN1) in SAP.
+
+reconcile_grpo_postings() reads every SAP GRPO of a date range with ONE
+HANA query and matches it in memory against the company's postings of the
+same range. Days are SAP's calendar days (SAP_TIME_ZONE, the zone of OPDN
+CreateDate) on both sides, and SAP is read one day wider than the range,
+so a posting recorded just after midnight still finds its document.
+
+- POSTED postings are matched by sap_doc_entry; the SAP document must
+  exist, not be cancelled and carry the posted quantities.
+- FAILED / PENDING postings are looked up by idempotency key
+  (GRPO_IDEMPOTENCY_FIELD, one query); a document holding the key means
+  the posting went through (e.g. a timeout after SAP committed).
+- FAILED / PENDING postings without a key match are compared by supplier
+  and accepted item quantities against SAP documents nothing claimed.
+  Such a match is only a guess and is reported, never fixed.
+
+With fix=True, postings found in SAP by key are marked POSTED (their
+queued outbox jobs are closed) and postings whose document was cancelled
+in SAP are marked FAILED. POSTED postings missing from SAP are only
+reported.
+"""
+import logging
+import zoneinfo
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from raw_material_gatein.models import POItemReceipt
+from sap_client.client import SAPClient
+
+from .models import GRPOPosting, GRPOLinePosting, GRPOStatus, GRPOPostingJob, GRPOJobStatus
+
+logger = logging.getLogger(__name__)
+
+MISSING_IN_SAP = "missing_in_sap"
+CANCELED_IN_SAP = "canceled_in_sap"
+LINE_MISMATCH = "line_mismatch"
+POSTED_IN_SAP = "posted_in_sap"
+POSSIBLE_MATCH_IN_SAP = "possible_match_in_sap"
+
+QTY_QUANTUM = Decimal("0.001")
+
+
+def _quantities(pairs: Iterable[Tuple[str, object]]) -> Tuple[Tuple[str, Decimal], ...]:
+    """(item_code, qty) pairs summed per item code, as a comparable key."""
+    totals = defaultdict(Decimal)
+    for item_code, quantity in pairs:
+        totals[item_code] += Decimal(str(quantity))
+    return tuple(sorted((code, qty.quantize(QTY_QUANTUM)) for code, qty in totals.items()))
+
+
+def _day_window(date_from: date, date_to: date) -> Tuple[datetime, datetime]:
+    """[start, end) of the date range in SAP's time zone."""
+    tz = zoneinfo.ZoneInfo(settings.SAP_TIME_ZONE)
+    return (
+        datetime.combine(date_from, time.min, tzinfo=tz),
+        datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def _created_in(doc, date_from: date, date_to: date) -> bool:
+    """Whether the SAP document's CreateDate falls in the range (unknown counts as in)."""
+    created = doc.create_date
+    if created is None:
+        return True
+    if isinstance(created, str):
+        created = date.fromisoformat(created[:10])
+    elif isinstance(created, datetime):
+        created = created.date()
+    return date_from <= created <= date_to
+
+
+def reconcile_grpo_postings(company_code: str, date_from: date, date_to: date, fix: bool = False) -> Dict:
+    """
+    Reconcile one company's GRPO postings of ``date_from``..``date_to``
+    (inclusive) with SAP. SAP errors propagate.
+
+    Returns:
+        dict with counts and one entry per mismatch in "issues".
+    """
+    sap_client = SAPClient(company_code)
+    documents = sap_client.get_delivery_notes(date_from - timedelta(days=1), date_to + timedelta(days=1))
+    by_doc_entry = {doc.doc_entry: doc for doc in documents}
+
+    start, end = _day_window(date_from, date_to)
+    postings_qs = GRPOPosting.objects.filter(
+        vehicle_entry__company__code=company_code
+    ).filter(
+        Q(status=GRPOStatus.POSTED, posted_at__gte=start, posted_at__lt=end)
+        | Q(
+            status__in=[GRPOStatus.FAILED, GRPOStatus.PENDING],
+            created_at__lt=end,
+            updated_at__gte=start,
+        )
+    )
+    postings = list(postings_qs.values(
+        "id", "status", "sap_doc_entry", "po_receipt_id", "idempotency_key",
+        "po_receipt__po_number", "po_receipt__supplier_code",
+    ))
+
+    posted_lines = defaultdict(list)
+    for posting_id, item_code, quantity in GRPOLinePosting.objects.filter(
+        grpo_posting__in=postings_qs.filter(status=GRPOStatus.POSTED)
+    ).values_list("grpo_posting_id", "po_item_receipt__po_item_code", "quantity_posted"):
+        posted_lines[posting_id].append((item_code, quantity))
+
+    accepted_items = defaultdict(list)  # po_receipt_id -> [(item id, item code, accepted qty)]
+    for item_id, receipt_id, item_code, quantity in POItemReceipt.objects.filter(
+        po_receipt__grpo_postings__in=postings_qs, accepted_qty__gt=0
+    ).values_list("id", "po_receipt_id", "po_item_code", "accepted_qty").distinct():
+        accepted_items[receipt_id].append((item_id, item_code, quantity))
+
+    issues = []
+    claimed = set()
+    unposted = []
+    confirmed = 0
+
+    for posting in postings:
+        if posting["status"] != GRPOStatus.POSTED:
+            unposted.append(posting)
+            continue
+
+        doc = by_doc_entry.get(posting["sap_doc_entry"])
+        if doc is None:
+            issues.append(_issue(MISSING_IN_SAP, posting, None, "SAP document not found in the date range"))
+            continue
+
+        claimed.add(doc.doc_entry)
+        if doc.canceled:
+            issues.append(_issue(CANCELED_IN_SAP, posting, doc, "SAP document is cancelled"))
+            continue
+
+        expected = _quantities(posted_lines[posting["id"]] or [
+            (code, qty) for _, code, qty in accepted_items[posting["po_receipt_id"]]
+        ])
+        actual = _quantities((line.item_code, line.quantity) for line in doc.lines)
+        if expected != actual:
+            issues.append(_issue(
+                LINE_MISMATCH, posting, doc, f"posted {list(expected)}, SAP has {list(actual)}"
+            ))
+        else:
+            confirmed += 1
+
+    # Postings that reached SAP although we recorded a failure, by idempotency key
+    found_by_key = sap_client.find_grpos_by_key([str(posting["idempotency_key"]) for posting in unposted])
+    guess = []
+    for posting in unposted:
+        doc = found_by_key.get(str(posting["idempotency_key"]))
+        if doc is None:
+            guess.append(posting)
+            continue
+        claimed.add(doc.doc_entry)
+        issues.append(_issue(POSTED_IN_SAP, posting, doc, f"marked {posting['status']} but found in SAP by key"))
+
+    # SAP documents nothing accounts for, by (supplier, quantities)
+    candidates = defaultdict(list)
+    for doc in documents:
+        if doc.doc_entry not in claimed and not doc.canceled:
+            key = (doc.card_code, _quantities((line.item_code, line.quantity) for line in doc.lines))
+            candidates[key].append(doc)
+
+    for posting in guess:
+        items = accepted_items[posting["po_receipt_id"]]
+        if not items:
+            continue
+        key = (posting["po_receipt__supplier_code"], _quantities((code, qty) for _, code, qty in items))
+        if candidates.get(key):
+            doc = candidates[key].pop(0)
+            claimed.add(doc.doc_entry)
+            issues.append(_issue(
+                POSSIBLE_MATCH_IN_SAP, posting, doc,
+                f"marked {posting['status']}; SAP has a GRPO with the same supplier and quantities (check by hand)"
+            ))
+
+    # The extra day read on each side only serves matching
+    in_range = [doc for doc in documents if _created_in(doc, date_from, date_to)]
+    unmatched = [doc for doc in in_range if doc.doc_entry not in claimed]
+
+    fixed = _apply_fixes(issues, accepted_items) if fix else 0
+
+    return {
+        "company_code": company_code,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "sap_documents": len(in_range),
+        "postings": len(postings),
+        "confirmed": confirmed,
+        "unmatched_sap_documents": len(unmatched),
+        "fixed": fixed,
+        "issues": issues,
+    }
+
+
+def _issue(kind: str, posting: dict, doc, detail: str) -> dict:
+    return {
+        "type": kind,
+        "grpo_posting_id": posting["id"],
+        "po_receipt_id": posting["po_receipt_id"],
+        "po_number": posting["po_receipt__po_number"],
+        "status": posting["status"],
+        "sap_doc_entry": doc.doc_entry if doc else posting["sap_doc_entry"],
+        "sap_doc_num": doc.doc_num if doc else None,
+        "sap_doc_total": doc.doc_total if doc else None,
+        "detail": detail,
+    }
+
+
+def _reserved(posting: GRPOPosting, since: datetime) -> bool:
+    """Whether a post_grpo()/post_grpo_batch() attempt holds the posting."""
+    return (
+        posting.status == GRPOStatus.PENDING
+        and posting.reserved_at is not None
+        and posting.reserved_at > since
+    )
+
+
+@transaction.atomic
+def _apply_fixes(issues: list, accepted_items: dict) -> int:
+    found = [issue for issue in issues if issue["type"] == POSTED_IN_SAP]
+    if found:
+        # A job being posted right now records its own result
+        in_flight = set(GRPOPostingJob.objects.filter(
+            grpo_posting_id__in=[issue["grpo_posting_id"] for issue in found],
+            status=GRPOJobStatus.PROCESSING,
+        ).values_list("grpo_posting_id", flat=True))
+        found = [issue for issue in found if issue["grpo_posting_id"] not in in_flight]
+    canceled = [issue for issue in issues if issue["type"] == CANCELED_IN_SAP]
+    if not found and not canceled:
+        return 0
+
+    postings = GRPOPosting.objects.select_for_update().in_bulk(
+        [issue["grpo_posting_id"] for issue in found + canceled]
+    )
+    now = timezone.now()
+    # Posted since the comparison ran, or being posted by a request right now
+    # (it records its own result and lines)
+    reserved_since = now - timedelta(seconds=settings.GRPO_RESERVATION_TIMEOUT)
+    found = [
+        issue for issue in found
+        if postings[issue["grpo_posting_id"]].status != GRPOStatus.POSTED
+        and not _reserved(postings[issue["grpo_posting_id"]], reserved_since)
+    ]
+    lines = []
+
+    for issue in found:
+        posting = postings[issue["grpo_posting_id"]]
+        posting.status = GRPOStatus.POSTED
+        posting.sap_doc_entry = issue["sap_doc_entry"]
+        posting.sap_doc_num = issue["sap_doc_num"]
+        posting.sap_doc_total = Decimal(str(issue["sap_doc_total"]))
+        posting.error_message = None
+        posting.reserved_at = None
+        posting.posted_at = now
+        lines += [
+            GRPOLinePosting(grpo_posting=posting, po_item_receipt_id=item_id, quantity_posted=quantity)
+            for item_id, _, quantity in accepted_items[issue["po_receipt_id"]]
+        ]
+
+    for issue in canceled:
+        posting = postings[issue["grpo_posting_id"]]
+        posting.status = GRPOStatus.FAILED
+        posting.error_message = f"SAP GRPO {issue['sap_doc_num']} was cancelled in SAP"
+
+    # Only the postings being fixed; bulk_update() skips auto_now
+    changed = [postings[issue["grpo_posting_id"]] for issue in found + canceled]
+    for posting in changed:
+        posting.updated_at = now
+    GRPOPosting.objects.bulk_update(
+        changed,
+        [
+            "status", "sap_doc_entry", "sap_doc_num", "sap_doc_total", "error_message",
+            "reserved_at", "posted_at", "updated_at",
+        ],
+    )
+    GRPOLinePosting.objects.bulk_create(lines)
+
+    # Posted already: the outbox must not post these again
+    GRPOPostingJob.objects.filter(
+        grpo_posting_id__in=[issue["grpo_posting_id"] for issue in found],
+        status__in=[GRPOJobStatus.QUEUED, GRPOJobStatus.RETRY],
+    ).update(status=GRPOJobStatus.DONE, last_error="Found in SAP by reconciliation", updated_at=now)
+
+    logger.info(f"GRPO reconciliation marked {len(found)} posting(s) POSTED, {len(canceled)} FAILED")
+    return len(found) + len(canceled)
@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import GRPOPosting, GRPOLinePosting
+from .models import GRPOPosting, GRPOLinePosting, GRPOPostingJob
 
 
 class GRPOLineDetailSerializer(serializers.Serializer):
@@ -67,6 +68,23 @@ class GRPOPostRequestSerializer(serializers.Serializer):
         return value
 
 
+class GRPOBatchPostRequestSerializer(serializers.Serializer):
+    """Serializer for posting several GRPOs in one SAP round trip"""
+    postings = GRPOPostRequestSerializer(many=True, required=True)
+
+    def validate_postings(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one GRPO posting is required")
+        if len(value) > settings.GRPO_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"At most {settings.GRPO_BATCH_MAX_SIZE} GRPO postings can be sent in one batch"
+            )
+        po_receipt_ids = [posting["po_receipt_id"] for posting in value]
+        if len(po_receipt_ids) != len(set(po_receipt_ids)):
+            raise serializers.ValidationError("Each PO receipt can appear only once in a batch")
+        return value
+
+
 class GRPOLinePostingSerializer(serializers.ModelSerializer):
     item_code = serializers.CharField(source='po_item_receipt.po_item_code', read_only=True)
     item_name = serializers.CharField(source='po_item_receipt.item_name', read_only=True)
@@ -116,3 +134,46 @@ class GRPOPostResponseSerializer(serializers.Serializer):
     sap_doc_num = serializers.IntegerField(allow_null=True)
     sap_doc_total = serializers.DecimalField(max_digits=18, decimal_places=2, allow_null=True)
     message = serializers.CharField()
+
+
+class GRPOBatchPostResultSerializer(serializers.Serializer):
+    """Serializer for one posting in a GRPO batch response"""
+    vehicle_entry_id = serializers.IntegerField()
+    po_receipt_id = serializers.IntegerField()
+    success = serializers.BooleanField()
+    grpo_posting_id = serializers.IntegerField(allow_null=True)
+    sap_doc_entry = serializers.IntegerField(allow_null=True)
+    sap_doc_num = serializers.IntegerField(allow_null=True)
+    sap_doc_total = serializers.DecimalField(max_digits=18, decimal_places=2, allow_null=True)
+    error = serializers.CharField(allow_null=True)
+
+
+class GRPOBatchQueueResultSerializer(serializers.Serializer):
+    """Serializer for one posting in a GRPO batch response (outbox mode)"""
+    vehicle_entry_id = serializers.IntegerField()
+    po_receipt_id = serializers.IntegerField()
+    success = serializers.BooleanField()
+    job_id = serializers.IntegerField(allow_null=True)
+    grpo_posting_id = serializers.IntegerField(allow_null=True)
+    error = serializers.CharField(allow_null=True)
+
+
+class GRPOPostingJobSerializer(serializers.ModelSerializer):
+    """Serializer for a queued GRPO posting job (outbox mode)"""
+    grpo_posting_status = serializers.CharField(source='grpo_posting.status', read_only=True)
+    sap_doc_num = serializers.IntegerField(source='grpo_posting.sap_doc_num', read_only=True)
+
+    class Meta:
+        model = GRPOPostingJob
+        fields = [
+            'id',
+            'grpo_posting',
+            'grpo_posting_status',
+            'sap_doc_num',
+            'status',
+            'attempts',
+            'next_attempt_at',
+            'last_error',
+            'created_at',
+            'updated_at'
+        ]
@@ -1,8 +1,13 @@
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 from decimal import Decimal
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q
 
 from gate_core.enums import GateEntryStatus
 from driver_management.models import VehicleEntry
@@ -10,8 +15,11 @@ from raw_material_gatein.models import POReceipt, POItemReceipt
 from quality_control.enums import InspectionStatus
 from sap_client.client import SAPClient
 from sap_client.exceptions import SAPConnectionError, SAPDataError, SAPValidationError
+from sap_client.metrics import recorder
+from sap_client.open_po_snapshot import refresh_supplier
+from sap_client.service_layer.async_client import AsyncServiceLayer
 
-from .models import GRPOPosting, GRPOLinePosting, GRPOStatus
+from .models import GRPOPosting, GRPOLinePosting, GRPOStatus, GRPOPostingJob, GRPOJobStatus
 
 logger = logging.getLogger(__name__)
 
@@ -24,85 +32,143 @@ class GRPOService:
     def __init__(self, company_code: str):
         self.company_code = company_code
 
-    def get_pending_grpo_entries(self) -> List[VehicleEntry]:
+    def get_pending_grpo_entries(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+    ):
         """
-        Get all completed gate entries that are ready for GRPO posting.
-        Returns entries with status COMPLETED or QC_COMPLETED.
+        Completed gate entries (COMPLETED / QC_COMPLETED) with at least one
+        PO not yet posted, newest first, in ONE query.
+
+        Each entry is annotated with total_po_count, posted_po_count and
+        pending_po_count; entries with nothing pending are dropped by the
+        database (HAVING). ``before`` is an (entry_time, id) keyset position:
+        only entries after it in the list order are returned.
         """
-        return VehicleEntry.objects.filter(
+        entries = VehicleEntry.objects.filter(
             company__code=self.company_code,
             entry_type="RAW_MATERIAL",
             status__in=[GateEntryStatus.COMPLETED, GateEntryStatus.QC_COMPLETED]
-        ).prefetch_related(
-            "po_receipts",
-            "po_receipts__items",
-            "grpo_postings"
-        ).order_by("-entry_time")
+        )
+        if date_from:
+            entries = entries.filter(entry_time__date__gte=date_from)
+        if date_to:
+            entries = entries.filter(entry_time__date__lte=date_to)
+        if before:
+            entry_time, entry_id = before
+            entries = entries.filter(
+                Q(entry_time__lt=entry_time) | Q(entry_time=entry_time, id__lt=entry_id)
+            )
+
+        return entries.only(
+            "id", "entry_no", "status", "entry_time"
+        ).annotate(
+            total_po_count=Count("po_receipts", distinct=True),
+            posted_po_count=Count(
+                "grpo_postings",
+                filter=Q(grpo_postings__status=GRPOStatus.POSTED),
+                distinct=True
+            ),
+        ).annotate(
+            pending_po_count=F("total_po_count") - F("posted_po_count")
+        ).filter(
+            pending_po_count__gt=0
+        ).order_by("-entry_time", "-id")
 
     def get_grpo_preview_data(self, vehicle_entry_id: int) -> List[Dict[str, Any]]:
         """
         Get all data required for GRPO posting for a specific gate entry.
         Returns list of PO receipts with their items and QC status.
         """
-        try:
-            vehicle_entry = VehicleEntry.objects.prefetch_related(
-                "po_receipts",
-                "po_receipts__items",
-                "po_receipts__items__arrival_slip",
-                "po_receipts__items__arrival_slip__inspection",
-                "grpo_postings"
-            ).get(id=vehicle_entry_id)
-        except VehicleEntry.DoesNotExist:
+        previews = self._build_previews(VehicleEntry.objects.filter(id=vehicle_entry_id))
+        if vehicle_entry_id not in previews:
             raise ValueError(f"Vehicle entry {vehicle_entry_id} not found")
+        return previews[vehicle_entry_id]
 
-        is_ready = vehicle_entry.status in [
-            GateEntryStatus.COMPLETED,
-            GateEntryStatus.QC_COMPLETED
-        ]
-
-        result = []
-        for po_receipt in vehicle_entry.po_receipts.all():
-            # Check if GRPO already posted for this PO
-            existing_grpo = vehicle_entry.grpo_postings.filter(
-                po_receipt=po_receipt
-            ).first()
-
-            items_data = []
-            for item in po_receipt.items.all():
-                qc_status = self._get_item_qc_status(item)
-                items_data.append({
-                    "po_item_receipt_id": item.id,
-                    "item_code": item.po_item_code,
-                    "item_name": item.item_name,
-                    "ordered_qty": item.ordered_qty,
-                    "received_qty": item.received_qty,
-                    "accepted_qty": item.accepted_qty,
-                    "rejected_qty": item.rejected_qty,
-                    "uom": item.uom,
-                    "qc_status": qc_status
+    def get_grpo_previews(self, vehicle_entry_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        get_grpo_preview_data() for several gate entries of this company in
+        one call, as one flat list in the order of ``vehicle_entry_ids``.
+        Unknown ids are skipped.
+        """
+        previews = self._build_previews(VehicleEntry.objects.filter(
+            id__in=vehicle_entry_ids,
+            company__code=self.company_code
+        ))
+        return [row for entry_id in dict.fromkeys(vehicle_entry_ids) for row in previews.get(entry_id, [])]
+
+    def _build_previews(self, entries) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Preview rows per vehicle entry id. Runs a fixed number of queries
+        (entries, PO receipts, items with arrival slip and inspection,
+        postings) however many POs and items there are; postings are
+        matched to PO receipts through an in-memory index.
+        """
+        entries = list(entries.prefetch_related(
+            "po_receipts",
+            Prefetch(
+                "po_receipts__items",
+                queryset=POItemReceipt.objects.select_related("arrival_slip__inspection")
+            ),
+            "grpo_postings"
+        ))
+
+        previews = {}
+        for vehicle_entry in entries:
+            is_ready = vehicle_entry.status in [
+                GateEntryStatus.COMPLETED,
+                GateEntryStatus.QC_COMPLETED
+            ]
+            # GRPO posting per PO (unique per vehicle entry + PO receipt)
+            postings = {posting.po_receipt_id: posting for posting in vehicle_entry.grpo_postings.all()}
+
+            result = []
+            for po_receipt in vehicle_entry.po_receipts.all():
+                existing_grpo = postings.get(po_receipt.id)
+
+                items_data = []
+                for item in po_receipt.items.all():
+                    qc_status = self._get_item_qc_status(item)
+                    items_data.append({
+                        "po_item_receipt_id": item.id,
+                        "item_code": item.po_item_code,
+                        "item_name": item.item_name,
+                        "ordered_qty": item.ordered_qty,
+                        "received_qty": item.received_qty,
+                        "accepted_qty": item.accepted_qty,
+                        "rejected_qty": item.rejected_qty,
+                        "uom": item.uom,
+                        "qc_status": qc_status
+                    })
+
+                result.append({
+                    "vehicle_entry_id": vehicle_entry.id,
+                    "entry_no": vehicle_entry.entry_no,
+                    "entry_status": vehicle_entry.status,
+                    "is_ready_for_grpo": is_ready,
+                    "po_receipt_id": po_receipt.id,
+                    "po_number": po_receipt.po_number,
+                    "supplier_code": po_receipt.supplier_code,
+                    "supplier_name": po_receipt.supplier_name,
+                    "invoice_no": po_receipt.invoice_no or "",
+                    "invoice_date": po_receipt.invoice_date,
+                    "challan_no": po_receipt.challan_no or "",
+                    "items": items_data,
+                    "grpo_status": existing_grpo.status if existing_grpo else None,
+                    "sap_doc_num": existing_grpo.sap_doc_num if existing_grpo else None
                 })
 
-            result.append({
-                "vehicle_entry_id": vehicle_entry.id,
-                "entry_no": vehicle_entry.entry_no,
-                "entry_status": vehicle_entry.status,
-                "is_ready_for_grpo": is_ready,
-                "po_receipt_id": po_receipt.id,
-                "po_number": po_receipt.po_number,
-                "supplier_code": po_receipt.supplier_code,
-                "supplier_name": po_receipt.supplier_name,
-                "invoice_no": po_receipt.invoice_no or "",
-                "invoice_date": po_receipt.invoice_date,
-                "challan_no": po_receipt.challan_no or "",
-                "items": items_data,
-                "grpo_status": existing_grpo.status if existing_grpo else None,
-                "sap_doc_num": existing_grpo.sap_doc_num if existing_grpo else None
-            })
+            previews[vehicle_entry.id] = result
 
-        return result
+        return previews
 
     def _get_item_qc_status(self, po_item_receipt: POItemReceipt) -> str:
-        """Get QC status for a PO item receipt."""
+        """
+        Get QC status for a PO item receipt. Select arrival_slip__inspection
+        with the item, or this runs up to two queries per item.
+        """
         if not hasattr(po_item_receipt, "arrival_slip"):
             return "NO_ARRIVAL_SLIP"
 
@@ -116,8 +182,7 @@ class GRPOService:
         inspection = arrival_slip.inspection
         return inspection.final_status
 
-    @transaction.atomic
-    def post_grpo(
+    def _prepare_posting(
         self,
         vehicle_entry_id: int,
         po_receipt_id: int,
@@ -126,19 +191,15 @@ class GRPOService:
         branch_id: int,
         warehouse_code: Optional[str] = None,
         comments: Optional[str] = None
-    ) -> GRPOPosting:
+    ):
         """
-        Post GRPO to SAP for a specific PO receipt.
-        Updates accepted quantities in POItemReceipt before posting.
+        Validate a GRPO request, store accepted/rejected quantities and get or
+        create its GRPOPosting.
 
-        Args:
-            vehicle_entry_id: ID of the vehicle entry
-            po_receipt_id: ID of the PO receipt
-            user: User posting the GRPO
-            items: List of dicts with po_item_receipt_id and accepted_qty
-            branch_id: SAP Branch/Business Place ID (BPLId)
-            warehouse_code: Optional warehouse code for SAP
-            comments: Optional comments for SAP document
+        Returns:
+            (grpo_posting, po_receipt, grpo_payload, retry); retry is True
+            when the posting existed already, so an earlier attempt may have
+            created its GRPO in SAP.
         """
         # Get vehicle entry and PO receipt
         try:
@@ -163,6 +224,8 @@ class GRPOService:
             raise ValueError(f"Invalid PO item receipt IDs: {invalid_ids}")
 
         # Update accepted and rejected quantities in POItemReceipt
+        updated_items = []
+        now = timezone.now()
         for item in po_receipt.items.all():
             if item.id in items_qty_map:
                 accepted_qty = items_qty_map[item.id]
@@ -174,7 +237,10 @@ class GRPOService:
                     )
                 item.accepted_qty = accepted_qty
                 item.rejected_qty = item.received_qty - accepted_qty
-                item.save()
+                # bulk_update() skips auto_now
+                item.updated_at = now
+                updated_items.append(item)
+        POItemReceipt.objects.bulk_update(updated_items, ["accepted_qty", "rejected_qty", "updated_at"])
 
         # Check if already posted
         existing = GRPOPosting.objects.filter(
@@ -210,7 +276,6 @@ class GRPOService:
 
         # Build GRPO payload
         document_lines = []
-        grpo_lines_data = []
 
         for item in po_receipt.items.all():
             # Only post accepted quantities
@@ -230,10 +295,6 @@ class GRPOService:
             # TODO: Add PO linking support when DocEntry is available
 
             document_lines.append(line_data)
-            grpo_lines_data.append({
-                "po_item_receipt": item,
-                "quantity_posted": item.accepted_qty
-            })
 
         if not document_lines:
             grpo_posting.status = GRPOStatus.FAILED
@@ -251,30 +312,170 @@ class GRPOService:
         if comments:
             grpo_payload["Comments"] = comments
 
+        if settings.GRPO_IDEMPOTENCY_FIELD:
+            grpo_payload[settings.GRPO_IDEMPOTENCY_FIELD] = str(grpo_posting.idempotency_key)
+
+        return grpo_posting, po_receipt, grpo_payload, not created
+
+    def _record_success(self, grpo_posting: GRPOPosting, po_receipt: POReceipt, result: dict, user):
+        """Store the SAP response on the posting and create its line postings."""
+        grpo_posting.sap_doc_entry = result.get("DocEntry")
+        grpo_posting.sap_doc_num = result.get("DocNum")
+        grpo_posting.sap_doc_total = Decimal(str(result.get("DocTotal", 0)))
+        grpo_posting.status = GRPOStatus.POSTED
+        grpo_posting.error_message = None
+        grpo_posting.reserved_at = None
+        grpo_posting.posted_at = timezone.now()
+        grpo_posting.posted_by = user
+        grpo_posting.save()
+
+        # Create line posting records for every accepted item
+        GRPOLinePosting.objects.bulk_create([
+            GRPOLinePosting(
+                grpo_posting=grpo_posting,
+                po_item_receipt=item,
+                quantity_posted=item.accepted_qty
+            )
+            for item in po_receipt.items.all()
+            if item.accepted_qty > 0
+        ])
+
+    def _reserve_posting(self, grpo_posting: GRPOPosting, po_receipt: POReceipt, user) -> GRPOPosting:
+        """
+        Lock a prepared posting, mark it PENDING for this user and stamp
+        reserved_at. Must run in the transaction of _prepare_posting().
+        _record_success() / _record_failure() release the reservation.
+
+        Raises:
+            ValueError: the PO was posted since _prepare_posting() checked,
+                is already queued in the outbox, or another attempt
+                reserved it less than GRPO_RESERVATION_TIMEOUT ago and has
+                not finished.
+        """
+        grpo_posting = GRPOPosting.objects.select_for_update().get(pk=grpo_posting.pk)
+        if grpo_posting.status == GRPOStatus.POSTED:
+            raise ValueError(
+                f"GRPO already posted for PO {po_receipt.po_number}. "
+                f"SAP Doc Num: {grpo_posting.sap_doc_num}"
+            )
+        if grpo_posting.jobs.filter(status__in=GRPOPostingJob.ACTIVE_STATUSES).exists():
+            raise ValueError(f"GRPO for PO {po_receipt.po_number} is already queued for posting")
+
+        now = timezone.now()
+        if (
+            grpo_posting.status == GRPOStatus.PENDING
+            and grpo_posting.reserved_at is not None
+            and grpo_posting.reserved_at > now - timedelta(seconds=settings.GRPO_RESERVATION_TIMEOUT)
+        ):
+            raise ValueError(f"GRPO for PO {po_receipt.po_number} is already being posted")
+
+        grpo_posting.status = GRPOStatus.PENDING
+        grpo_posting.error_message = None
+        grpo_posting.posted_by = user
+        grpo_posting.reserved_at = now
+        grpo_posting.save()
+        return grpo_posting
+
+    @staticmethod
+    def _find_in_sap(sap_client: SAPClient, grpo_postings: List[GRPOPosting]) -> Dict[str, dict]:
+        """
+        SAP GRPOs already created for these postings, looked up by
+        idempotency key in ONE query: {key: SAP result dict as returned by
+        create_grpo}. Empty when GRPO_IDEMPOTENCY_FIELD is not set.
+        """
+        if not settings.GRPO_IDEMPOTENCY_FIELD or not grpo_postings:
+            return {}
+        documents = sap_client.find_grpos_by_key([str(p.idempotency_key) for p in grpo_postings])
+        return {
+            key: {"DocEntry": doc.doc_entry, "DocNum": doc.doc_num, "DocTotal": doc.doc_total}
+            for key, doc in documents.items()
+        }
+
+    def _record_failure(self, grpo_posting: GRPOPosting, error_message: str):
+        grpo_posting.status = GRPOStatus.FAILED
+        grpo_posting.error_message = error_message
+        grpo_posting.reserved_at = None
+        grpo_posting.save()
+
+    def _refresh_open_pos(self, sap_client: SAPClient, supplier_code: str):
+        """
+        After a posting: drop the supplier's cached open POs and, once the
+        transaction commits, re-read its lines into the open PO snapshot.
+        """
+        sap_client.invalidate_open_pos(supplier_code)
+
+        def refresh():
+            try:
+                refresh_supplier(self.company_code, supplier_code)
+            except (SAPConnectionError, SAPDataError) as e:
+                # The next sync_open_po_lines run picks the change up
+                logger.warning(f"Open PO snapshot refresh failed for {supplier_code}: {e}")
+
+        transaction.on_commit(refresh)
+
+    def post_grpo(
+        self,
+        vehicle_entry_id: int,
+        po_receipt_id: int,
+        user,
+        items: List[Dict[str, Any]],
+        branch_id: int,
+        warehouse_code: Optional[str] = None,
+        comments: Optional[str] = None
+    ) -> GRPOPosting:
+        """
+        Post GRPO to SAP for a specific PO receipt.
+        Updates accepted quantities in POItemReceipt before posting.
+
+        Runs in two short transactions around the SAP call: the first stores
+        the quantities and reserves the posting (PENDING), the second records
+        the SAP result. No row lock is held while SAP is posting.
+
+        A posting that was attempted before is first looked up in SAP by its
+        idempotency key; a GRPO found there is recorded instead of posting
+        a duplicate.
+
+        Args:
+            vehicle_entry_id: ID of the vehicle entry
+            po_receipt_id: ID of the PO receipt
+            user: User posting the GRPO
+            items: List of dicts with po_item_receipt_id and accepted_qty
+            branch_id: SAP Branch/Business Place ID (BPLId)
+            warehouse_code: Optional warehouse code for SAP
+            comments: Optional comments for SAP document
+        """
+        with transaction.atomic():
+            grpo_posting, po_receipt, grpo_payload, retry = self._prepare_posting(
+                vehicle_entry_id=vehicle_entry_id,
+                po_receipt_id=po_receipt_id,
+                user=user,
+                items=items,
+                branch_id=branch_id,
+                warehouse_code=warehouse_code,
+                comments=comments
+            )
+            grpo_posting = self._reserve_posting(grpo_posting, po_receipt, user)
+
         # Log payload for debugging
         logger.info(f"GRPO Payload: {grpo_payload}")
 
-        # Post to SAP
+        # Post to SAP, outside any transaction
         try:
             sap_client = SAPClient(company_code=self.company_code)
-            result = sap_client.create_grpo(grpo_payload)
-
-            # Update GRPO posting with SAP response
-            grpo_posting.sap_doc_entry = result.get("DocEntry")
-            grpo_posting.sap_doc_num = result.get("DocNum")
-            grpo_posting.sap_doc_total = Decimal(str(result.get("DocTotal", 0)))
-            grpo_posting.status = GRPOStatus.POSTED
-            grpo_posting.posted_at = timezone.now()
-            grpo_posting.posted_by = user
-            grpo_posting.save()
+            # An earlier attempt may have reached SAP (e.g. timed out after SAP committed)
+            existing = self._find_in_sap(sap_client, [grpo_posting]) if retry else {}
+            result = existing.get(str(grpo_posting.idempotency_key))
+            if result:
+                logger.info(f"GRPO for PO {po_receipt.po_number} found in SAP, not posting again")
+            else:
+                result = sap_client.create_grpo(grpo_payload)
 
-            # Create line posting records
-            for line_data in grpo_lines_data:
-                GRPOLinePosting.objects.create(
-                    grpo_posting=grpo_posting,
-                    po_item_receipt=line_data["po_item_receipt"],
-                    quantity_posted=line_data["quantity_posted"]
-                )
+            with transaction.atomic():
+                # Update GRPO posting with SAP response
+                self._record_success(grpo_posting, po_receipt, result, user)
+
+                # SAP open quantities changed; refresh this supplier's open POs
+                self._refresh_open_pos(sap_client, po_receipt.supplier_code)
 
             logger.info(
                 f"GRPO posted successfully for PO {po_receipt.po_number}. "
@@ -284,26 +485,219 @@ class GRPOService:
             return grpo_posting
 
         except SAPValidationError as e:
-            grpo_posting.status = GRPOStatus.FAILED
-            grpo_posting.error_message = str(e)
-            grpo_posting.save()
+            self._record_failure(grpo_posting, str(e))
             logger.error(f"SAP validation error posting GRPO: {e}")
             raise
 
         except SAPConnectionError as e:
-            grpo_posting.status = GRPOStatus.FAILED
-            grpo_posting.error_message = "SAP system unavailable"
-            grpo_posting.save()
+            self._record_failure(grpo_posting, "SAP system unavailable")
             logger.error(f"SAP connection error posting GRPO: {e}")
             raise
 
         except SAPDataError as e:
-            grpo_posting.status = GRPOStatus.FAILED
-            grpo_posting.error_message = str(e)
-            grpo_posting.save()
+            self._record_failure(grpo_posting, str(e))
             logger.error(f"SAP data error posting GRPO: {e}")
             raise
 
+    def post_grpo_batch(self, postings: List[Dict[str, Any]], user) -> List[Dict[str, Any]]:
+        """
+        Post several GRPOs (one or more gate entries) in ONE SAP $batch call.
+
+        Each request is validated and stored in its own short transaction;
+        requests that fail validation are reported and skipped. The SAP call
+        runs outside any transaction, and every SAP result is mapped back to
+        its GRPOPosting. Postings attempted before are looked up in SAP by
+        idempotency key (one query) and only the ones not found are posted.
+
+        Args:
+            postings: list of dicts with the same keys as post_grpo()
+                (vehicle_entry_id, po_receipt_id, items, branch_id,
+                warehouse_code, comments)
+            user: User posting the GRPOs
+
+        Returns:
+            One result dict per request, in request order. A document SAP
+            sent no response for is marked FAILED with a retry message;
+            posting it again first looks it up by idempotency key.
+
+        Raises:
+            SAPConnectionError: SAP could not be reached; every prepared
+                posting is marked FAILED first.
+        """
+        results = []
+        prepared = []  # (result index, grpo_posting, po_receipt, payload, retry)
+
+        for request_data in postings:
+            result = {
+                "vehicle_entry_id": request_data["vehicle_entry_id"],
+                "po_receipt_id": request_data["po_receipt_id"],
+                "success": False,
+                "grpo_posting_id": None,
+                "sap_doc_entry": None,
+                "sap_doc_num": None,
+                "sap_doc_total": None,
+                "error": None,
+            }
+            results.append(result)
+
+            try:
+                with transaction.atomic():
+                    grpo_posting, po_receipt, grpo_payload, retry = self._prepare_posting(
+                        vehicle_entry_id=request_data["vehicle_entry_id"],
+                        po_receipt_id=request_data["po_receipt_id"],
+                        user=user,
+                        items=request_data["items"],
+                        branch_id=request_data["branch_id"],
+                        warehouse_code=request_data.get("warehouse_code"),
+                        comments=request_data.get("comments")
+                    )
+                    grpo_posting = self._reserve_posting(grpo_posting, po_receipt, user)
+            except ValueError as e:
+                result["error"] = str(e)
+                continue
+
+            result["grpo_posting_id"] = grpo_posting.id
+            prepared.append((len(results) - 1, grpo_posting, po_receipt, grpo_payload, retry))
+
+        if not prepared:
+            return results
+
+        logger.info(f"Posting {len(prepared)} GRPOs to SAP in one batch")
+
+        sap_client = SAPClient(company_code=self.company_code)
+        try:
+            existing = self._find_in_sap(
+                sap_client, [grpo_posting for _, grpo_posting, _, _, retry in prepared if retry]
+            )
+            sap_results = iter(sap_client.create_grpo_batch([
+                payload for _, grpo_posting, _, payload, _ in prepared
+                if str(grpo_posting.idempotency_key) not in existing
+            ]) if len(existing) < len(prepared) else [])
+        except SAPConnectionError as e:
+            logger.error(f"SAP connection error posting GRPO batch: {e}")
+            for _, grpo_posting, _, _, _ in prepared:
+                self._record_failure(grpo_posting, "SAP system unavailable")
+            raise
+        except SAPDataError as e:
+            logger.error(f"SAP data error posting GRPO batch: {e}")
+            for index, grpo_posting, _, _, _ in prepared:
+                self._record_failure(grpo_posting, str(e))
+                results[index]["error"] = str(e)
+            return results
+
+        posted_suppliers = set()
+        for index, grpo_posting, po_receipt, _, _ in prepared:
+            found = existing.get(str(grpo_posting.idempotency_key))
+            sap_result = {"success": True, "data": found} if found else next(sap_results)
+            result = results[index]
+            if not sap_result["success"]:
+                self._record_failure(grpo_posting, sap_result["error"])
+                result["error"] = sap_result["error"]
+                continue
+
+            with transaction.atomic():
+                self._record_success(grpo_posting, po_receipt, sap_result["data"], user)
+            posted_suppliers.add(po_receipt.supplier_code)
+
+            result.update({
+                "success": True,
+                "sap_doc_entry": grpo_posting.sap_doc_entry,
+                "sap_doc_num": grpo_posting.sap_doc_num,
+                "sap_doc_total": grpo_posting.sap_doc_total,
+            })
+
+        for supplier_code in posted_suppliers:
+            self._refresh_open_pos(sap_client, supplier_code)
+
+        return results
+
+    @transaction.atomic
+    def enqueue_grpo(
+        self,
+        vehicle_entry_id: int,
+        po_receipt_id: int,
+        user,
+        items: List[Dict[str, Any]],
+        branch_id: int,
+        warehouse_code: Optional[str] = None,
+        comments: Optional[str] = None
+    ) -> GRPOPostingJob:
+        """
+        Validate a GRPO request and queue it for posting (outbox mode).
+        No SAP call is made here; the process_grpo_outbox command posts it.
+
+        Takes the same arguments as post_grpo().
+        """
+        grpo_posting, po_receipt, grpo_payload, retry = self._prepare_posting(
+            vehicle_entry_id=vehicle_entry_id,
+            po_receipt_id=po_receipt_id,
+            user=user,
+            items=items,
+            branch_id=branch_id,
+            warehouse_code=warehouse_code,
+            comments=comments
+        )
+
+        # Lock the posting so two requests cannot queue the same PO twice
+        grpo_posting = self._reserve_posting(grpo_posting, po_receipt, user)
+
+        job = GRPOPostingJob.objects.create(
+            grpo_posting=grpo_posting,
+            company_code=self.company_code,
+            payload=grpo_payload,
+            retry=retry,
+            created_by=user
+        )
+
+        logger.info(f"GRPO for PO {po_receipt.po_number} queued as job {job.id}")
+        return job
+
+    def enqueue_grpo_batch(self, postings: List[Dict[str, Any]], user) -> List[Dict[str, Any]]:
+        """
+        Queue several GRPOs for posting (outbox mode), each with
+        enqueue_grpo() in its own transaction. The outbox worker posts them
+        concurrently, so they are not sent as one $batch.
+
+        Returns:
+            One result dict per request, in request order.
+        """
+        results = []
+        for request_data in postings:
+            result = {
+                "vehicle_entry_id": request_data["vehicle_entry_id"],
+                "po_receipt_id": request_data["po_receipt_id"],
+                "success": False,
+                "job_id": None,
+                "grpo_posting_id": None,
+                "error": None,
+            }
+            results.append(result)
+
+            try:
+                job = self.enqueue_grpo(
+                    vehicle_entry_id=request_data["vehicle_entry_id"],
+                    po_receipt_id=request_data["po_receipt_id"],
+                    user=user,
+                    items=request_data["items"],
+                    branch_id=request_data["branch_id"],
+                    warehouse_code=request_data.get("warehouse_code"),
+                    comments=request_data.get("comments")
+                )
+            except ValueError as e:
+                result["error"] = str(e)
+                continue
+
+            result.update({"success": True, "job_id": job.id, "grpo_posting_id": job.grpo_posting_id})
+        return results
+
+    def get_posting_job(self, job_id: int) -> GRPOPostingJob:
+        try:
+            return GRPOPostingJob.objects.select_related(
+                "grpo_posting"
+            ).get(id=job_id, company_code=self.company_code)
+        except GRPOPostingJob.DoesNotExist:
+            raise ValueError(f"GRPO posting job {job_id} not found")
+
     def get_grpo_posting_history(
         self,
         vehicle_entry_id: Optional[int] = None
@@ -319,3 +713,184 @@ class GRPOService:
             queryset = queryset.filter(vehicle_entry_id=vehicle_entry_id)
 
         return queryset.order_by("-created_at")
+
+
+class GRPOOutboxWorker:
+    """
+    Drains the GRPO outbox (GRPOPostingJob rows).
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED in a short
+    transaction, so several workers can run side by side. The SAP calls run
+    outside any transaction, concurrently over the async Service Layer
+    client when GRPO_OUTBOX_CONCURRENCY > 1. Connection and server errors are retried with
+    exponential backoff; SAP validation errors, and jobs that run out of
+    attempts, go to DEAD and mark the GRPOPosting FAILED.
+    """
+
+    def claim_jobs(self, limit: int) -> List[GRPOPostingJob]:
+        """Mark up to ``limit`` due jobs PROCESSING and return them."""
+        now = timezone.now()
+        # A PROCESSING job whose worker died is picked up again after the lock timeout
+        stale_before = now - timedelta(seconds=settings.GRPO_OUTBOX_LOCK_TIMEOUT)
+
+        with transaction.atomic():
+            jobs = list(
+                GRPOPostingJob.objects.select_for_update(skip_locked=True).filter(
+                    Q(status__in=[GRPOJobStatus.QUEUED, GRPOJobStatus.RETRY], next_attempt_at__lte=now)
+                    | Q(status=GRPOJobStatus.PROCESSING, locked_at__lt=stale_before)
+                ).order_by("next_attempt_at", "id")[:limit]
+            )
+            for job in jobs:
+                job.status = GRPOJobStatus.PROCESSING
+                job.locked_at = now
+                job.attempts += 1
+                job.updated_at = now
+            GRPOPostingJob.objects.bulk_update(jobs, ["status", "locked_at", "attempts", "updated_at"])
+
+        return jobs
+
+    def process_jobs(self, jobs: List[GRPOPostingJob]) -> List[str]:
+        """
+        Post claimed jobs to SAP; returns each job's new status. With
+        GRPO_OUTBOX_CONCURRENCY > 1 the postings are sent concurrently over
+        one async Service Layer client instead of one after another, after
+        ONE idempotency key lookup per company for all retried jobs.
+        Unexpected errors (bad company code, DB error...) are retried later.
+        """
+        concurrent = settings.GRPO_OUTBOX_CONCURRENCY > 1 and len(jobs) > 1
+        if concurrent:
+            outcomes = self._find_posted(jobs)
+            to_post = [job for job in jobs if job.id not in outcomes]
+            if to_post:
+                outcomes.update(zip(
+                    (job.id for job in to_post),
+                    asyncio.run(self._post_concurrently(to_post))
+                ))
+            recorder.flush_if_due()
+
+        statuses = []
+        for job in jobs:
+            try:
+                if concurrent:
+                    statuses.append(self._finish_job(job, outcomes[job.id]))
+                else:
+                    statuses.append(self.process_job(job))
+            except Exception as e:
+                self.schedule_retry(job, f"{type(e).__name__}: {e}")
+                statuses.append(job.status)
+        return statuses
+
+    async def _post_concurrently(self, jobs: List[GRPOPostingJob]) -> list:
+        """SAP result or exception per job, at most GRPO_OUTBOX_CONCURRENCY in flight."""
+        semaphore = asyncio.Semaphore(settings.GRPO_OUTBOX_CONCURRENCY)
+
+        async with AsyncServiceLayer() as service_layer:
+            async def post(job):
+                async with semaphore:
+                    return await SAPClient(company_code=job.company_code).acreate_grpo(
+                        job.payload, service_layer
+                    )
+
+            return await asyncio.gather(*(post(job) for job in jobs), return_exceptions=True)
+
+    def _find_posted(self, jobs: List[GRPOPostingJob]) -> Dict[int, Any]:
+        """
+        {job id: SAP result} for retried jobs (a second attempt, or a
+        posting re-queued after an earlier attempt) whose GRPO was already
+        created in SAP, one lookup per company. A failed lookup is
+        returned as the job's outcome so the job is retried, not posted.
+        """
+        retried = defaultdict(list)
+        for job in jobs:
+            if job.retry or job.attempts > 1:
+                retried[job.company_code].append(job)
+
+        outcomes = {}
+        for company_code, company_jobs in retried.items():
+            postings = {str(job.grpo_posting.idempotency_key): job for job in company_jobs}
+            try:
+                found = GRPOService._find_in_sap(
+                    SAPClient(company_code=company_code), [job.grpo_posting for job in company_jobs]
+                )
+            except (SAPConnectionError, SAPDataError) as e:
+                outcomes.update((job.id, e) for job in company_jobs)
+                continue
+            outcomes.update((postings[key].id, result) for key, result in found.items())
+        return outcomes
+
+    def process_job(self, job: GRPOPostingJob) -> str:
+        """Post one claimed job to SAP; returns the job's new status."""
+        sap_client = SAPClient(company_code=job.company_code)
+        try:
+            outcome = self._find_posted([job]).get(job.id) or sap_client.create_grpo(job.payload)
+        except (SAPConnectionError, SAPDataError, SAPValidationError) as e:
+            outcome = e
+        return self._finish_job(job, outcome)
+
+    def _finish_job(self, job: GRPOPostingJob, outcome) -> str:
+        """Record a SAP result (dict) or SAP exception for a job; returns its new status."""
+        if isinstance(outcome, SAPValidationError):
+            logger.error(f"SAP validation error posting GRPO job {job.id}: {outcome}")
+            self.mark_dead(job, str(outcome))
+            return job.status
+        if isinstance(outcome, SAPConnectionError):
+            logger.error(f"SAP connection error posting GRPO job {job.id}: {outcome}")
+            self.schedule_retry(job, str(outcome), posting_error="SAP system unavailable")
+            return job.status
+        if isinstance(outcome, SAPDataError):
+            logger.error(f"SAP data error posting GRPO job {job.id}: {outcome}")
+            self.schedule_retry(job, str(outcome))
+            return job.status
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+        grpo_posting = job.grpo_posting
+        po_receipt = grpo_posting.po_receipt
+        service = GRPOService(job.company_code)
+        with transaction.atomic():
+            service._record_success(grpo_posting, po_receipt, outcome, job.created_by)
+            job.status = GRPOJobStatus.DONE
+            job.last_error = None
+            job.locked_at = None
+            job.save()
+
+        service._refresh_open_pos(SAPClient(company_code=job.company_code), po_receipt.supplier_code)
+
+        logger.info(
+            f"GRPO job {job.id} posted for PO {po_receipt.po_number}. "
+            f"SAP DocNum: {grpo_posting.sap_doc_num}"
+        )
+        return job.status
+
+    def schedule_retry(self, job: GRPOPostingJob, error: str, posting_error: Optional[str] = None):
+        """Queue the job again with exponential backoff, or dead-letter it."""
+        if job.attempts >= settings.GRPO_OUTBOX_MAX_ATTEMPTS:
+            self.mark_dead(job, error, posting_error)
+            return
+
+        delay = min(
+            settings.GRPO_OUTBOX_RETRY_BASE_DELAY * (2 ** max(job.attempts - 1, 0)),
+            settings.GRPO_OUTBOX_RETRY_MAX_DELAY
+        )
+        with transaction.atomic():
+            job.status = GRPOJobStatus.RETRY
+            job.last_error = error
+            job.locked_at = None
+            job.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            job.save()
+
+            grpo_posting = job.grpo_posting
+            grpo_posting.error_message = posting_error or error
+            grpo_posting.save()
+
+        logger.info(f"GRPO job {job.id} will be retried in {delay}s (attempt {job.attempts})")
+
+    def mark_dead(self, job: GRPOPostingJob, error: str, posting_error: Optional[str] = None):
+        with transaction.atomic():
+            job.status = GRPOJobStatus.DEAD
+            job.last_error = error
+            job.locked_at = None
+            job.save()
+            GRPOService(job.company_code)._record_failure(job.grpo_posting, posting_error or error)
+
+        logger.error(f"GRPO job {job.id} moved to dead letter after {job.attempts} attempt(s): {error}")
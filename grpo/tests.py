@@ -1,19 +1,26 @@
+from datetime import timedelta
 from decimal import Decimal
 from unittest.mock import patch, MagicMock
 
-from django.test import TestCase
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
 from gate_core.enums import GateEntryStatus
 from company.models import Company
 from driver_management.models import VehicleEntry, Driver
-from vehicle_management.models import Vehicle
+from vehicle_management.models import Vehicle, VehicleType
 from raw_material_gatein.models import POReceipt, POItemReceipt
-from grpo.models import GRPOPosting, GRPOLinePosting, GRPOStatus
-from grpo.services import GRPOService
+from grpo.models import GRPOPosting, GRPOLinePosting, GRPOStatus, GRPOPostingJob, GRPOJobStatus
+from grpo.reconciliation import reconcile_grpo_postings
+from grpo.services import GRPOService, GRPOOutboxWorker
+from sap_client.dtos import DeliveryNoteDTO, DeliveryNoteLineDTO
+from sap_client.exceptions import SAPConnectionError, SAPValidationError
 
 User = get_user_model()
 
@@ -343,6 +350,91 @@ class GRPOAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class GRPOPendingEntriesTests(TestCase):
+    """Tests for the annotated pending GRPO entry query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(name="Test Company", code="TC001")
+        vehicle = Vehicle.objects.create(
+            vehicle_number="MH12AB4000", vehicle_type=VehicleType.objects.create(name="TRUCK")
+        )
+        driver = Driver.objects.create(name="Test Driver", mobile_no="9876543210", license_no="DL400000")
+
+        # entry n has 2 POs, n of them posted; the last one is not complete yet
+        cls.entries = []
+        for n, entry_status in enumerate([
+            GateEntryStatus.COMPLETED, GateEntryStatus.QC_COMPLETED, GateEntryStatus.COMPLETED,
+            GateEntryStatus.COMPLETED, GateEntryStatus.IN_PROGRESS,
+        ]):
+            entry = VehicleEntry.objects.create(
+                entry_no=f"VE-2024-40{n}", company=company, vehicle=vehicle, driver=driver,
+                entry_type="RAW_MATERIAL", status=entry_status
+            )
+            for po in range(2):
+                po_receipt = POReceipt.objects.create(
+                    vehicle_entry=entry, po_number=f"PO-4{n}{po}",
+                    supplier_code="SUP001", supplier_name="Test Supplier"
+                )
+                GRPOPosting.objects.create(
+                    vehicle_entry=entry, po_receipt=po_receipt,
+                    status=GRPOStatus.POSTED if po < n else GRPOStatus.FAILED
+                )
+            cls.entries.append(entry)
+
+    def test_pending_entries_counted_in_one_query(self):
+        service = GRPOService(company_code="TC001")
+
+        with self.assertNumQueries(1):
+            entries = list(service.get_pending_grpo_entries())
+
+        self.assertEqual(
+            [(e.id, e.total_po_count, e.posted_po_count, e.pending_po_count) for e in entries],
+            [(self.entries[1].id, 2, 1, 1), (self.entries[0].id, 2, 0, 2)]
+        )
+
+        first = entries[0]
+        self.assertEqual(
+            [e.id for e in service.get_pending_grpo_entries(before=(first.entry_time, first.id))],
+            [self.entries[0].id]
+        )
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.assertFalse(service.get_pending_grpo_entries(date_from=tomorrow).exists())
+
+    def test_previews_run_fixed_number_of_queries(self):
+        service = GRPOService(company_code="TC001")
+        entry_ids = [entry.id for entry in self.entries]
+
+        with self.assertNumQueries(4):
+            previews = service.get_grpo_previews(entry_ids)
+        self.assertEqual(len(previews), 10)
+        self.assertEqual(
+            [row["grpo_status"] for row in previews if row["vehicle_entry_id"] == self.entries[1].id],
+            [GRPOStatus.POSTED, GRPOStatus.FAILED]
+        )
+
+        for entry in self.entries:
+            for po in range(3):
+                po_receipt = POReceipt.objects.create(
+                    vehicle_entry=entry, po_number=f"PO-5{entry.id}{po}",
+                    supplier_code="SUP001", supplier_name="Test Supplier"
+                )
+                for line in range(3):
+                    POItemReceipt.objects.create(
+                        po_receipt=po_receipt, po_item_code=f"ITEM{line}", item_name="Test Item",
+                        ordered_qty=Decimal("10.000"), received_qty=Decimal("10.000"), uom="KG"
+                    )
+
+        with self.assertNumQueries(4):
+            previews = service.get_grpo_previews(entry_ids)
+        self.assertEqual(len(previews), 25)
+        self.assertEqual({item["qc_status"] for row in previews for item in row["items"]}, {"NO_ARRIVAL_SLIP"})
+        self.assertEqual(
+            service.get_grpo_preview_data(self.entries[0].id),
+            [row for row in previews if row["vehicle_entry_id"] == self.entries[0].id]
+        )
+
+
 class GRPOSerializerTests(TestCase):
     """Tests for GRPO serializers"""
 
@@ -384,3 +476,621 @@ class GRPOSerializerTests(TestCase):
         serializer = GRPOPostRequestSerializer(data=data)
         self.assertFalse(serializer.is_valid())
         self.assertIn("po_receipt_id", serializer.errors)
+
+
+class GRPOBatchPostingTests(TestCase):
+    """Tests for posting several GRPOs in one SAP $batch call"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name="Test Company", code="TC001")
+        cls.user = User.objects.create_user(
+            email="batchuser@example.com",
+            password="testpass123",
+            full_name="Batch User",
+            employee_code="EMP100"
+        )
+        cls.vehicle = Vehicle.objects.create(
+            vehicle_number="MH12AB9999",
+            vehicle_type=VehicleType.objects.create(name="TRUCK")
+        )
+        cls.driver = Driver.objects.create(
+            name="Test Driver", mobile_no="9876543210", license_no="DL999999"
+        )
+        cls.vehicle_entry = VehicleEntry.objects.create(
+            entry_no="VE-2024-100",
+            company=cls.company,
+            vehicle=cls.vehicle,
+            driver=cls.driver,
+            entry_type="RAW_MATERIAL",
+            status=GateEntryStatus.COMPLETED
+        )
+
+        cls.po_receipts = []
+        cls.po_items = []
+        for index in range(2):
+            po_receipt = POReceipt.objects.create(
+                vehicle_entry=cls.vehicle_entry,
+                po_number=f"PO-10{index}",
+                supplier_code="SUP001",
+                supplier_name="Test Supplier"
+            )
+            cls.po_receipts.append(po_receipt)
+            cls.po_items.append(POItemReceipt.objects.create(
+                po_receipt=po_receipt,
+                po_item_code=f"ITEM00{index}",
+                item_name="Test Item",
+                ordered_qty=Decimal("100.000"),
+                received_qty=Decimal("100.000"),
+                uom="KG"
+            ))
+
+    def _request(self, index, accepted_qty="90.000"):
+        return {
+            "vehicle_entry_id": self.vehicle_entry.id,
+            "po_receipt_id": self.po_receipts[index].id,
+            "items": [{"po_item_receipt_id": self.po_items[index].id, "accepted_qty": Decimal(accepted_qty)}],
+            "branch_id": 1,
+        }
+
+    @patch("grpo.services.SAPClient")
+    def test_batch_results_mapped_to_postings(self, mock_sap_client):
+        """Test one SAP call posts every GRPO and records each result"""
+        mock_sap_client.return_value.create_grpo_batch.return_value = [
+            {"success": True, "data": {"DocEntry": 11, "DocNum": 501, "DocTotal": 900}},
+            {"success": False, "status_code": 400, "error": "Invalid item"},
+        ]
+
+        service = GRPOService(company_code="TC001")
+        results = service.post_grpo_batch([self._request(0), self._request(1)], user=self.user)
+
+        mock_sap_client.return_value.create_grpo_batch.assert_called_once()
+        self.assertEqual(len(mock_sap_client.return_value.create_grpo_batch.call_args[0][0]), 2)
+
+        self.assertTrue(results[0]["success"])
+        self.assertEqual(results[0]["sap_doc_num"], 501)
+        self.assertFalse(results[1]["success"])
+        self.assertEqual(results[1]["error"], "Invalid item")
+
+        posted = GRPOPosting.objects.get(po_receipt=self.po_receipts[0])
+        self.assertEqual(posted.status, GRPOStatus.POSTED)
+        self.assertEqual(posted.lines.get().quantity_posted, Decimal("90.000"))
+        failed = GRPOPosting.objects.get(po_receipt=self.po_receipts[1])
+        self.assertEqual(failed.status, GRPOStatus.FAILED)
+        self.assertEqual(failed.error_message, "Invalid item")
+
+    @patch("grpo.services.SAPClient")
+    def test_batch_documents_without_response_left_for_retry(self, mock_sap_client):
+        """Test documents SAP answered are recorded when the $batch response is short"""
+        mock_sap_client.return_value.create_grpo_batch.return_value = [
+            {"success": True, "data": {"DocEntry": 11, "DocNum": 501, "DocTotal": 900}},
+            {"success": False, "status_code": None, "error": "No response from SAP for this GRPO, retry it",
+             "missing": True},
+        ]
+
+        results = GRPOService(company_code="TC001").post_grpo_batch(
+            [self._request(0), self._request(1)], user=self.user
+        )
+
+        self.assertEqual([result["success"] for result in results], [True, False])
+        self.assertEqual(GRPOPosting.objects.get(po_receipt=self.po_receipts[0]).status, GRPOStatus.POSTED)
+        unanswered = GRPOPosting.objects.get(po_receipt=self.po_receipts[1])
+        self.assertEqual((unanswered.status, unanswered.reserved_at), (GRPOStatus.FAILED, None))
+
+    @patch("grpo.services.SAPClient")
+    def test_invalid_request_skipped(self, mock_sap_client):
+        """Test a request that fails validation is reported and not sent to SAP"""
+        mock_sap_client.return_value.create_grpo_batch.return_value = [
+            {"success": True, "data": {"DocEntry": 11, "DocNum": 501, "DocTotal": 900}},
+        ]
+
+        service = GRPOService(company_code="TC001")
+        results = service.post_grpo_batch(
+            [self._request(0), self._request(1, accepted_qty="150.000")], user=self.user
+        )
+
+        self.assertEqual(len(mock_sap_client.return_value.create_grpo_batch.call_args[0][0]), 1)
+        self.assertTrue(results[0]["success"])
+        self.assertFalse(results[1]["success"])
+        self.assertIn("cannot exceed", results[1]["error"])
+        self.assertFalse(GRPOPosting.objects.filter(po_receipt=self.po_receipts[1]).exists())
+
+    @patch("grpo.services.SAPClient")
+    def test_post_grpo_calls_sap_outside_transaction(self, mock_sap_client):
+        """Test post_grpo holds no transaction (row locks) while SAP is posting"""
+        test_depth = len(connection.atomic_blocks)
+        sap_call = {}
+
+        def create_grpo(payload):
+            sap_call["depth"] = len(connection.atomic_blocks)
+            sap_call["status"] = GRPOPosting.objects.get(po_receipt=self.po_receipts[0]).status
+            return {"DocEntry": 11, "DocNum": 501, "DocTotal": 900}
+
+        mock_sap_client.return_value.create_grpo.side_effect = create_grpo
+
+        request = self._request(0)
+        service = GRPOService(company_code="TC001")
+        grpo = service.post_grpo(user=self.user, **request)
+
+        self.assertEqual(sap_call, {"depth": test_depth, "status": GRPOStatus.PENDING})
+        self.assertEqual(grpo.status, GRPOStatus.POSTED)
+        self.assertEqual(grpo.lines.get().quantity_posted, Decimal("90.000"))
+        item = POItemReceipt.objects.get(pk=self.po_items[0].pk)
+        self.assertEqual((item.accepted_qty, item.rejected_qty), (Decimal("90.000"), Decimal("10.000")))
+
+    @patch("grpo.services.SAPClient")
+    def test_posting_in_flight_cannot_be_reserved_again(self, mock_sap_client):
+        """Test a second attempt is refused while the first is posting to SAP"""
+        service = GRPOService(company_code="TC001")
+        second = {}
+
+        def create_grpo(payload):
+            try:
+                service.post_grpo(user=self.user, **self._request(0))
+            except ValueError as e:
+                second["error"] = str(e)
+            return {"DocEntry": 11, "DocNum": 501, "DocTotal": 900}
+
+        mock_sap_client.return_value.create_grpo.side_effect = create_grpo
+
+        grpo = service.post_grpo(user=self.user, **self._request(0))
+
+        self.assertEqual(second, {"error": "GRPO for PO PO-100 is already being posted"})
+        self.assertEqual(mock_sap_client.return_value.create_grpo.call_count, 1)
+        self.assertEqual((grpo.status, grpo.reserved_at), (GRPOStatus.POSTED, None))
+
+    @patch("grpo.services.SAPClient")
+    def test_stale_reservation_taken_over(self, mock_sap_client):
+        """Test a reservation older than GRPO_RESERVATION_TIMEOUT does not block a new attempt"""
+        GRPOPosting.objects.create(
+            vehicle_entry=self.vehicle_entry, po_receipt=self.po_receipts[0], status=GRPOStatus.PENDING,
+            reserved_at=timezone.now() - timedelta(seconds=settings.GRPO_RESERVATION_TIMEOUT + 1)
+        )
+        mock_sap_client.return_value.create_grpo.return_value = {"DocEntry": 11, "DocNum": 501, "DocTotal": 900}
+
+        grpo = GRPOService(company_code="TC001").post_grpo(user=self.user, **self._request(0))
+
+        self.assertEqual(grpo.status, GRPOStatus.POSTED)
+
+    @patch("grpo.services.SAPClient")
+    def test_posting_posted_before_lock_not_posted_again(self, mock_sap_client):
+        """Test an attempt that passed the unlocked check is refused once the row shows POSTED"""
+        prepare = GRPOService._prepare_posting
+
+        def prepare_then_posted_elsewhere(service, *args, **kwargs):
+            prepared = prepare(service, *args, **kwargs)
+            GRPOPosting.objects.filter(pk=prepared[0].pk).update(status=GRPOStatus.POSTED, sap_doc_num=501)
+            return prepared
+
+        with patch.object(GRPOService, "_prepare_posting", prepare_then_posted_elsewhere):
+            with self.assertRaisesMessage(ValueError, "GRPO already posted for PO PO-100. SAP Doc Num: 501"):
+                GRPOService(company_code="TC001").post_grpo(user=self.user, **self._request(0))
+
+        mock_sap_client.return_value.create_grpo.assert_not_called()
+        self.assertFalse(GRPOLinePosting.objects.exists())
+
+    @override_settings(GRPO_IDEMPOTENCY_FIELD="U_GRPO_KEY")
+    @patch("grpo.services.SAPClient")
+    def test_retry_adopts_grpo_already_in_sap(self, mock_sap_client):
+        """Test a retried posting found in SAP by idempotency key is not posted again"""
+        sap_client = mock_sap_client.return_value
+        failed = GRPOPosting.objects.create(
+            vehicle_entry=self.vehicle_entry, po_receipt=self.po_receipts[0],
+            status=GRPOStatus.FAILED, error_message="SAP system unavailable"
+        )
+        key = str(failed.idempotency_key)
+        sap_client.find_grpos_by_key.return_value = {key: DeliveryNoteDTO(
+            doc_entry=11, doc_num=501, card_code="SUP001", doc_total=900.0, canceled=False, idempotency_key=key
+        )}
+        sap_client.create_grpo_batch.return_value = [
+            {"success": True, "data": {"DocEntry": 12, "DocNum": 502, "DocTotal": 900}},
+        ]
+
+        service = GRPOService(company_code="TC001")
+        results = service.post_grpo_batch([self._request(0), self._request(1)], user=self.user)
+
+        sap_client.find_grpos_by_key.assert_called_once_with([key])
+        posted_payloads = sap_client.create_grpo_batch.call_args[0][0]
+        self.assertEqual(len(posted_payloads), 1)
+        self.assertEqual(
+            posted_payloads[0]["U_GRPO_KEY"],
+            str(GRPOPosting.objects.get(po_receipt=self.po_receipts[1]).idempotency_key)
+        )
+        self.assertEqual([result["sap_doc_num"] for result in results], [501, 502])
+
+        adopted = GRPOPosting.objects.get(pk=failed.pk)
+        self.assertEqual((adopted.status, adopted.sap_doc_entry), (GRPOStatus.POSTED, 11))
+        self.assertEqual(adopted.lines.get().quantity_posted, Decimal("90.000"))
+
+
+@override_settings(
+    GRPO_OUTBOX_MAX_ATTEMPTS=3,
+    GRPO_OUTBOX_RETRY_BASE_DELAY=30,
+    GRPO_OUTBOX_RETRY_MAX_DELAY=3600,
+    GRPO_OUTBOX_LOCK_TIMEOUT=300,
+)
+class GRPOOutboxTests(TestCase):
+    """Tests for queued GRPO posting (outbox mode)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name="Test Company", code="TC001")
+        cls.user = User.objects.create_user(
+            email="outboxuser@example.com",
+            password="testpass123",
+            full_name="Outbox User",
+            employee_code="EMP200"
+        )
+        cls.vehicle = Vehicle.objects.create(
+            vehicle_number="MH12AB8888",
+            vehicle_type=VehicleType.objects.create(name="TRUCK")
+        )
+        cls.driver = Driver.objects.create(
+            name="Test Driver", mobile_no="9876543211", license_no="DL888888"
+        )
+        cls.vehicle_entry = VehicleEntry.objects.create(
+            entry_no="VE-2024-200",
+            company=cls.company,
+            vehicle=cls.vehicle,
+            driver=cls.driver,
+            entry_type="RAW_MATERIAL",
+            status=GateEntryStatus.COMPLETED
+        )
+        cls.po_receipt = POReceipt.objects.create(
+            vehicle_entry=cls.vehicle_entry,
+            po_number="PO-200",
+            supplier_code="SUP001",
+            supplier_name="Test Supplier"
+        )
+        cls.po_item = POItemReceipt.objects.create(
+            po_receipt=cls.po_receipt,
+            po_item_code="ITEM200",
+            item_name="Test Item",
+            ordered_qty=Decimal("100.000"),
+            received_qty=Decimal("100.000"),
+            uom="KG"
+        )
+
+    def _enqueue(self):
+        service = GRPOService(company_code="TC001")
+        return service.enqueue_grpo(
+            vehicle_entry_id=self.vehicle_entry.id,
+            po_receipt_id=self.po_receipt.id,
+            user=self.user,
+            items=[{"po_item_receipt_id": self.po_item.id, "accepted_qty": Decimal("80.000")}],
+            branch_id=1
+        )
+
+    def _claim_one(self):
+        jobs = GRPOOutboxWorker().claim_jobs(10)
+        self.assertEqual(len(jobs), 1)
+        return jobs[0]
+
+    @patch("grpo.services.SAPClient")
+    def test_enqueue_does_not_call_sap(self, mock_sap_client):
+        """Test queueing stores the payload and leaves the posting PENDING"""
+        job = self._enqueue()
+
+        mock_sap_client.assert_not_called()
+        self.assertEqual(job.status, GRPOJobStatus.QUEUED)
+        self.assertEqual(job.payload["CardCode"], "SUP001")
+        self.assertEqual(job.payload["DocumentLines"][0]["Quantity"], "80.000")
+        self.assertEqual(job.grpo_posting.status, GRPOStatus.PENDING)
+
+    @patch("grpo.services.SAPClient")
+    def test_enqueue_batch_queues_each_posting(self, mock_sap_client):
+        """Test a batch in outbox mode queues one job per posting and reports rejects"""
+        request = {
+            "vehicle_entry_id": self.vehicle_entry.id,
+            "po_receipt_id": self.po_receipt.id,
+            "items": [{"po_item_receipt_id": self.po_item.id, "accepted_qty": Decimal("80.000")}],
+            "branch_id": 1,
+        }
+
+        results = GRPOService(company_code="TC001").enqueue_grpo_batch([request, request], user=self.user)
+
+        mock_sap_client.assert_not_called()
+        job = GRPOPostingJob.objects.get()
+        self.assertEqual(
+            (results[0]["success"], results[0]["job_id"], results[0]["grpo_posting_id"]),
+            (True, job.id, job.grpo_posting_id)
+        )
+        self.assertFalse(results[1]["success"])
+        self.assertIn("already queued", results[1]["error"])
+
+    def test_enqueue_twice_rejected(self):
+        """Test the same PO cannot be queued while a job is still active"""
+        self._enqueue()
+        with self.assertRaises(ValueError):
+            self._enqueue()
+        self.assertEqual(GRPOPostingJob.objects.count(), 1)
+
+    @patch("grpo.services.SAPClient")
+    def test_worker_posts_job(self, mock_sap_client):
+        """Test a claimed job is posted and the GRPO marked POSTED"""
+        mock_sap_client.return_value.create_grpo.return_value = {
+            "DocEntry": 21, "DocNum": 601, "DocTotal": 800
+        }
+        self._enqueue()
+
+        job = self._claim_one()
+        self.assertEqual(job.status, GRPOJobStatus.PROCESSING)
+        self.assertEqual(GRPOOutboxWorker().process_job(job), GRPOJobStatus.DONE)
+
+        posting = GRPOPosting.objects.get(po_receipt=self.po_receipt)
+        self.assertEqual(posting.status, GRPOStatus.POSTED)
+        self.assertEqual(posting.sap_doc_num, 601)
+        self.assertEqual(posting.lines.get().quantity_posted, Decimal("80.000"))
+        mock_sap_client.return_value.invalidate_open_pos.assert_called_once_with("SUP001")
+
+    @override_settings(GRPO_IDEMPOTENCY_FIELD="U_GRPO_KEY")
+    @patch("grpo.services.SAPClient")
+    def test_requeued_posting_found_in_sap_not_posted_again(self, mock_sap_client):
+        """Test a failed posting queued again adopts the GRPO its earlier attempt created"""
+        failed = GRPOPosting.objects.create(
+            vehicle_entry=self.vehicle_entry, po_receipt=self.po_receipt,
+            status=GRPOStatus.FAILED, error_message="SAP system unavailable"
+        )
+        key = str(failed.idempotency_key)
+        mock_sap_client.return_value.find_grpos_by_key.return_value = {key: DeliveryNoteDTO(
+            doc_entry=21, doc_num=601, card_code="SUP001", doc_total=800.0, canceled=False, idempotency_key=key
+        )}
+
+        self.assertTrue(self._enqueue().retry)
+        job = self._claim_one()
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(GRPOOutboxWorker().process_job(job), GRPOJobStatus.DONE)
+
+        mock_sap_client.return_value.create_grpo.assert_not_called()
+        mock_sap_client.return_value.find_grpos_by_key.assert_called_once_with([key])
+        posting = GRPOPosting.objects.get(pk=failed.pk)
+        self.assertEqual((posting.status, posting.sap_doc_entry, posting.sap_doc_num), (GRPOStatus.POSTED, 21, 601))
+
+    @patch("grpo.services.SAPClient")
+    def test_connection_error_retried_with_backoff(self, mock_sap_client):
+        """Test connection errors back off exponentially, then dead-letter"""
+        mock_sap_client.return_value.create_grpo.side_effect = SAPConnectionError("down")
+        self._enqueue()
+        worker = GRPOOutboxWorker()
+
+        job = self._claim_one()
+        before = timezone.now()
+        self.assertEqual(worker.process_job(job), GRPOJobStatus.RETRY)
+        self.assertGreaterEqual(job.next_attempt_at, before + timedelta(seconds=30))
+        self.assertEqual(worker.claim_jobs(10), [])  # not due yet
+
+        GRPOPostingJob.objects.update(next_attempt_at=timezone.now())
+        job = self._claim_one()
+        before = timezone.now()
+        self.assertEqual(worker.process_job(job), GRPOJobStatus.RETRY)
+        self.assertGreaterEqual(job.next_attempt_at, before + timedelta(seconds=60))
+
+        GRPOPostingJob.objects.update(next_attempt_at=timezone.now())
+        job = self._claim_one()
+        self.assertEqual(worker.process_job(job), GRPOJobStatus.DEAD)
+        self.assertEqual(job.attempts, 3)
+
+        posting = GRPOPosting.objects.get(po_receipt=self.po_receipt)
+        self.assertEqual(posting.status, GRPOStatus.FAILED)
+        self.assertEqual(posting.error_message, "SAP system unavailable")
+
+    @patch("grpo.services.SAPClient")
+    def test_validation_error_not_retried(self, mock_sap_client):
+        """Test SAP validation errors go straight to the dead letter state"""
+        mock_sap_client.return_value.create_grpo.side_effect = SAPValidationError("Invalid item")
+        self._enqueue()
+
+        job = self._claim_one()
+        self.assertEqual(GRPOOutboxWorker().process_job(job), GRPOJobStatus.DEAD)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(
+            GRPOPosting.objects.get(po_receipt=self.po_receipt).error_message, "Invalid item"
+        )
+
+    @override_settings(GRPO_OUTBOX_CONCURRENCY=5)
+    @patch("grpo.services.SAPClient")
+    def test_jobs_posted_concurrently(self, mock_sap_client):
+        """Test claimed jobs are posted together over the async client"""
+        second_receipt = POReceipt.objects.create(
+            vehicle_entry=self.vehicle_entry,
+            po_number="PO-201",
+            supplier_code="SUP002",
+            supplier_name="Other Supplier"
+        )
+        second_item = POItemReceipt.objects.create(
+            po_receipt=second_receipt,
+            po_item_code="ITEM201",
+            item_name="Other Item",
+            ordered_qty=Decimal("50.000"),
+            received_qty=Decimal("50.000"),
+            uom="KG"
+        )
+        self._enqueue()
+        GRPOService(company_code="TC001").enqueue_grpo(
+            vehicle_entry_id=self.vehicle_entry.id,
+            po_receipt_id=second_receipt.id,
+            user=self.user,
+            items=[{"po_item_receipt_id": second_item.id, "accepted_qty": Decimal("50.000")}],
+            branch_id=1
+        )
+
+        async def acreate_grpo(payload, service_layer):
+            if payload["CardCode"] == "SUP002":
+                raise SAPConnectionError("down")
+            return {"DocEntry": 22, "DocNum": 602, "DocTotal": 800}
+
+        mock_sap_client.return_value.acreate_grpo.side_effect = acreate_grpo
+        worker = GRPOOutboxWorker()
+        jobs = worker.claim_jobs(10)
+
+        self.assertEqual(worker.process_jobs(jobs), [GRPOJobStatus.DONE, GRPOJobStatus.RETRY])
+        mock_sap_client.return_value.create_grpo.assert_not_called()
+        self.assertEqual(GRPOPosting.objects.get(po_receipt=self.po_receipt).sap_doc_num, 602)
+        self.assertEqual(
+            GRPOPosting.objects.get(po_receipt=second_receipt).error_message, "SAP system unavailable"
+        )
+
+    def test_stale_processing_job_reclaimed(self):
+        """Test a job left PROCESSING by a dead worker is claimed again"""
+        self._enqueue()
+        self._claim_one()
+        self.assertEqual(GRPOOutboxWorker().claim_jobs(10), [])
+
+        GRPOPostingJob.objects.update(locked_at=timezone.now() - timedelta(seconds=600))
+        job = self._claim_one()
+        self.assertEqual(job.attempts, 2)
+
+
+class GRPOReconciliationTests(TestCase):
+    """Tests for reconciling GRPO postings against SAP OPDN"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name="Test Company", code="TC001")
+        vehicle_entry = VehicleEntry.objects.create(
+            entry_no="VE-2024-300",
+            company=cls.company,
+            vehicle=Vehicle.objects.create(
+                vehicle_number="MH12AB3000", vehicle_type=VehicleType.objects.create(name="TRUCK")
+            ),
+            driver=Driver.objects.create(name="Test Driver", mobile_no="9876543210", license_no="DL300000"),
+            entry_type="RAW_MATERIAL",
+            status=GateEntryStatus.COMPLETED
+        )
+
+        cls.postings = []
+        for index, (grpo_status, doc_entry) in enumerate([
+            (GRPOStatus.POSTED, 11), (GRPOStatus.POSTED, 12), (GRPOStatus.FAILED, None), (GRPOStatus.POSTED, 14),
+        ]):
+            po_receipt = POReceipt.objects.create(
+                vehicle_entry=vehicle_entry, po_number=f"PO-30{index}",
+                supplier_code="SUP001", supplier_name="Test Supplier"
+            )
+            item = POItemReceipt.objects.create(
+                po_receipt=po_receipt, po_item_code=f"ITEM00{index}", item_name="Test Item",
+                ordered_qty=Decimal("100.000"), received_qty=Decimal("100.000"),
+                accepted_qty=Decimal("90.000"), uom="KG"
+            )
+            posting = GRPOPosting.objects.create(
+                vehicle_entry=vehicle_entry, po_receipt=po_receipt, status=grpo_status,
+                sap_doc_entry=doc_entry, posted_at=timezone.now() if doc_entry else None
+            )
+            if doc_entry:
+                GRPOLinePosting.objects.create(
+                    grpo_posting=posting, po_item_receipt=item, quantity_posted=Decimal("90.000")
+                )
+            cls.postings.append(posting)
+
+        GRPOPostingJob.objects.create(
+            grpo_posting=cls.postings[2], company_code="TC001", payload={}, status=GRPOJobStatus.RETRY
+        )
+
+    @staticmethod
+    def _document(doc_entry, item_code, quantity=90.0, canceled=False, card_code="SUP001"):
+        return DeliveryNoteDTO(
+            doc_entry=doc_entry, doc_num=500000 + doc_entry, card_code=card_code, doc_total=900.0,
+            canceled=canceled, lines=[DeliveryNoteLineDTO(line_num=0, item_code=item_code, quantity=quantity)],
+        )
+
+    @patch("grpo.reconciliation.SAPClient")
+    def test_mismatches_reported_and_fixed(self, mock_sap_client):
+        get_delivery_notes = mock_sap_client.return_value.get_delivery_notes
+        get_delivery_notes.return_value = [
+            self._document(11, "ITEM000"),
+            self._document(13, "ITEM002"),
+            self._document(14, "ITEM003", canceled=True),
+            self._document(15, "ITEM009", card_code="SUP999"),
+        ]
+        mock_sap_client.return_value.find_grpos_by_key.return_value = {
+            str(self.postings[2].idempotency_key): self._document(13, "ITEM002"),
+        }
+        today = timezone.localdate()
+
+        report = reconcile_grpo_postings("TC001", today, today)
+
+        get_delivery_notes.assert_called_once_with(today - timedelta(days=1), today + timedelta(days=1))
+        mock_sap_client.return_value.find_grpos_by_key.assert_called_once_with(
+            [str(self.postings[2].idempotency_key)]
+        )
+        self.assertEqual(report["confirmed"], 1)
+        self.assertEqual(report["unmatched_sap_documents"], 1)
+        self.assertEqual(
+            sorted((issue["type"], issue["grpo_posting_id"]) for issue in report["issues"]),
+            sorted([
+                ("missing_in_sap", self.postings[1].id),
+                ("posted_in_sap", self.postings[2].id),
+                ("canceled_in_sap", self.postings[3].id),
+            ])
+        )
+        self.assertEqual(GRPOPosting.objects.get(pk=self.postings[2].pk).status, GRPOStatus.FAILED)
+
+        report = reconcile_grpo_postings("TC001", today, today, fix=True)
+
+        self.assertEqual(report["fixed"], 2)
+        found = GRPOPosting.objects.get(pk=self.postings[2].pk)
+        self.assertEqual((found.status, found.sap_doc_entry, found.sap_doc_num), (GRPOStatus.POSTED, 13, 500013))
+        self.assertEqual(found.lines.get().quantity_posted, Decimal("90.000"))
+        self.assertEqual(found.jobs.get().status, GRPOJobStatus.DONE)
+        self.assertEqual(GRPOPosting.objects.get(pk=self.postings[3].pk).status, GRPOStatus.FAILED)
+        self.assertEqual(GRPOPosting.objects.get(pk=self.postings[1].pk).status, GRPOStatus.POSTED)
+
+    @patch("grpo.reconciliation.SAPClient")
+    def test_posting_reserved_by_a_request_not_fixed(self, mock_sap_client):
+        """Test a posting a request is posting right now is left to that request"""
+        posting = self.postings[2]
+        GRPOPosting.objects.filter(pk=posting.pk).update(status=GRPOStatus.PENDING, reserved_at=timezone.now())
+        mock_sap_client.return_value.get_delivery_notes.return_value = [self._document(13, "ITEM002")]
+        mock_sap_client.return_value.find_grpos_by_key.return_value = {
+            str(posting.idempotency_key): self._document(13, "ITEM002"),
+        }
+        today = timezone.localdate()
+
+        report = reconcile_grpo_postings("TC001", today, today, fix=True)
+
+        self.assertEqual(report["fixed"], 0)
+        self.assertEqual(GRPOPosting.objects.get(pk=posting.pk).status, GRPOStatus.PENDING)
+        self.assertFalse(GRPOLinePosting.objects.filter(grpo_posting=posting).exists())
+
+        # A reservation older than GRPO_RESERVATION_TIMEOUT was left by a crashed attempt
+        GRPOPosting.objects.filter(pk=posting.pk).update(
+            reserved_at=timezone.now() - timedelta(seconds=settings.GRPO_RESERVATION_TIMEOUT + 1)
+        )
+
+        report = reconcile_grpo_postings("TC001", today, today, fix=True)
+
+        self.assertEqual(report["fixed"], 1)
+        fixed = GRPOPosting.objects.get(pk=posting.pk)
+        self.assertEqual((fixed.status, fixed.reserved_at), (GRPOStatus.POSTED, None))
+
+    @patch("grpo.reconciliation.SAPClient")
+    def test_supplier_and_quantity_match_only_reported(self, mock_sap_client):
+        mock_sap_client.return_value.get_delivery_notes.return_value = [
+            self._document(11, "ITEM000"),
+            self._document(13, "ITEM002"),
+        ]
+        mock_sap_client.return_value.find_grpos_by_key.return_value = {}
+        today = timezone.localdate()
+
+        report = reconcile_grpo_postings("TC001", today, today, fix=True)
+
+        guesses = [issue for issue in report["issues"] if issue["type"] == "possible_match_in_sap"]
+        self.assertEqual([(issue["grpo_posting_id"], issue["sap_doc_entry"]) for issue in guesses],
+                         [(self.postings[2].id, 13)])
+        self.assertEqual(report["unmatched_sap_documents"], 0)
+        self.assertEqual(GRPOPosting.objects.get(pk=self.postings[2].pk).status, GRPOStatus.FAILED)
+        self.assertEqual(self.postings[2].jobs.get().status, GRPOJobStatus.RETRY)
+
+    @patch("grpo.reconciliation.SAPClient")
+    def test_documents_outside_the_range_only_used_for_matching(self, mock_sap_client):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        documents = [self._document(entry, f"ITEM00{entry - 11}") for entry in (11, 12, 14, 16)]
+        documents[1].create_date = yesterday
+        documents[3].create_date = yesterday
+        mock_sap_client.return_value.get_delivery_notes.return_value = documents
+        mock_sap_client.return_value.find_grpos_by_key.return_value = {}
+
+        report = reconcile_grpo_postings("TC001", today, today)
+
+        self.assertEqual(report["confirmed"], 3)
+        self.assertEqual((report["sap_documents"], report["unmatched_sap_documents"]), (2, 0))
@@ -2,7 +2,10 @@ from django.urls import path
 from .views import (
     PendingGRPOListAPI,
     GRPOPreviewAPI,
+    GRPOPreviewBatchAPI,
     PostGRPOAPI,
+    PostGRPOBatchAPI,
+    GRPOPostingJobDetailAPI,
     GRPOPostingHistoryAPI,
     GRPOPostingDetailAPI
 )
@@ -11,12 +14,21 @@ urlpatterns = [
     # List pending GRPO entries
     path("pending/", PendingGRPOListAPI.as_view(), name="grpo-pending"),
 
+    # Preview GRPO data for several gate entries
+    path("preview/", GRPOPreviewBatchAPI.as_view(), name="grpo-preview-batch"),
+
     # Preview GRPO data for a gate entry
     path("preview/<int:vehicle_entry_id>/", GRPOPreviewAPI.as_view(), name="grpo-preview"),
 
     # Post GRPO to SAP
     path("post/", PostGRPOAPI.as_view(), name="grpo-post"),
 
+    # Post several GRPOs to SAP in one $batch request
+    path("post/batch/", PostGRPOBatchAPI.as_view(), name="grpo-post-batch"),
+
+    # Status of a queued GRPO posting job (outbox mode)
+    path("jobs/<int:job_id>/", GRPOPostingJobDetailAPI.as_view(), name="grpo-job-detail"),
+
     # GRPO posting history
     path("history/", GRPOPostingHistoryAPI.as_view(), name="grpo-history"),
 
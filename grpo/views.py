@@ -1,4 +1,9 @@
+import base64
+import binascii
 import logging
+from datetime import date, datetime
+
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -12,7 +17,11 @@ from .serializers import (
     GRPOPreviewSerializer,
     GRPOPostRequestSerializer,
     GRPOPostingSerializer,
-    GRPOPostResponseSerializer
+    GRPOPostResponseSerializer,
+    GRPOBatchPostRequestSerializer,
+    GRPOBatchPostResultSerializer,
+    GRPOBatchQueueResultSerializer,
+    GRPOPostingJobSerializer,
 )
 from .permissions import (
     CanViewPendingGRPO,
@@ -25,40 +34,79 @@ from .permissions import (
 logger = logging.getLogger(__name__)
 
 
+def _encode_cursor(entry) -> str:
+    return base64.urlsafe_b64encode(f"{entry.entry_time.isoformat()}|{entry.id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    """(entry_time, id) from a pending list page cursor; raises ValueError if invalid."""
+    try:
+        entry_time, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(entry_time), int(entry_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
 class PendingGRPOListAPI(APIView):
     """
     Returns list of completed gate entries pending GRPO posting.
 
     GET /api/grpo/pending/
+    Optional: ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD filter on entry time.
+    Paginated when ?page_size= or ?cursor= is given: returns
+    {"results": [...], "next_cursor": "..."}; pass next_cursor back as
+    ?cursor= for the next page (null on the last page).
     """
     permission_classes = [IsAuthenticated, HasCompanyContext, CanViewPendingGRPO]
 
     def get(self, request):
+        paginated = "page_size" in request.GET or "cursor" in request.GET
+        page_size = settings.GRPO_PENDING_PAGE_SIZE
+        before = None
+        try:
+            date_from = date.fromisoformat(request.GET["date_from"]) if request.GET.get("date_from") else None
+            date_to = date.fromisoformat(request.GET["date_to"]) if request.GET.get("date_to") else None
+            if request.GET.get("cursor"):
+                before = _decode_cursor(request.GET["cursor"])
+            if request.GET.get("page_size"):
+                page_size = int(request.GET["page_size"])
+            if page_size < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"detail": "Invalid date_from, date_to, cursor or page_size"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page_size = min(page_size, settings.GRPO_PENDING_PAGE_MAX_SIZE)
+
         service = GRPOService(company_code=request.company.company.code)
-        entries = service.get_pending_grpo_entries()
-
-        # Build response with summary for each entry
-        result = []
-        for entry in entries:
-            po_receipts = entry.po_receipts.all()
-            posted_count = entry.grpo_postings.filter(status="POSTED").count()
-            total_count = po_receipts.count()
-            pending_count = total_count - posted_count
-
-            # Only include entries that have pending POs
-            if pending_count > 0:
-                result.append({
-                    "vehicle_entry_id": entry.id,
-                    "entry_no": entry.entry_no,
-                    "status": entry.status,
-                    "entry_time": entry.entry_time,
-                    "total_po_count": total_count,
-                    "posted_po_count": posted_count,
-                    "pending_po_count": pending_count,
-                    "is_fully_posted": False
-                })
-
-        return Response(result)
+        entries = service.get_pending_grpo_entries(date_from=date_from, date_to=date_to, before=before)
+        if paginated:
+            entries = list(entries[:page_size + 1])
+            page = entries[:page_size]
+        else:
+            page = entries
+
+        result = [
+            {
+                "vehicle_entry_id": entry.id,
+                "entry_no": entry.entry_no,
+                "status": entry.status,
+                "entry_time": entry.entry_time,
+                "total_po_count": entry.total_po_count,
+                "posted_po_count": entry.posted_po_count,
+                "pending_po_count": entry.pending_po_count,
+                "is_fully_posted": False
+            }
+            for entry in page
+        ]
+
+        if not paginated:
+            return Response(result)
+        return Response({
+            "results": result,
+            "next_cursor": _encode_cursor(page[-1]) if len(entries) > page_size else None,
+        })
 
 
 class GRPOPreviewAPI(APIView):
@@ -85,6 +133,33 @@ class GRPOPreviewAPI(APIView):
         return Response(serializer.data)
 
 
+class GRPOPreviewBatchAPI(APIView):
+    """
+    GRPO preview for several gate entries in one call, e.g. a page of the
+    pending list. Returns the preview rows of every entry as one list.
+
+    GET /api/grpo/preview/?vehicle_entry_ids=1,2,3
+    """
+    permission_classes = [IsAuthenticated, HasCompanyContext, CanPreviewGRPO]
+
+    def get(self, request):
+        try:
+            vehicle_entry_ids = [
+                int(entry_id) for entry_id in request.GET.get("vehicle_entry_ids", "").split(",") if entry_id
+            ]
+        except ValueError:
+            vehicle_entry_ids = []
+        if not vehicle_entry_ids or len(vehicle_entry_ids) > settings.GRPO_PENDING_PAGE_MAX_SIZE:
+            return Response(
+                {"detail": f"vehicle_entry_ids must list 1 to {settings.GRPO_PENDING_PAGE_MAX_SIZE} ids"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        service = GRPOService(company_code=request.company.company.code)
+        serializer = GRPOPreviewSerializer(service.get_grpo_previews(vehicle_entry_ids), many=True)
+        return Response(serializer.data)
+
+
 class PostGRPOAPI(APIView):
     """
     Post GRPO to SAP for a specific PO receipt.
@@ -102,6 +177,9 @@ class PostGRPOAPI(APIView):
         "warehouse_code": "WH01",  // optional
         "comments": "Gate entry completed"  // optional
     }
+
+    With GRPO_OUTBOX_ENABLED the GRPO is queued instead and 202 is returned
+    with a job id (poll GET /api/grpo/jobs/<job_id>/).
     """
     permission_classes = [IsAuthenticated, HasCompanyContext, CanCreateGRPOPosting]
 
@@ -115,6 +193,9 @@ class PostGRPOAPI(APIView):
 
         service = GRPOService(company_code=request.company.company.code)
 
+        if settings.GRPO_OUTBOX_ENABLED:
+            return self._enqueue(service, request, serializer.validated_data)
+
         try:
             grpo_posting = service.post_grpo(
                 vehicle_entry_id=serializer.validated_data["vehicle_entry_id"],
@@ -164,6 +245,136 @@ class PostGRPOAPI(APIView):
                 status=status.HTTP_502_BAD_GATEWAY
             )
 
+    def _enqueue(self, service, request, data):
+        try:
+            job = service.enqueue_grpo(
+                vehicle_entry_id=data["vehicle_entry_id"],
+                po_receipt_id=data["po_receipt_id"],
+                user=request.user,
+                items=data["items"],
+                branch_id=data["branch_id"],
+                warehouse_code=data.get("warehouse_code"),
+                comments=data.get("comments")
+            )
+        except ValueError as e:
+            return Response(
+                {"detail": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                "success": True,
+                "job_id": job.id,
+                "grpo_posting_id": job.grpo_posting_id,
+                "status": job.status,
+                "message": "GRPO queued for posting to SAP"
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class GRPOPostingJobDetailAPI(APIView):
+    """
+    Returns the status of a queued GRPO posting job (outbox mode).
+
+    GET /api/grpo/jobs/<job_id>/
+    """
+    permission_classes = [IsAuthenticated, HasCompanyContext, CanViewGRPOPosting]
+
+    def get(self, request, job_id):
+        service = GRPOService(company_code=request.company.company.code)
+
+        try:
+            job = service.get_posting_job(job_id)
+        except ValueError as e:
+            return Response(
+                {"detail": str(e)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(GRPOPostingJobSerializer(job).data)
+
+
+class PostGRPOBatchAPI(APIView):
+    """
+    Post several GRPOs to SAP in ONE Service Layer $batch request.
+    Postings may belong to one or more gate entries; each is validated and
+    reported on its own.
+
+    POST /api/grpo/post/batch/
+    {
+        "postings": [
+            {
+                "vehicle_entry_id": 123,
+                "po_receipt_id": 456,
+                "items": [{"po_item_receipt_id": 1, "accepted_qty": 100.5}],
+                "branch_id": 1,
+                "warehouse_code": "WH01",  // optional
+                "comments": "Gate entry completed"  // optional
+            },
+            ...
+        ]
+    }
+
+    Returns 201 when every posting succeeded, otherwise 207 with per-posting results.
+
+    With GRPO_OUTBOX_ENABLED each posting is queued like POST /api/grpo/post/
+    and 202 is returned with a job id per posting (207 if any was rejected).
+    """
+    permission_classes = [IsAuthenticated, HasCompanyContext, CanCreateGRPOPosting]
+
+    def post(self, request):
+        serializer = GRPOBatchPostRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"detail": "Invalid request data", "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        service = GRPOService(company_code=request.company.company.code)
+
+        if settings.GRPO_OUTBOX_ENABLED:
+            return self._enqueue(service, request, serializer.validated_data["postings"])
+
+        try:
+            results = service.post_grpo_batch(
+                postings=serializer.validated_data["postings"],
+                user=request.user
+            )
+        except SAPConnectionError:
+            return Response(
+                {"detail": "SAP system is currently unavailable. Please try again later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        posted_count = sum(1 for result in results if result["success"])
+        response_data = {
+            "posted_count": posted_count,
+            "failed_count": len(results) - posted_count,
+            "results": GRPOBatchPostResultSerializer(results, many=True).data,
+        }
+
+        return Response(
+            response_data,
+            status=status.HTTP_201_CREATED if posted_count == len(results) else status.HTTP_207_MULTI_STATUS
+        )
+
+    def _enqueue(self, service, request, postings):
+        results = service.enqueue_grpo_batch(postings=postings, user=request.user)
+
+        queued_count = sum(1 for result in results if result["success"])
+        response_data = {
+            "queued_count": queued_count,
+            "failed_count": len(results) - queued_count,
+            "results": GRPOBatchQueueResultSerializer(results, many=True).data,
+        }
+
+        return Response(
+            response_data,
+            status=status.HTTP_202_ACCEPTED if queued_count == len(results) else status.HTTP_207_MULTI_STATUS
+        )
+
 
 class GRPOPostingHistoryAPI(APIView):
     """
@@ -59,6 +59,20 @@ class POReceiveRequestSerializer(serializers.Serializer):
         return value
 
 
+class POBatchReceiveRequestSerializer(serializers.Serializer):
+    """Serializer for batch PO receive request - several POs of one gate entry"""
+    pos = POReceiveRequestSerializer(many=True, required=True)
+
+    def validate_pos(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one PO is required")
+        po_numbers = [po["po_number"] for po in value]
+        duplicates = sorted({n for n in po_numbers if po_numbers.count(n) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f"PO {duplicates[0]} is listed more than once")
+        return value
+
+
 class POItemReceiptSerializer(serializers.Serializer):
     """Serializer for PO item receipt output"""
     po_item_code = serializers.CharField()
@@ -1,2 +1,3 @@
 from .validations import validate_received_quantity
-from .gate_completion import complete_gate_entry
\ No newline at end of file
+from .gate_completion import complete_gate_entry
+from .po_receive import receive_pos
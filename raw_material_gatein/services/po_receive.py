@@ -0,0 +1,93 @@
+# raw_material_gatein/services/po_receive.py
+
+from typing import List
+
+from django.db import transaction
+
+from gate_core.enums import GateEntryStatus
+from ..models import POReceipt, POItemReceipt
+from .validations import validate_received_quantity
+
+
+def receive_pos(entry, receipts: List[dict], user, client) -> List[POReceipt]:
+    """
+    Receive several POs against a gate entry.
+
+    Every PO/item pair is validated against ONE SAP query (client.get_pos)
+    made before the DB transaction opens; the receipts are then written
+    with bulk inserts. Raises ValueError on the first invalid PO or item,
+    SAP errors propagate. Nothing is written unless every PO is valid.
+    """
+    # Same normalisation as client.get_pos(), for the lookup and the stored rows
+    receipts = [{**receipt, "po_number": str(receipt["po_number"]).strip()} for receipt in receipts]
+    po_numbers = [r["po_number"] for r in receipts]
+    if len(set(po_numbers)) != len(po_numbers):
+        raise ValueError("A PO is listed more than once")
+
+    sap_pos = {po.po_number: po for po in client.get_pos(po_numbers)}
+
+    for receipt in receipts:
+        po_number = receipt["po_number"]
+        sap_po = sap_pos.get(po_number)
+        if sap_po is None:
+            raise ValueError(f"PO {po_number} is not open in SAP")
+        if sap_po.supplier_code != receipt["supplier_code"]:
+            raise ValueError(f"PO {po_number} does not belong to supplier {receipt['supplier_code']}")
+
+        sap_items = {item.po_item_code: item.remaining_qty for item in sap_po.items}
+        seen = set()
+        for item_data in receipt["items"]:
+            po_item_code = item_data["po_item_code"]
+            if po_item_code not in sap_items:
+                raise ValueError(f"Invalid PO item {po_item_code} for PO {po_number}")
+            if po_item_code in seen:
+                raise ValueError(f"PO item {po_item_code} is listed twice for PO {po_number}")
+            seen.add(po_item_code)
+            validate_received_quantity(
+                item_data["ordered_qty"],
+                sap_items[po_item_code],
+                item_data["received_qty"]
+            )
+
+    with transaction.atomic():
+        already_received = list(
+            POReceipt.objects.filter(
+                vehicle_entry=entry,
+                po_number__in=po_numbers
+            ).values_list("po_number", flat=True)
+        )
+        if already_received:
+            raise ValueError(f"PO {already_received[0]} is already received for this gate entry")
+
+        po_receipts = POReceipt.objects.bulk_create([
+            POReceipt(
+                vehicle_entry=entry,
+                po_number=receipt["po_number"],
+                supplier_code=receipt["supplier_code"],
+                supplier_name=receipt["supplier_name"],
+                created_by=user
+            )
+            for receipt in receipts
+        ])
+
+        # bulk_create skips POItemReceipt.save(), so short_qty is set here
+        POItemReceipt.objects.bulk_create([
+            POItemReceipt(
+                po_receipt=po_receipt,
+                **item_data,
+                short_qty=item_data["ordered_qty"] - item_data["received_qty"],
+                created_by=user
+            )
+            for po_receipt, receipt in zip(po_receipts, receipts)
+            for item_data in receipt["items"]
+        ])
+
+        # Gate UI re-reads these suppliers' POs next; don't serve it the pre-receipt copy
+        for supplier_code in {r["supplier_code"] for r in receipts}:
+            transaction.on_commit(lambda code=supplier_code: client.invalidate_open_pos(code))
+
+        if entry.status == GateEntryStatus.IN_PROGRESS:
+            entry.status = GateEntryStatus.QC_PENDING
+            entry.save(update_fields=["status"])
+
+    return po_receipts
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     ReceivePOAPI,
+    BatchReceivePOAPI,
     GatePOListAPI,
     CompleteGateEntryAPI,
 )
@@ -10,6 +11,10 @@ urlpatterns = [
         "gate-entries/<int:gate_entry_id>/po-receipts/",
         ReceivePOAPI.as_view()
     ),
+    path(
+        "gate-entries/<int:gate_entry_id>/po-receipts/batch/",
+        BatchReceivePOAPI.as_view()
+    ),
     path(
         "gate-entries/<int:gate_entry_id>/po-receipts/view/",
         GatePOListAPI.as_view()
@@ -14,8 +14,8 @@ from gate_core.enums import GateEntryStatus
 from sap_client.client import SAPClient
 from sap_client.exceptions import SAPConnectionError, SAPDataError
 from .models import POReceipt, POItemReceipt
-from .serializers import POReceiveRequestSerializer, POItemReceiveSerializer
-from .services import validate_received_quantity, complete_gate_entry
+from .serializers import POReceiveRequestSerializer, POItemReceiveSerializer, POBatchReceiveRequestSerializer
+from .services import validate_received_quantity, complete_gate_entry, receive_pos
 from .permissions import CanReceivePO, CanViewPOReceipt, CanCompleteRawMaterialEntry
 
 logger = logging.getLogger(__name__)
@@ -109,6 +109,9 @@ class ReceivePOAPI(APIView):
                 created_by=request.user
             )
     
+        # Gate UI re-reads this supplier's POs next; don't serve it the pre-receipt copy
+        transaction.on_commit(lambda: client.invalidate_open_pos(supplier_code))
+
         # Update status after successful receipt
         if entry.status == GateEntryStatus.IN_PROGRESS:
             entry.status = GateEntryStatus.QC_PENDING
@@ -120,6 +123,54 @@ class ReceivePOAPI(APIView):
         )
 
 
+class BatchReceivePOAPI(APIView):
+    """
+    Receive several POs against a vehicle entry in one call
+
+    Every PO/item is validated with a single SAP query before any record
+    is written; either all POs are received or none.
+    """
+    permission_classes = [IsAuthenticated, HasCompanyContext, CanReceivePO]
+
+    def post(self, request, gate_entry_id):
+        entry = get_object_or_404(
+            VehicleEntry,
+            id=gate_entry_id,
+            company=request.company.company
+        )
+
+        request_serializer = POBatchReceiveRequestSerializer(data=request.data)
+        request_serializer.is_valid(raise_exception=True)
+
+        try:
+            client = SAPClient(company_code=request.company.company.code)
+            po_receipts = receive_pos(
+                entry, request_serializer.validated_data["pos"], request.user, client
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except SAPConnectionError as e:
+            logger.error(f"SAP connection error in BatchReceivePOAPI: {e}")
+            return Response(
+                {"detail": "SAP system is currently unavailable. Please try again later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except SAPDataError as e:
+            logger.error(f"SAP data error in BatchReceivePOAPI: {e}")
+            return Response(
+                {"detail": "Failed to retrieve PO data from SAP."},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+
+        return Response(
+            {
+                "message": "PO items received successfully",
+                "receipts": [{"id": r.id, "po_number": r.po_number} for r in po_receipts],
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
 class GatePOListAPI(APIView):
     """
     List all PO receipts for a gate entry
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SapClientConfig(AppConfig):
     name = 'sap_client'
+
+    def ready(self):
+        import sap_client.signals  # noqa: F401
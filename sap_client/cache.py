@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry TTL and LRU eviction.
+
+    generation() returns a counter that invalidate() and clear() advance; a
+    set() with a generation read before the key was invalidated is dropped,
+    so a read that started before an invalidation cannot write its stale
+    result back. Only the last ``max_size`` invalidations are remembered:
+    reads older than a forgotten one are dropped too.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._invalidations = OrderedDict()  # key -> counter at its last invalidation
+        self._counter = 0
+        self._floor = 0  # generations below this are stale
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value or None when missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, key) -> int:
+        """Token to pass to set() for a value read from the source now."""
+        with self._lock:
+            return self._counter
+
+    def set(self, key, value, generation: Optional[int] = None):
+        """
+        Store a value. When ``generation`` is given and the key was invalidated
+        since it was read, the value is dropped.
+        """
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            if generation is not None and (
+                generation < self._floor or self._invalidations.get(key, 0) > generation
+            ):
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._counter += 1
+            self._data.pop(key, None)
+            self._invalidations[key] = self._counter
+            self._invalidations.move_to_end(key)
+            while len(self._invalidations) > max(self.max_size, 1):
+                _, counter = self._invalidations.popitem(last=False)
+                self._floor = max(self._floor, counter)
+
+    def clear(self):
+        with self._lock:
+            self._counter += 1
+            self._floor = self._counter
+            self._data.clear()
+            self._invalidations.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for a key is in
+    flight, other callers with the same key wait for it and get its result
+    (or its exception) instead of running their own.
+
+    Nothing is kept once the call finishes, so no result is ever older than
+    the call that produced it. forget() detaches an in-flight call so later
+    callers start a fresh one (used after writes).
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def forget(self, key):
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "calls": self.calls,
+                "shared": self.shared,
+            }
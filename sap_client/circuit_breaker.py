@@ -0,0 +1,206 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .exceptions import SAPConnectionError, SAPPoolTimeout
+
+logger = logging.getLogger(__name__)
+
+HANA = "hana"
+SERVICE_LAYER = "service_layer"
+
+BACKEND_NAMES = {
+    HANA: "SAP HANA",
+    SERVICE_LAYER: "SAP Service Layer",
+}
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for ONE SAP backend of ONE company.
+
+    CLOSED: calls go through; ``failure_threshold`` consecutive
+        SAPConnectionErrors open the circuit.
+    OPEN: calls fail fast with SAPConnectionError until ``reset_timeout``
+        seconds have passed.
+    HALF_OPEN: up to ``half_open_max_calls`` probe calls go through at a
+        time; a successful probe closes the circuit, a failed one opens it
+        again.
+
+    A ``failure_threshold`` of 0 disables the breaker.
+
+    Only SAPConnectionError counts as a failure. Validation and data errors
+    mean SAP answered, so they count as success. SAPPoolTimeout (no free
+    pooled connection) says nothing about SAP and counts as neither.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+        # Stats
+        self._rejected = 0
+        self._times_opened = 0
+        self._last_failure = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+            logger.info(f"Circuit {self.name} half-open; probing")
+        return self._state
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._times_opened += 1
+
+    def before_call(self) -> bool:
+        """
+        Let a call through or raise SAPConnectionError.
+        Returns True when the call is a half-open probe.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+
+            self._rejected += 1
+            retry_after = max(0, int(self.reset_timeout - (time.monotonic() - self._opened_at)))
+
+        raise SAPConnectionError(
+            f"{self.name} is unavailable (circuit open). Retry in {retry_after}s."
+        )
+
+    def record_success(self, probe: bool = False):
+        with self._lock:
+            if probe:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def release_probe(self, probe: bool = False):
+        """End a call that neither succeeded nor failed against SAP."""
+        if probe:
+            with self._lock:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record_failure(self, error: Exception, probe: bool = False):
+        with self._lock:
+            if probe:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._failures += 1
+            self._last_failure = str(error)
+
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED
+                and 0 < self.failure_threshold <= self._failures
+            ):
+                self._open()
+                logger.warning(
+                    f"Circuit {self.name} opened after {self._failures} failure(s): {error}"
+                )
+
+    @contextmanager
+    def guard(self):
+        """Run a block through the breaker; SAPConnectionError counts as failure."""
+        probe = self.before_call()
+        try:
+            yield
+        except SAPPoolTimeout:
+            self.release_probe(probe)
+            raise
+        except SAPConnectionError as e:
+            self.record_failure(e, probe)
+            raise
+        except BaseException:
+            self.record_success(probe)
+            raise
+        else:
+            self.record_success(probe)
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes_in_flight = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            retry_after = None
+            if state == self.OPEN:
+                retry_after = max(0, round(self.reset_timeout - (time.monotonic() - self._opened_at), 1))
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_after": retry_after,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+                "last_failure": self._last_failure,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(company_code: str, backend: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a (company, backend) pair."""
+    key = (company_code, backend)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name=f"{BACKEND_NAMES.get(backend, backend)} ({company_code})",
+                    failure_threshold=settings.SAP_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=settings.SAP_CIRCUIT_RESET_TIMEOUT,
+                    half_open_max_calls=settings.SAP_CIRCUIT_HALF_OPEN_MAX_CALLS,
+                )
+                _breakers[key] = breaker
+    return breaker
+
+
+def get_breaker_stats() -> list:
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return [
+        {"company_code": company_code, "backend": backend, **breaker.stats()}
+        for (company_code, backend), breaker in items
+    ]
+
+
+def reset_breakers():
+    """Drop all breakers (they start CLOSED again)."""
+    with _breakers_lock:
+        _breakers.clear()
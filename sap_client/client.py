@@ -1,10 +1,45 @@
-from typing import List
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from dataclasses import asdict
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import SingleFlight, TTLCache
+from .circuit_breaker import HANA, SERVICE_LAYER, get_breaker
 from .context import CompanyContext
+from .exceptions import SAPConnectionError, SAPDataError, SAPValidationError
+from .registry import COMPANY_SAP_REGISTRY
+from .hana.grpo_reader import HanaGRPOReader
 from .hana.po_reader import HanaPOReader
 from .hana.warehouse_reader import HanaWarehouseReader
 from .hana.vendor_reader import HanaVendorReader
-from .service_layer.grpo_writer import GRPOWriter
-from .dtos import PODTO, WarehouseDTO, VendorDTO
+from .service_layer.async_client import AsyncServiceLayer
+from .service_layer.grpo_writer import AsyncGRPOWriter, GRPOWriter
+from .dtos import (
+    DeliveryNoteDTO, PODTO, POItemDTO, POLineDTO, WarehouseDTO, VendorDTO, VendorMasterDTO, WarehouseMasterDTO,
+)
+
+logger = logging.getLogger(__name__)
+
+# Shared by every SAPClient in this process, keyed by (company_code, supplier_code)
+open_po_cache = TTLCache(
+    ttl=settings.SAP_OPEN_PO_CACHE_TTL,
+    max_size=settings.SAP_OPEN_PO_CACHE_MAX_SIZE,
+)
+
+# Identical concurrent reads (same company + query) share one HANA round trip
+read_flights = SingleFlight()
+
+# Bounded pool shared by all consolidated (multi-company) calls in this process
+_fan_out_executor = ThreadPoolExecutor(
+    max_workers=settings.SAP_FAN_OUT_MAX_WORKERS,
+    thread_name_prefix="sap-fan-out",
+)
 
 
 class SAPClient:
@@ -15,20 +50,311 @@ class SAPClient:
     def __init__(self, company_code: str):
         self.context = CompanyContext(company_code)
 
+    def _breaker(self, backend: str):
+        """Circuit breaker guarding calls to one SAP backend for this company."""
+        return get_breaker(self.context.company_code, backend).guard()
+
     # ---- READ ----
-    def get_open_pos(self, supplier_code: str) -> List[PODTO]:
+    def get_open_pos(self, supplier_code: str, force_live: bool = False) -> List[PODTO]:
+        """
+        Open POs of a supplier. Served from the local open PO line snapshot
+        while it is fresh; ``force_live`` always reads SAP.
+        """
+        if not force_live:
+            snapshot = self._snapshot_pos(supplier_code=supplier_code)
+            if snapshot is not None:
+                return snapshot
+
+        key = (self.context.company_code, supplier_code)
+        if not force_live:
+            cached = open_po_cache.get(key)
+            if cached is not None:
+                return list(cached)
+        return list(read_flights.do(("open_pos", *key), lambda: self._load_open_pos(supplier_code)))
+
+    def _load_open_pos(self, supplier_code: str) -> List[PODTO]:
+        key = (self.context.company_code, supplier_code)
+        generation = open_po_cache.generation(key)
         self.po_reader = HanaPOReader(self.context)
-        return self.po_reader.get_open_pos(supplier_code)
+        with self._breaker(HANA):
+            po_list = self.po_reader.get_open_pos(supplier_code)
+        open_po_cache.set(key, po_list, generation=generation)
+        return po_list
+
+    def get_open_pos_page(
+        self,
+        supplier_code: str,
+        after: Optional[Tuple[int, int]] = None,
+        limit: Optional[int] = None,
+        force_live: bool = False,
+    ) -> Tuple[List[PODTO], Optional[Tuple[int, int]]]:
+        """
+        One page of a supplier's open POs in (DocEntry, LineNum) order.
+
+        Args:
+            after: cursor returned with the previous page (None for the first)
+            limit: POs per page (default SAP_OPEN_PO_PAGE_SIZE); a PO is
+                never split across pages
+
+        Returns:
+            (po_list, next_cursor): next_cursor is the (doc_entry, line_num)
+            of the page's last line, or None on the last page.
+        """
+        limit = limit or settings.SAP_OPEN_PO_PAGE_SIZE
+        po_list = None
+        if not force_live:
+            po_list = self._snapshot_pos(supplier_code=supplier_code, after=after, limit=limit + 1)
+        if po_list is None:
+            reader = HanaPOReader(self.context)
+            with self._breaker(HANA):
+                po_list = reader.get_open_pos(supplier_code, after=after, limit=limit + 1)
+
+        if len(po_list) <= limit:
+            return po_list, None
+        po_list = po_list[:limit]
+        last = po_list[-1]
+        return po_list, (last.doc_entry, last.items[-1].line_num)
+
+    def get_po(self, po_number: str, force_live: bool = False) -> Optional[PODTO]:
+        """Single PO (open lines only) by PO number, or None if not open in SAP."""
+        if not force_live:
+            snapshot = self._snapshot_pos(po_number=str(po_number).strip())
+            if snapshot is not None:
+                return snapshot[0] if snapshot else None
+
+        reader = HanaPOReader(self.context)
+        with self._breaker(HANA):
+            return reader.get_po(po_number)
+
+    def get_pos(self, po_numbers: Iterable[str], force_live: bool = False) -> List[PODTO]:
+        """
+        Several POs (open lines only) by PO number with one query; POs that
+        are not open in SAP are left out.
+        """
+        po_numbers = list(dict.fromkeys(str(po_number).strip() for po_number in po_numbers))
+        if not po_numbers:
+            return []
+        if not force_live:
+            snapshot = self._snapshot_pos(po_number__in=po_numbers)
+            if snapshot is not None:
+                return snapshot
+
+        reader = HanaPOReader(self.context)
+        with self._breaker(HANA):
+            return reader.get_pos_by_numbers(po_numbers)
+
+    def get_po_lines_changed_since(self, since: Optional[date] = None) -> List[POLineDTO]:
+        """PO lines of POs changed on/after ``since`` (all open POs when None), for the snapshot."""
+        reader = HanaPOReader(self.context)
+        with self._breaker(HANA):
+            return reader.get_po_lines_changed_since(since)
+
+    def get_supplier_po_lines(self, supplier_code: str) -> List[POLineDTO]:
+        """Lines of a supplier's open POs, live, for refreshing the snapshot."""
+        reader = HanaPOReader(self.context)
+        with self._breaker(HANA):
+            return reader.get_supplier_po_lines(supplier_code)
+
+    def _snapshot_pos(
+        self,
+        after: Optional[Tuple[int, int]] = None,
+        limit: Optional[int] = None,
+        **filters,
+    ) -> Optional[List[PODTO]]:
+        """
+        Open POs from the local snapshot, or None when the company has no
+        snapshot or its last sync is older than SAP_OPEN_PO_SNAPSHOT_MAX_AGE.
+        ``after`` and ``limit`` page it like HanaPOReader.get_open_pos().
+        """
+        max_age = settings.SAP_OPEN_PO_SNAPSHOT_MAX_AGE
+        if max_age <= 0:
+            return None
+
+        from .models import OpenPOLine, SAPMasterDataSync
+        state = SAPMasterDataSync.objects.filter(
+            company_code=self.context.company_code,
+            entity=SAPMasterDataSync.OPEN_PO_LINES,
+        ).first()
+        if state is None or state.last_synced_at < timezone.now() - timedelta(seconds=max_age):
+            return None
+
+        lines = OpenPOLine.objects.filter(
+            company_code=self.context.company_code, remaining_qty__gt=0, **filters
+        )
+        if after is not None:
+            lines = lines.filter(
+                Q(doc_entry__gt=after[0]) | Q(doc_entry=after[0], line_num__gt=after[1])
+            )
+
+        po_list = []
+        po = None
+        for line in lines.order_by("doc_entry", "line_num").iterator(chunk_size=settings.HANA_FETCH_SIZE):
+            if po is None or po.doc_entry != line.doc_entry:
+                if limit is not None and len(po_list) >= limit:
+                    break
+                po = PODTO(
+                    po_number=line.po_number,
+                    supplier_code=line.supplier_code,
+                    supplier_name=line.supplier_name,
+                    items=[],
+                    doc_entry=line.doc_entry,
+                    synced_at=state.last_synced_at,
+                )
+                po_list.append(po)
+            po.items.append(POItemDTO(
+                po_item_code=line.item_code,
+                item_name=line.item_name,
+                ordered_qty=float(line.ordered_qty),
+                received_qty=float(line.ordered_qty - line.remaining_qty),
+                remaining_qty=float(line.remaining_qty),
+                uom=line.uom,
+                rate=float(line.rate),
+                line_num=line.line_num,
+            ))
+            # Lines refreshed after a GRPO posting are newer than the last sync
+            po.synced_at = max(po.synced_at, line.synced_at)
+        return po_list
+
+    def invalidate_open_pos(self, supplier_code: str):
+        """Drop cached open POs for a supplier (after receipts / GRPO postings)."""
+        open_po_cache.invalidate((self.context.company_code, supplier_code))
+        read_flights.forget(("open_pos", self.context.company_code, supplier_code))
 
     def get_active_warehouses(self) -> List[WarehouseDTO]:
-        reader = HanaWarehouseReader(self.context)
-        return reader.get_active_warehouses()
+        def load():
+            reader = HanaWarehouseReader(self.context)
+            with self._breaker(HANA):
+                return reader.get_active_warehouses()
+
+        return list(read_flights.do(("warehouses", self.context.company_code), load))
 
     def get_active_vendors(self) -> List[VendorDTO]:
+        def load():
+            reader = HanaVendorReader(self.context)
+            with self._breaker(HANA):
+                return reader.get_active_vendors()
+
+        return list(read_flights.do(("vendors", self.context.company_code), load))
+
+    def get_vendors_changed_since(self, since: Optional[date] = None) -> List[VendorMasterDTO]:
+        """Vendor master rows changed on/after ``since`` (all when None), for the mirror."""
         reader = HanaVendorReader(self.context)
-        return reader.get_active_vendors()
+        with self._breaker(HANA):
+            return reader.get_vendors_changed_since(since)
+
+    def get_warehouses_changed_since(self, since: Optional[date] = None) -> List[WarehouseMasterDTO]:
+        """Warehouse master rows changed on/after ``since`` (all when None), for the mirror."""
+        reader = HanaWarehouseReader(self.context)
+        with self._breaker(HANA):
+            return reader.get_warehouses_changed_since(since)
+
+    def get_delivery_notes(self, date_from: date, date_to: date) -> List[DeliveryNoteDTO]:
+        """GRPO documents created in SAP between two dates (inclusive), for reconciliation."""
+        reader = HanaGRPOReader(self.context)
+        with self._breaker(HANA):
+            return reader.get_delivery_notes(date_from, date_to)
+
+    def find_grpos_by_key(self, keys: List[str]) -> Dict[str, DeliveryNoteDTO]:
+        """
+        GRPOs already in SAP for these idempotency keys ({key: document}),
+        read from the GRPO_IDEMPOTENCY_FIELD user field in ONE query.
+        Empty when the field is not configured.
+        """
+        if not settings.GRPO_IDEMPOTENCY_FIELD or not keys:
+            return {}
+        reader = HanaGRPOReader(self.context)
+        with self._breaker(HANA):
+            return reader.get_delivery_notes_by_key(settings.GRPO_IDEMPOTENCY_FIELD, keys)
 
     # ---- WRITE ----
     def create_grpo(self, payload: dict):
         self.grpo_writer = GRPOWriter(self.context)
-        return self.grpo_writer.create(payload)
+        with self._breaker(SERVICE_LAYER):
+            return self.grpo_writer.create(payload)
+
+    def create_grpo_batch(self, payloads: List[dict]) -> List[dict]:
+        """Create several GRPOs in one $batch call; one result per payload."""
+        self.grpo_writer = GRPOWriter(self.context)
+        with self._breaker(SERVICE_LAYER):
+            return self.grpo_writer.create_batch(payloads)
+
+    async def acreate_grpo(self, payload: dict, service_layer: AsyncServiceLayer) -> dict:
+        """create_grpo() for asyncio callers, over a shared AsyncServiceLayer."""
+        writer = AsyncGRPOWriter(self.context, service_layer)
+        with self._breaker(SERVICE_LAYER):
+            return await writer.acreate(payload)
+
+    async def acreate_grpo_batch(self, payloads: List[dict], service_layer: AsyncServiceLayer) -> List[dict]:
+        """create_grpo_batch() for asyncio callers, over a shared AsyncServiceLayer."""
+        writer = AsyncGRPOWriter(self.context, service_layer)
+        with self._breaker(SERVICE_LAYER):
+            return await writer.acreate_batch(payloads)
+
+    # ---- CONSOLIDATED (several companies) ----
+    @classmethod
+    def fan_out(
+        cls,
+        operation: Callable[["SAPClient"], Any],
+        company_codes: Optional[Iterable[str]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """
+        Run ``operation(SAPClient(company_code))`` for several companies in
+        parallel, so the total time is the slowest company, not the sum.
+
+        Args:
+            operation: callable taking a SAPClient
+            company_codes: companies to query (default: every company in
+                COMPANY_SAP_REGISTRY); unknown codes are skipped
+
+        Returns:
+            (results, errors): {company_code: value} for companies that
+            answered, {company_code: SAP exception} for those that failed.
+        """
+        if company_codes is None:
+            company_codes = COMPANY_SAP_REGISTRY
+        codes = [code for code in dict.fromkeys(company_codes) if code in COMPANY_SAP_REGISTRY]
+        futures = {
+            code: _fan_out_executor.submit(lambda code=code: operation(cls(code)))
+            for code in codes
+        }
+
+        deadline = time.monotonic() + settings.SAP_FAN_OUT_TIMEOUT
+        results, errors = {}, {}
+        for code, future in futures.items():
+            try:
+                results[code] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                future.cancel()
+                logger.error(f"SAP fan-out timed out for {code}")
+                errors[code] = SAPConnectionError(
+                    f"SAP did not answer within {settings.SAP_FAN_OUT_TIMEOUT}s"
+                )
+            except (SAPConnectionError, SAPDataError, SAPValidationError) as e:
+                logger.error(f"SAP fan-out failed for {code}: {e}")
+                errors[code] = e
+
+        return results, errors
+
+    @classmethod
+    def get_active_vendors_consolidated(
+        cls, company_codes: Optional[Iterable[str]] = None
+    ) -> Tuple[List[dict], Dict[str, Exception]]:
+        """Active vendors of several companies, each row tagged with company_code."""
+        results, errors = cls.fan_out(lambda client: client.get_active_vendors(), company_codes)
+        return _tag_rows(results), errors
+
+    @classmethod
+    def get_active_warehouses_consolidated(
+        cls, company_codes: Optional[Iterable[str]] = None
+    ) -> Tuple[List[dict], Dict[str, Exception]]:
+        """Active warehouses of several companies, each row tagged with company_code."""
+        results, errors = cls.fan_out(lambda client: client.get_active_warehouses(), company_codes)
+        return _tag_rows(results), errors
+
+
+def _tag_rows(results: Dict[str, list]) -> List[dict]:
+    return [
+        {"company_code": company_code, **asdict(row)}
+        for company_code, rows in results.items()
+        for row in rows
+    ]
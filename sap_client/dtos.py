@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from datetime import date, datetime
+from dataclasses import dataclass, field
 from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class POItemDTO:
     po_item_code: str
     item_name: str
@@ -14,16 +15,35 @@ class POItemDTO:
     line_num: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class PODTO:
     po_number: str
     supplier_code: str
     supplier_name: str
     items: List[POItemDTO]
     doc_entry: int = 0
+    synced_at: Optional[datetime] = None  # set when served from the local snapshot
 
 
-@dataclass
+@dataclass(slots=True)
+class POLineDTO:
+    """One PO line (open or not) for the local open PO line snapshot"""
+    po_number: str
+    doc_entry: int
+    line_num: int
+    supplier_code: str
+    supplier_name: str
+    item_code: str
+    item_name: str
+    ordered_qty: float
+    remaining_qty: float
+    uom: str
+    rate: float
+    is_open: bool
+    update_date: Optional[date] = None
+
+
+@dataclass(slots=True)
 class GRPOLineDTO:
     """GRPO Document Line Item"""
     item_code: str
@@ -36,7 +56,7 @@ class GRPOLineDTO:
     warehouse_code: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GRPORequestDTO:
     """GRPO Document Request"""
     card_code: str
@@ -46,7 +66,7 @@ class GRPORequestDTO:
     comments: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GRPOResponseDTO:
     """GRPO Document Response from SAP"""
     doc_entry: int
@@ -57,15 +77,57 @@ class GRPOResponseDTO:
     doc_total: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class WarehouseDTO:
     """Active Warehouse from SAP"""
     warehouse_code: str
     warehouse_name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class VendorDTO:
     """Active Vendor from SAP"""
     vendor_code: str
     vendor_name: str
+
+
+@dataclass(slots=True)
+class VendorMasterDTO:
+    """Vendor master row for the local mirror (active and frozen)"""
+    vendor_code: str
+    vendor_name: str
+    is_active: bool
+    update_date: Optional[date] = None
+
+
+@dataclass(slots=True)
+class WarehouseMasterDTO:
+    """Warehouse master row for the local mirror (active and inactive)"""
+    warehouse_code: str
+    warehouse_name: str
+    is_active: bool
+    update_date: Optional[date] = None
+
+
+@dataclass(slots=True)
+class DeliveryNoteLineDTO:
+    """One line of a GRPO (PDN1) read back from SAP"""
+    line_num: int
+    item_code: str
+    quantity: float
+    base_entry: Optional[int] = None
+    base_line: Optional[int] = None
+
+
+@dataclass(slots=True)
+class DeliveryNoteDTO:
+    """GRPO document (OPDN) read back from SAP, for reconciliation and duplicate checks"""
+    doc_entry: int
+    doc_num: int
+    card_code: str
+    doc_total: float
+    canceled: bool
+    create_date: Optional[date] = None
+    comments: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    lines: List[DeliveryNoteLineDTO] = field(default_factory=list)
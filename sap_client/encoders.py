@@ -0,0 +1,108 @@
+"""
+Direct JSON encoding of SAP DTOs for the read-only SAP endpoints.
+
+The output matches POSerializer / VendorSerializer / WarehouseSerializer
+rendered by DRF's JSONRenderer byte for byte, but rows are turned into
+plain dicts in one pass instead of instantiating serializer fields per row.
+"""
+import decimal
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+from django.utils import timezone
+from rest_framework.response import Response
+
+# (quantum, context) matching the DecimalFields of POItemSerializer
+_QTY = (decimal.Decimal("0.001"), decimal.Context(prec=12))
+_RATE = (decimal.Decimal("0.000001"), decimal.Context(prec=18))
+
+_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def _decimal(value, quantizer) -> Optional[str]:
+    if value is None:
+        return None
+    if not isinstance(value, decimal.Decimal):
+        value = decimal.Decimal(str(value).strip())
+    quantum, context = quantizer
+    return f"{value.quantize(quantum, context=context):f}"
+
+
+def _str(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _int(value) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def _datetime(value: Optional[datetime]) -> Optional[str]:
+    if not value:
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def po_data(po) -> dict:
+    """POSerializer(po).data as a plain dict."""
+    return {
+        "po_number": _str(po.po_number),
+        "supplier_code": _str(po.supplier_code),
+        "supplier_name": _str(po.supplier_name),
+        "doc_entry": _int(po.doc_entry),
+        "items": [
+            {
+                "po_item_code": _str(item.po_item_code),
+                "item_name": _str(item.item_name),
+                "ordered_qty": _decimal(item.ordered_qty, _QTY),
+                "received_qty": _decimal(item.received_qty, _QTY),
+                "remaining_qty": _decimal(item.remaining_qty, _QTY),
+                "uom": _str(item.uom),
+                "rate": _decimal(item.rate, _RATE),
+                "line_num": _int(item.line_num),
+            }
+            for item in po.items
+        ],
+        "synced_at": _datetime(po.synced_at),
+    }
+
+
+def pos_data(po_list: Iterable) -> List[dict]:
+    """POSerializer(po_list, many=True).data as plain dicts."""
+    return [po_data(po) for po in po_list]
+
+
+def rows_data(rows: Iterable, fields: Sequence[str]) -> List[dict]:
+    """
+    Rows of string fields (vendors, warehouses; DTOs or mirror models)
+    as plain dicts, like a serializer made of CharFields only.
+    """
+    return [
+        {field: _str(getattr(row, field)) for field in fields}
+        for row in rows
+    ]
+
+
+def render_json(data) -> bytes:
+    """Same bytes as DRF's JSONRenderer with its default (compact, unicode) settings."""
+    content = _encoder.encode(data)
+    # Like JSONRenderer: U+2028 / U+2029 are valid JSON but not valid JavaScript
+    content = content.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+    return content.encode("utf-8")
+
+
+class EncodedJSONResponse(Response):
+    """
+    Response rendered with render_json() instead of content negotiation.
+    ``data`` must already be plain JSON types (see pos_data / rows_data).
+    """
+
+    @property
+    def rendered_content(self):
+        self["Content-Type"] = "application/json"
+        return render_json(self.data)
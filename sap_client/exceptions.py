@@ -8,6 +8,11 @@ class SAPConnectionError(Exception):
     pass
 
 
+class SAPPoolTimeout(SAPConnectionError):
+    """Raised when no pooled SAP HANA connection frees up in time (local, not a SAP failure)"""
+    pass
+
+
 class SAPDataError(Exception):
     """Raised when SAP data operation fails"""
     pass
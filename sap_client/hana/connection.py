@@ -1,16 +1,246 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Iterator
+
+from django.conf import settings
 from hdbcli import dbapi
 
+from ..exceptions import SAPPoolTimeout
+from ..metrics import annotate
+from ..standin import hana as standin_hana
 
-class HanaConnection:
+logger = logging.getLogger(__name__)
 
-    def __init__(self, hana_config: dict):
+
+class HanaConnectionPool:
+    """
+    Bounded pool of HANA connections for ONE company schema.
+
+    Connections are health-checked on checkout, closed once they have been
+    idle longer than ``idle_timeout`` and never exceed ``max_size`` in total.
+    """
+
+    def __init__(self, hana_config: dict, max_size: int, idle_timeout: float, acquire_timeout: float):
         self.hana = hana_config
-        self.schema = hana_config['schema']
+        self.schema = hana_config["schema"]
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
 
-    def connect(self):
+        self._idle = deque()  # (connection, released_at), most recent on the right
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        # Stats
+        self._created = 0
+        self._closed = 0
+        self._acquired = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _open(self):
+        if self.hana.get("driver") == "standin":
+            return standin_hana.connect(self.hana)
         return dbapi.connect(
             address=self.hana['host'],
             port=self.hana['port'],
             user=self.hana['user'],
             password=self.hana['password'],
         )
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._closed += 1
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        try:
+            return bool(conn.isconnected())
+        except Exception:
+            return False
+
+    def _release_slot(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def acquire(self):
+        """
+        Check out a healthy connection, opening a new one if the pool has room.
+        Raises SAPPoolTimeout if no connection frees up within acquire_timeout.
+        Errors from dbapi.connect() propagate unchanged.
+        """
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+        waited = False
+        expired = []
+        conn = None
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                    expired.append(self._idle.popleft()[0])
+
+                if self._idle:
+                    conn = self._idle.pop()[0]
+                    break
+                if self._in_use < self.max_size:
+                    break
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise SAPPoolTimeout(
+                        "Timed out waiting for a SAP HANA connection. Please try again later."
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+
+        for stale in expired:
+            self._close(stale)
+
+        if conn is not None and not self._is_healthy(conn):
+            logger.warning(f"Discarding unhealthy SAP HANA connection for schema {self.schema}")
+            self._close(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                self._release_slot()
+                raise
+            with self._cond:
+                self._created += 1
+
+        wait_time = time.monotonic() - started
+        annotate(acquire_ms=wait_time * 1000)
+        with self._cond:
+            self._acquired += 1
+            if waited:
+                self._waits += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool, or close it when ``discard`` is set."""
+        if conn is None:
+            return
+        if discard:
+            self._close(conn)
+            self._release_slot()
+            return
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_idle(self):
+        """Close every idle connection. Checked-out ones are untouched."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "schema": self.schema,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "created": self._created,
+                "closed": self._closed,
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_avg_ms": round(
+                    self._wait_time_total / self._acquired * 1000 if self._acquired else 0.0, 3
+                ),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(hana_config: dict) -> HanaConnectionPool:
+    """Return the shared pool for a company schema, creating it on first use."""
+    key = (hana_config['host'], hana_config['port'], hana_config['user'], hana_config['schema'])
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = HanaConnectionPool(
+                    hana_config,
+                    max_size=settings.HANA_POOL_MAX_SIZE,
+                    idle_timeout=settings.HANA_POOL_IDLE_TIMEOUT,
+                    acquire_timeout=settings.HANA_POOL_ACQUIRE_TIMEOUT,
+                )
+                _pools[key] = pool
+    return pool
+
+
+def get_pool_stats() -> list:
+    """Stats for every pool created in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_idle()
+
+
+class HanaConnection:
+
+    def __init__(self, hana_config: dict):
+        self.hana = hana_config
+        self.schema = hana_config['schema']
+        self.pool = get_pool(hana_config)
+
+    def connect(self):
+        """Check out a pooled connection. Hand it back with release()."""
+        return self.pool.acquire()
+
+    def release(self, conn, discard: bool = False):
+        self.pool.release(conn, discard=discard)
+
+
+def stream_rows(cursor) -> Iterator[tuple]:
+    """
+    Yield the rows of an executed cursor, holding at most one fetchmany()
+    chunk of HANA_FETCH_SIZE rows in memory. The row count is annotated on
+    the current trace span when the generator finishes or is closed.
+    """
+    fetch_size = settings.HANA_FETCH_SIZE
+    fetched = 0
+    try:
+        while True:
+            chunk = cursor.fetchmany(fetch_size)
+            if not chunk:
+                return
+            fetched += len(chunk)
+            yield from chunk
+    finally:
+        annotate(rows=fetched)
@@ -0,0 +1,162 @@
+import logging
+import re
+from datetime import date
+from typing import Callable, Dict, Iterable, List
+
+from hdbcli import dbapi
+
+from .connection import HanaConnection, stream_rows
+from ..dtos import DeliveryNoteDTO, DeliveryNoteLineDTO
+from ..exceptions import SAPConnectionError, SAPDataError
+from ..metrics import traced
+
+logger = logging.getLogger(__name__)
+
+# SAP user-defined fields are U_<name>; the name is put in the SQL text
+UDF_NAME = re.compile(r"U_\w{1,50}")
+
+
+class HanaGRPOReader:
+
+    def __init__(self, context):
+        self.company_code = context.company_code
+        self.connection = HanaConnection(context.hana)
+
+    @traced("hana", "get_delivery_notes")
+    def get_delivery_notes(self, date_from: date, date_to: date) -> List[DeliveryNoteDTO]:
+        """
+        Every GRPO (OPDN, cancelled ones included) created between
+        ``date_from`` and ``date_to`` (inclusive) with its lines, in ONE query.
+        """
+        schema = self.connection.schema
+        query = f"""
+            SELECT
+                T0."DocEntry"      AS doc_entry,
+                T0."DocNum"        AS doc_num,
+                T0."CardCode"      AS card_code,
+                T0."DocTotal"      AS doc_total,
+                T0."CANCELED"      AS canceled,
+                T0."CreateDate"    AS create_date,
+                T0."Comments"      AS comments,
+                T1."LineNum"       AS line_num,
+                T1."ItemCode"      AS item_code,
+                T1."Quantity"      AS quantity,
+                T1."BaseEntry"     AS base_entry,
+                T1."BaseLine"      AS base_line
+            FROM "{schema}"."OPDN" T0
+            JOIN "{schema}"."PDN1" T1 ON T0."DocEntry" = T1."DocEntry"
+            WHERE T0."CreateDate" BETWEEN ? AND ?
+            ORDER BY T0."DocEntry", T1."LineNum"
+        """
+
+        def group(rows) -> List[DeliveryNoteDTO]:
+            documents = []
+            document = None
+            for row in rows:
+                doc_entry = int(row[0])
+                if document is None or document.doc_entry != doc_entry:
+                    document = DeliveryNoteDTO(
+                        doc_entry=doc_entry,
+                        doc_num=int(row[1]),
+                        card_code=row[2],
+                        doc_total=float(row[3] or 0),
+                        canceled=row[4] not in (None, "N"),
+                        create_date=row[5],
+                        comments=row[6],
+                    )
+                    documents.append(document)
+                document.lines.append(DeliveryNoteLineDTO(
+                    line_num=int(row[7]),
+                    item_code=row[8],
+                    quantity=float(row[9]),
+                    base_entry=row[10],
+                    base_line=row[11],
+                ))
+            return documents
+
+        return self._run(query, (date_from.isoformat(), date_to.isoformat()), group)
+
+    @traced("hana", "get_delivery_notes_by_key")
+    def get_delivery_notes_by_key(self, field: str, keys: Iterable[str]) -> Dict[str, DeliveryNoteDTO]:
+        """
+        Open (not cancelled) GRPOs whose user field ``field`` holds one of
+        ``keys``, without lines, in ONE query. Returns {key: document}.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        if not UDF_NAME.fullmatch(field):
+            raise SAPDataError(f"Invalid SAP user field name: {field}")
+
+        placeholders = ", ".join("?" for _ in keys)
+        query = f"""
+            SELECT
+                T0."DocEntry"      AS doc_entry,
+                T0."DocNum"        AS doc_num,
+                T0."CardCode"      AS card_code,
+                T0."DocTotal"      AS doc_total,
+                T0."CreateDate"    AS create_date,
+                T0."{field}"       AS idempotency_key
+            FROM "{self.connection.schema}"."OPDN" T0
+            WHERE T0."{field}" IN ({placeholders})
+              AND T0."CANCELED" = 'N'
+        """
+
+        def index(rows) -> Dict[str, DeliveryNoteDTO]:
+            return {
+                row[5]: DeliveryNoteDTO(
+                    doc_entry=int(row[0]),
+                    doc_num=int(row[1]),
+                    card_code=row[2],
+                    doc_total=float(row[3] or 0),
+                    canceled=False,
+                    create_date=row[4],
+                    idempotency_key=row[5],
+                )
+                for row in rows
+            }
+
+        return self._run(query, keys, index)
+
+    def _run(self, query: str, params, consume: Callable):
+        """Execute ``query`` and return ``consume(rows)`` over the streamed rows."""
+        conn = None
+        cursor = None
+        discard = False
+
+        try:
+            conn = self.connection.connect()
+        except dbapi.Error as e:
+            logger.error(f"SAP HANA connection failed: {e}")
+            raise SAPConnectionError(
+                "Unable to connect to SAP HANA. Please try again later."
+            ) from e
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+
+            rows = stream_rows(cursor)
+            try:
+                return consume(rows)
+            finally:
+                rows.close()
+
+        except dbapi.ProgrammingError as e:
+            logger.error(f"SAP HANA query error for GRPO documents: {e}")
+            raise SAPDataError(
+                "Failed to retrieve GRPO data from SAP. Invalid query or parameters."
+            ) from e
+        except dbapi.Error as e:
+            discard = True
+            logger.error(f"SAP HANA data error for GRPO documents: {e}")
+            raise SAPDataError(
+                "Failed to retrieve GRPO data from SAP. Please try again later."
+            ) from e
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            self.connection.release(conn, discard=discard)
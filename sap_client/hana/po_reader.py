@@ -1,11 +1,13 @@
 import logging
-from typing import List
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
 
 from hdbcli import dbapi
 
-from .connection import HanaConnection
-from ..dtos import PODTO, POItemDTO
+from .connection import HanaConnection, stream_rows
+from ..dtos import PODTO, POItemDTO, POLineDTO
 from ..exceptions import SAPConnectionError, SAPDataError
+from ..metrics import annotate, traced
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +15,85 @@ logger = logging.getLogger(__name__)
 class HanaPOReader:
 
     def __init__(self, context):
+        self.company_code = context.company_code
         self.connection = HanaConnection(context.hana)
 
-    def get_open_pos(self, supplier_code: str) -> List[PODTO]:
+    @traced("hana", "get_open_pos")
+    def get_open_pos(
+        self,
+        supplier_code: str,
+        after: Optional[Tuple[int, int]] = None,
+        limit: Optional[int] = None,
+    ) -> List[PODTO]:
+        """
+        Open POs of a supplier in (DocEntry, LineNum) order.
+
+        Args:
+            after: (doc_entry, line_num) keyset cursor; only lines after it are read
+            limit: stop after this many complete POs (all when None)
+        """
+        condition = 'T0."CardCode" = ?'
+        params = (supplier_code,)
+        if after is not None:
+            condition += ' AND (T0."DocEntry" > ? OR (T0."DocEntry" = ? AND T1."LineNum" > ?))'
+            params += (after[0], after[0], after[1])
+        return self._read_open_pos(condition, params, f"supplier {supplier_code}", limit)
+
+    @traced("hana", "get_po")
+    def get_po(self, po_number: str) -> Optional[PODTO]:
+        """
+        Fetch ONE PO (open lines only) by DocNum.
+        Returns None when the PO does not exist or has no open lines.
+        """
+        po_number = str(po_number).strip()
+        if not po_number.isdigit():
+            # DocNum is numeric in SAP; anything else cannot match
+            return None
+
+        po_list = self._read_open_pos(
+            'T0."DocNum" = ?', (int(po_number),), f"PO {po_number}"
+        )
+        return po_list[0] if po_list else None
+
+    @traced("hana", "get_pos_by_numbers")
+    def get_pos_by_numbers(self, po_numbers: Iterable[str]) -> List[PODTO]:
+        """
+        Several POs (open lines only) by DocNum in ONE query.
+        POs that do not exist or have no open lines are missing from the result.
+        """
+        doc_nums = sorted({
+            int(po_number) for po_number in (str(n).strip() for n in po_numbers) if po_number.isdigit()
+        })
+        if not doc_nums:
+            return []
+
+        placeholders = ", ".join("?" for _ in doc_nums)
+        return self._read_open_pos(
+            f'T0."DocNum" IN ({placeholders})', tuple(doc_nums), f"{len(doc_nums)} POs"
+        )
+
+    @traced("hana", "get_po_lines_changed_since")
+    def get_po_lines_changed_since(self, since: Optional[date] = None) -> List[POLineDTO]:
+        """
+        Every line of the POs whose header changed on or after ``since``,
+        closed lines included, so the snapshot can drop them. With ``since``
+        None, every line of every open PO.
+        """
+        if since is None:
+            return self._read_po_lines("""T0."DocStatus" = 'O'""", (), "all open POs")
+        return self._read_po_lines('T0."UpdateDate" >= ?', (since.isoformat(),), f"POs changed since {since}")
+
+    @traced("hana", "get_supplier_po_lines")
+    def get_supplier_po_lines(self, supplier_code: str) -> List[POLineDTO]:
+        """Every line of a supplier's open POs, for refreshing its snapshot lines."""
+        return self._read_po_lines(
+            """T0."DocStatus" = 'O' AND T0."CardCode" = ?""", (supplier_code,), f"supplier {supplier_code}"
+        )
+
+    def _read_po_lines(self, condition: str, params: tuple, label: str) -> List[POLineDTO]:
         conn = None
         cursor = None
+        discard = False
 
         try:
             conn = self.connection.connect()
@@ -34,35 +110,54 @@ class HanaPOReader:
             query = f"""
                 SELECT
                     T0."DocNum"        AS po_number,
+                    T0."DocEntry"      AS doc_entry,
+                    T1."LineNum"       AS line_num,
                     T0."CardCode"      AS supplier_code,
                     T0."CardName"      AS supplier_name,
-                    T1."ItemCode"      AS po_item_code,
+                    T1."ItemCode"      AS item_code,
                     T1."Dscription"    AS item_name,
                     T1."Quantity"      AS ordered_qty,
-                    (T1."Quantity" - T1."OpenQty") AS received_qty,
                     T1."OpenQty"       AS remaining_qty,
                     T1."unitMsr"       AS uom,
                     T1."Price"         AS rate,
-                    T0."DocEntry"      AS doc_entry,
-                    T1."LineNum"       AS line_num
+                    T0."DocStatus"     AS doc_status,
+                    T0."UpdateDate"    AS update_date
                 FROM "{schema}"."OPOR" T0
                 JOIN "{schema}"."POR1" T1 ON T0."DocEntry" = T1."DocEntry"
-                WHERE T0."CardCode" = ?
-                  AND T1."OpenQty" > 0
+                WHERE {condition}
             """
 
-            cursor.execute(query, supplier_code)
+            cursor.execute(query, params)
             rows = cursor.fetchall()
+            annotate(rows=len(rows))
 
-            return self._transform_to_dtos(rows)
+            return [
+                POLineDTO(
+                    po_number=str(row[0]),
+                    doc_entry=int(row[1]),
+                    line_num=int(row[2]),
+                    supplier_code=row[3],
+                    supplier_name=row[4],
+                    item_code=row[5],
+                    item_name=row[6],
+                    ordered_qty=float(row[7]),
+                    remaining_qty=float(row[8]),
+                    uom=row[9],
+                    rate=float(row[10]),
+                    is_open=row[11] == "O" and float(row[8]) > 0,
+                    update_date=row[12],
+                )
+                for row in rows
+            ]
 
         except dbapi.ProgrammingError as e:
-            logger.error(f"SAP HANA query error for supplier {supplier_code}: {e}")
+            logger.error(f"SAP HANA query error for PO lines of {label}: {e}")
             raise SAPDataError(
                 "Failed to retrieve PO data from SAP. Invalid query or parameters."
             ) from e
         except dbapi.Error as e:
-            logger.error(f"SAP HANA data error for supplier {supplier_code}: {e}")
+            discard = True
+            logger.error(f"SAP HANA data error for PO lines of {label}: {e}")
             raise SAPDataError(
                 "Failed to retrieve PO data from SAP. Please try again later."
             ) from e
@@ -72,24 +167,103 @@ class HanaPOReader:
                     cursor.close()
                 except Exception:
                     pass
-            if conn:
+            self.connection.release(conn, discard=discard)
+
+    def _read_open_pos(
+        self, condition: str, params: tuple, label: str, limit: Optional[int] = None
+    ) -> List[PODTO]:
+        """
+        Run the open PO line query filtered by ``condition`` and group the rows
+        into PODTOs while they are fetched, HANA_FETCH_SIZE rows at a time.
+        Reading stops once ``limit`` POs are complete.
+        """
+        conn = None
+        cursor = None
+        discard = False
+
+        try:
+            conn = self.connection.connect()
+        except dbapi.Error as e:
+            logger.error(f"SAP HANA connection failed: {e}")
+            raise SAPConnectionError(
+                "Unable to connect to SAP HANA. Please try again later."
+            ) from e
+
+        try:
+            cursor = conn.cursor()
+            schema = self.connection.schema
+
+            query = f"""
+                SELECT
+                    T0."DocNum"        AS po_number,
+                    T0."CardCode"      AS supplier_code,
+                    T0."CardName"      AS supplier_name,
+                    T1."ItemCode"      AS po_item_code,
+                    T1."Dscription"    AS item_name,
+                    T1."Quantity"      AS ordered_qty,
+                    (T1."Quantity" - T1."OpenQty") AS received_qty,
+                    T1."OpenQty"       AS remaining_qty,
+                    T1."unitMsr"       AS uom,
+                    T1."Price"         AS rate,
+                    T0."DocEntry"      AS doc_entry,
+                    T1."LineNum"       AS line_num
+                FROM "{schema}"."OPOR" T0
+                JOIN "{schema}"."POR1" T1 ON T0."DocEntry" = T1."DocEntry"
+                WHERE {condition}
+                  AND T1."OpenQty" > 0
+                ORDER BY T0."DocEntry", T1."LineNum"
+            """
+
+            cursor.execute(query, params)
+            rows = stream_rows(cursor)
+            try:
+                return self._group_rows(rows, limit)
+            finally:
+                rows.close()
+
+        except dbapi.ProgrammingError as e:
+            logger.error(f"SAP HANA query error for {label}: {e}")
+            raise SAPDataError(
+                "Failed to retrieve PO data from SAP. Invalid query or parameters."
+            ) from e
+        except dbapi.Error as e:
+            discard = True
+            logger.error(f"SAP HANA data error for {label}: {e}")
+            raise SAPDataError(
+                "Failed to retrieve PO data from SAP. Please try again later."
+            ) from e
+        finally:
+            if cursor:
                 try:
-                    conn.close()
+                    cursor.close()
                 except Exception:
                     pass
+            self.connection.release(conn, discard=discard)
 
-    def _transform_to_dtos(self, rows) -> List[PODTO]:
-        """Group rows by PO and create PODTO objects with nested POItemDTO objects"""
-        po_dict = {}
+    @staticmethod
+    def _group_rows(rows: Iterable[tuple], limit: Optional[int] = None) -> List[PODTO]:
+        """
+        Group rows ordered by DocEntry into PODTOs with nested POItemDTOs,
+        stopping at the first row of the (limit + 1)th PO.
+        """
+        po_list = []
+        po = None
 
         for row in rows:
-            po_number = row[0]
-            supplier_code = row[1]
-            supplier_name = row[2]
             doc_entry = int(row[10])
-            line_num = int(row[11])
+            if po is None or po.doc_entry != doc_entry:
+                if limit is not None and len(po_list) >= limit:
+                    break
+                po = PODTO(
+                    po_number=str(row[0]),
+                    supplier_code=row[1],
+                    supplier_name=row[2],
+                    items=[],
+                    doc_entry=doc_entry,
+                )
+                po_list.append(po)
 
-            item = POItemDTO(
+            po.items.append(POItemDTO(
                 po_item_code=row[3],
                 item_name=row[4],
                 ordered_qty=float(row[5]),
@@ -97,27 +271,7 @@ class HanaPOReader:
                 remaining_qty=float(row[7]),
                 uom=row[8],
                 rate=float(row[9]),
-                line_num=line_num
-            )
-
-            if po_number not in po_dict:
-                po_dict[po_number] = {
-                    'supplier_code': supplier_code,
-                    'supplier_name': supplier_name,
-                    'doc_entry': doc_entry,
-                    'items': []
-                }
-
-            po_dict[po_number]['items'].append(item)
-
-        po_list = []
-        for po_number, po_data in po_dict.items():
-            po_list.append(PODTO(
-                po_number=str(po_number),
-                supplier_code=po_data['supplier_code'],
-                supplier_name=po_data['supplier_name'],
-                items=po_data['items'],
-                doc_entry=po_data['doc_entry']
+                line_num=int(row[11]),
             ))
 
         return po_list
@@ -1,11 +1,13 @@
 import logging
-from typing import List
+from datetime import date
+from typing import List, Optional
 
 from hdbcli import dbapi
 
 from .connection import HanaConnection
-from ..dtos import VendorDTO
+from ..dtos import VendorDTO, VendorMasterDTO
 from ..exceptions import SAPConnectionError, SAPDataError
+from ..metrics import annotate, traced
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +15,14 @@ logger = logging.getLogger(__name__)
 class HanaVendorReader:
 
     def __init__(self, context):
+        self.company_code = context.company_code
         self.connection = HanaConnection(context.hana)
 
+    @traced("hana", "get_active_vendors")
     def get_active_vendors(self) -> List[VendorDTO]:
         conn = None
         cursor = None
+        discard = False
 
         try:
             conn = self.connection.connect()
@@ -58,6 +63,7 @@ class HanaVendorReader:
                 "Failed to retrieve vendor data from SAP. Invalid query or parameters."
             ) from e
         except dbapi.Error as e:
+            discard = True
             logger.error(f"SAP HANA data error for vendors: {e}")
             raise SAPDataError(
                 "Failed to retrieve vendor data from SAP. Please try again later."
@@ -68,8 +74,73 @@ class HanaVendorReader:
                     cursor.close()
                 except Exception:
                     pass
-            if conn:
+            self.connection.release(conn, discard=discard)
+
+    @traced("hana", "get_vendors_changed_since")
+    def get_vendors_changed_since(self, since: Optional[date] = None) -> List[VendorMasterDTO]:
+        """
+        Vendor rows (active and frozen) changed on or after ``since``;
+        every vendor when ``since`` is None. Feeds the local vendor mirror.
+        """
+        conn = None
+        cursor = None
+        discard = False
+
+        try:
+            conn = self.connection.connect()
+        except dbapi.Error as e:
+            logger.error(f"SAP HANA connection failed: {e}")
+            raise SAPConnectionError(
+                "Unable to connect to SAP HANA. Please try again later."
+            ) from e
+
+        try:
+            cursor = conn.cursor()
+            schema = self.connection.schema
+
+            query = f"""
+                SELECT
+                    "CardCode"   AS vendor_code,
+                    "CardName"   AS vendor_name,
+                    "frozenFor"  AS frozen_for,
+                    "UpdateDate" AS update_date
+                FROM "{schema}"."OCRD"
+                WHERE "CardType" = 'S'
+            """
+            params = ()
+            if since is not None:
+                query += ' AND "UpdateDate" >= ?'
+                params = (since.isoformat(),)
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            annotate(rows=len(rows))
+
+            return [
+                VendorMasterDTO(
+                    vendor_code=row[0],
+                    vendor_name=row[1],
+                    is_active=row[2] == "N",
+                    update_date=row[3],
+                )
+                for row in rows
+            ]
+
+        except dbapi.ProgrammingError as e:
+            logger.error(f"SAP HANA query error for vendor changes: {e}")
+            raise SAPDataError(
+                "Failed to retrieve vendor data from SAP. Invalid query or parameters."
+            ) from e
+        except dbapi.Error as e:
+            discard = True
+            logger.error(f"SAP HANA data error for vendor changes: {e}")
+            raise SAPDataError(
+                "Failed to retrieve vendor data from SAP. Please try again later."
+            ) from e
+        finally:
+            if cursor:
                 try:
-                    conn.close()
+                    cursor.close()
                 except Exception:
                     pass
+            self.connection.release(conn, discard=discard)
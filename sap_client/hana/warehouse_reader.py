@@ -1,11 +1,13 @@
 import logging
-from typing import List
+from datetime import date
+from typing import List, Optional
 
 from hdbcli import dbapi
 
 from .connection import HanaConnection
-from ..dtos import WarehouseDTO
+from ..dtos import WarehouseDTO, WarehouseMasterDTO
 from ..exceptions import SAPConnectionError, SAPDataError
+from ..metrics import annotate, traced
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +15,14 @@ logger = logging.getLogger(__name__)
 class HanaWarehouseReader:
 
     def __init__(self, context):
+        self.company_code = context.company_code
         self.connection = HanaConnection(context.hana)
 
+    @traced("hana", "get_active_warehouses")
     def get_active_warehouses(self) -> List[WarehouseDTO]:
         conn = None
         cursor = None
+        discard = False
 
         try:
             conn = self.connection.connect()
@@ -57,6 +62,7 @@ class HanaWarehouseReader:
                 "Failed to retrieve warehouse data from SAP. Invalid query or parameters."
             ) from e
         except dbapi.Error as e:
+            discard = True
             logger.error(f"SAP HANA data error for warehouses: {e}")
             raise SAPDataError(
                 "Failed to retrieve warehouse data from SAP. Please try again later."
@@ -67,8 +73,72 @@ class HanaWarehouseReader:
                     cursor.close()
                 except Exception:
                     pass
-            if conn:
+            self.connection.release(conn, discard=discard)
+
+    @traced("hana", "get_warehouses_changed_since")
+    def get_warehouses_changed_since(self, since: Optional[date] = None) -> List[WarehouseMasterDTO]:
+        """
+        Warehouse rows (active and inactive) changed on or after ``since``;
+        every warehouse when ``since`` is None. Feeds the local warehouse mirror.
+        """
+        conn = None
+        cursor = None
+        discard = False
+
+        try:
+            conn = self.connection.connect()
+        except dbapi.Error as e:
+            logger.error(f"SAP HANA connection failed: {e}")
+            raise SAPConnectionError(
+                "Unable to connect to SAP HANA. Please try again later."
+            ) from e
+
+        try:
+            cursor = conn.cursor()
+            schema = self.connection.schema
+
+            query = f"""
+                SELECT
+                    "WhsCode"    AS warehouse_code,
+                    "WhsName"    AS warehouse_name,
+                    "Inactive"   AS inactive,
+                    "UpdateDate" AS update_date
+                FROM "{schema}"."OWHS"
+            """
+            params = ()
+            if since is not None:
+                query += ' WHERE "UpdateDate" >= ?'
+                params = (since.isoformat(),)
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            annotate(rows=len(rows))
+
+            return [
+                WarehouseMasterDTO(
+                    warehouse_code=row[0],
+                    warehouse_name=row[1],
+                    is_active=row[2] == "N",
+                    update_date=row[3],
+                )
+                for row in rows
+            ]
+
+        except dbapi.ProgrammingError as e:
+            logger.error(f"SAP HANA query error for warehouse changes: {e}")
+            raise SAPDataError(
+                "Failed to retrieve warehouse data from SAP. Invalid query or parameters."
+            ) from e
+        except dbapi.Error as e:
+            discard = True
+            logger.error(f"SAP HANA data error for warehouse changes: {e}")
+            raise SAPDataError(
+                "Failed to retrieve warehouse data from SAP. Please try again later."
+            ) from e
+        finally:
+            if cursor:
                 try:
-                    conn.close()
+                    cursor.close()
                 except Exception:
                     pass
+            self.connection.release(conn, discard=discard)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from sap_client.standin.service_layer import StandinServiceLayer
+
+
+class Command(BaseCommand):
+    help = "Run the local SAP Service Layer stand-in (Login, PurchaseDeliveryNotes, $batch)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+        parser.add_argument("--port", type=int, default=50080, help="Port (default: 50080)")
+        parser.add_argument("--latency-ms", type=float, default=0, help="Fixed delay per request")
+        parser.add_argument("--jitter-ms", type=float, default=0, help="Extra random delay per request (0..N)")
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0,
+            help="Share of requests answered with HTTP 500 (0.0 - 1.0)"
+        )
+        parser.add_argument(
+            "--drop-rate", type=float, default=0.0,
+            help="Share of requests whose connection is closed without a response (0.0 - 1.0)"
+        )
+        parser.add_argument(
+            "--session-timeout", type=int, default=30,
+            help="SessionTimeout (minutes) returned by Login (default: 30)"
+        )
+
+    def handle(self, *args, **options):
+        server = StandinServiceLayer(
+            (options["host"], options["port"]),
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+            drop_rate=options["drop_rate"],
+            session_timeout=options["session_timeout"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"SAP Service Layer stand-in listening on {server.base_url}/b1s/v2/ (Ctrl+C to stop)"
+        ))
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+        self.stdout.write(
+            f"Served {server.request_count} requests, {server.login_count} logins, "
+            f"{server.documents_created} documents"
+        )
@@ -0,0 +1,135 @@
+import json
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sap_client.circuit_breaker import get_breaker_stats
+from sap_client.client import SAPClient, open_po_cache, read_flights
+from sap_client.hana.connection import get_pool_stats
+from sap_client.metrics import percentile, recorder
+
+OPERATIONS = ["open_pos", "po", "vendors", "warehouses", "grpo"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test SAPClient calls (best against the local SAP stand-in) and report "
+        "latency percentiles with pool, cache and circuit breaker stats"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--company", default="JIVO_OIL", choices=sorted(settings.COMPANY_DB))
+        parser.add_argument("--op", default="open_pos", choices=OPERATIONS, help="SAPClient call to run")
+        parser.add_argument("--requests", type=int, default=200, help="Total calls (default: 200)")
+        parser.add_argument("--concurrency", type=int, default=10, help="Parallel threads (default: 10)")
+        parser.add_argument(
+            "--distinct-suppliers", type=int, default=0,
+            help="Spread open_pos / grpo calls over the first N suppliers (default: all)"
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        if not settings.SAP_STANDIN_ENABLED:
+            self.stderr.write(self.style.WARNING(
+                "SAP_STANDIN_ENABLED is off: this benchmark is hitting the real SAP system."
+            ))
+
+        company_code = options["company"]
+        client = SAPClient(company_code)
+        call = self._build_call(client, options)
+
+        latencies = []
+        errors = Counter()
+
+        def run(index):
+            started = time.perf_counter()
+            try:
+                call(index)
+                error = None
+            except Exception as e:
+                error = type(e).__name__
+            return time.perf_counter() - started, error
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            for elapsed, error in executor.map(run, range(options["requests"])):
+                latencies.append(elapsed * 1000)
+                if error:
+                    errors[error] += 1
+        wall_time = time.perf_counter() - started
+        recorder.flush()  # so sap_metrics sees this run
+
+        latencies.sort()
+        report = {
+            "company": company_code,
+            "op": options["op"],
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "errors": dict(errors),
+            "wall_time_s": round(wall_time, 3),
+            "throughput_rps": round(options["requests"] / wall_time, 1) if wall_time else None,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "max": round(latencies[-1], 2) if latencies else 0.0,
+            },
+            "hana_pools": get_pool_stats(),
+            "open_po_cache": open_po_cache.stats(),
+            "read_coalescing": read_flights.stats(),
+            "circuit_breakers": get_breaker_stats(),
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        latency = report["latency_ms"]
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['op']} x{report['requests']} @ {report['concurrency']} threads: "
+            f"{report['throughput_rps']} req/s, p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+            f"p99 {latency['p99']} ms, max {latency['max']} ms"
+        ))
+        if errors:
+            self.stdout.write(self.style.WARNING(f"Errors: {dict(errors)}"))
+        for pool in report["hana_pools"]:
+            self.stdout.write(f"HANA pool {pool['schema']}: {pool}")
+        self.stdout.write(f"Open PO cache: {report['open_po_cache']}")
+        self.stdout.write(f"Read coalescing: {report['read_coalescing']}")
+        for breaker in report["circuit_breakers"]:
+            self.stdout.write(f"Circuit {breaker['company_code']}/{breaker['backend']}: {breaker}")
+
+    def _build_call(self, client: SAPClient, options):
+        op = options["op"]
+        if op == "vendors":
+            return lambda index: client.get_active_vendors()
+        if op == "warehouses":
+            return lambda index: client.get_active_warehouses()
+
+        suppliers = [vendor.vendor_code for vendor in client.get_active_vendors()]
+        if options["distinct_suppliers"]:
+            suppliers = suppliers[:options["distinct_suppliers"]]
+        if not suppliers:
+            raise CommandError("No active suppliers found; seed the stand-in first (seed_sap_standin)")
+
+        if op == "open_pos":
+            return lambda index: client.get_open_pos(suppliers[index % len(suppliers)])
+
+        if op == "po":
+            po_numbers = []
+            for supplier_code in suppliers[:20]:
+                po_numbers += [po.po_number for po in client.get_open_pos(supplier_code)]
+            if not po_numbers:
+                raise CommandError("No open POs found for the first 20 suppliers")
+            return lambda index: client.get_po(po_numbers[index % len(po_numbers)])
+
+        def post_grpo(index):
+            client.create_grpo({
+                "CardCode": suppliers[index % len(suppliers)],
+                "DocumentLines": [{"ItemCode": f"RM{random.randint(1, 200):05d}", "Quantity": "1"}],
+            })
+        return post_grpo
@@ -0,0 +1,120 @@
+import json
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from sap_client.dtos import PODTO, POItemDTO, VendorDTO
+from sap_client.encoders import pos_data, render_json, rows_data
+from sap_client.metrics import percentile
+from sap_client.serializers import POSerializer, VendorSerializer
+from sap_client.views import VENDOR_FIELDS
+
+PAYLOADS = ["pos", "vendors"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF serializer + JSONRenderer with the direct DTO encoder "
+        "(sap_client/encoders.py) on generated open PO / vendor lists"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payload", default="pos", choices=PAYLOADS, help="List to encode")
+        parser.add_argument("--rows", type=int, default=500, help="POs or vendors per list (default: 500)")
+        parser.add_argument("--lines-per-po", type=int, default=4, help="Lines per PO (default: 4)")
+        parser.add_argument("--repeat", type=int, default=50, help="Encodings per path (default: 50)")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        rows = self._build_rows(options)
+        if options["payload"] == "pos":
+            paths = {
+                "drf": lambda: JSONRenderer().render(POSerializer(rows, many=True).data),
+                "direct": lambda: render_json(pos_data(rows)),
+            }
+        else:
+            paths = {
+                "drf": lambda: JSONRenderer().render(VendorSerializer(rows, many=True).data),
+                "direct": lambda: render_json(rows_data(rows, VENDOR_FIELDS)),
+            }
+
+        if paths["drf"]() != paths["direct"]():
+            raise CommandError("Direct encoder output differs from the DRF serializer output")
+
+        report = {
+            "payload": options["payload"],
+            "rows": options["rows"],
+            "repeat": options["repeat"],
+            "bytes": len(paths["direct"]()),
+        }
+        for name, encode in paths.items():
+            report[name] = self._measure(encode, options["repeat"])
+        report["speedup"] = round(report["drf"]["p50_ms"] / report["direct"]["p50_ms"], 1)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['payload']} x{report['rows']} ({report['bytes']} bytes), "
+            f"{report['repeat']} encodings per path: direct encoder {report['speedup']}x faster (p50)"
+        ))
+        for name in paths:
+            self.stdout.write(f"{name}: {report[name]}")
+
+    def _build_rows(self, options):
+        rng = random.Random(0)
+        count = options["rows"]
+        if options["payload"] == "vendors":
+            return [VendorDTO(vendor_code=f"V{n:05d}", vendor_name=f"Supplier {n}") for n in range(count)]
+
+        synced_at = timezone.now()
+        return [
+            PODTO(
+                po_number=str(100000 + n),
+                supplier_code="V00001",
+                supplier_name="Supplier 1",
+                doc_entry=n,
+                synced_at=synced_at,
+                items=[
+                    POItemDTO(
+                        po_item_code=f"RM{rng.randint(1, 200):05d}",
+                        item_name="Raw Material",
+                        ordered_qty=float(rng.randint(10, 1000)),
+                        received_qty=float(rng.randint(0, 10)),
+                        remaining_qty=float(rng.randint(1, 1000)),
+                        uom="KG",
+                        rate=round(rng.uniform(5, 500), 2),
+                        line_num=line_num,
+                    )
+                    for line_num in range(options["lines_per_po"])
+                ],
+            )
+            for n in range(count)
+        ]
+
+    @staticmethod
+    def _measure(encode, repeat: int) -> dict:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            encode()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        tracemalloc.start()
+        try:
+            encode()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "peak_alloc_kb": round(peak / 1024, 1),
+        }
@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sap_client.metrics import latency_summary, purge_samples
+
+
+class Command(BaseCommand):
+    help = "Show SAP call latency (p50/p95/p99), errors and sizes per company and operation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes", type=int, default=15,
+            help="Look back this many minutes (default: 15)"
+        )
+        parser.add_argument("--company", help="Only this company code")
+        parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+        parser.add_argument(
+            "--purge", action="store_true",
+            help=f"Delete samples older than SAP_METRICS_RETENTION_HOURS "
+                 f"({settings.SAP_METRICS_RETENTION_HOURS}h) first"
+        )
+
+    def handle(self, *args, **options):
+        if options["purge"]:
+            deleted = purge_samples(settings.SAP_METRICS_RETENTION_HOURS)
+            self.stdout.write(self.style.SUCCESS(f"Purged {deleted} old SAP call samples"))
+
+        summary = latency_summary(options["minutes"], company_code=options["company"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        if not summary:
+            self.stdout.write(f"No SAP calls recorded in the last {options['minutes']} minutes")
+            return
+
+        header = f"{'COMPANY':<16} {'OPERATION':<36} {'CALLS':>6} {'ERR':>5} {'P50':>9} {'P95':>9} {'P99':>9} {'ACQ P95':>9}"
+        self.stdout.write(header)
+        for row in summary:
+            acquire = f"{row['acquire_p95_ms']:.1f}" if row["acquire_p95_ms"] is not None else "-"
+            self.stdout.write(
+                f"{row['company_code']:<16} {row['backend'] + '.' + row['operation']:<36} "
+                f"{row['count']:>6} {row['error_count']:>5} {row['p50_ms']:>9.1f} "
+                f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {acquire:>9}"
+            )
+            if row["errors"]:
+                self.stdout.write(f"{'':<16}   errors: {row['errors']}")
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sap_client.standin import hana
+
+
+class Command(BaseCommand):
+    help = "Generate the SQLite dataset used by the local SAP stand-in"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--company", action="append", choices=sorted(settings.COMPANY_DB),
+            help="Company to seed (repeatable, default: all companies)"
+        )
+        parser.add_argument("--suppliers", type=int, default=50, help="Suppliers per company (default: 50)")
+        parser.add_argument("--pos-per-supplier", type=int, default=5, help="Open POs per supplier (default: 5)")
+        parser.add_argument("--lines-per-po", type=int, default=4, help="Lines per PO (default: 4)")
+        parser.add_argument("--warehouses", type=int, default=10, help="Warehouses per company (default: 10)")
+        parser.add_argument("--items", type=int, default=200, help="Distinct item codes (default: 200)")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for a repeatable dataset")
+
+    def handle(self, *args, **options):
+        if options["suppliers"] < 1 or options["lines_per_po"] < 1:
+            raise CommandError("--suppliers and --lines-per-po must be at least 1")
+
+        for company_code in options["company"] or sorted(settings.COMPANY_DB):
+            result = hana.seed(
+                settings.COMPANY_DB[company_code],
+                suppliers=options["suppliers"],
+                pos_per_supplier=options["pos_per_supplier"],
+                lines_per_po=options["lines_per_po"],
+                warehouses=options["warehouses"],
+                items=options["items"],
+                random_seed=options["seed"],
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{company_code}: {result['suppliers']} suppliers, {result['purchase_orders']} POs, "
+                f"{result['po_lines']} PO lines, {result['warehouses']} warehouses -> {result['path']}"
+            ))
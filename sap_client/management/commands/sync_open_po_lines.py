@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sap_client.exceptions import SAPConnectionError, SAPDataError, SAPValidationError
+from sap_client.metrics import recorder
+from sap_client.open_po_snapshot import sync_open_po_lines
+from sap_client.registry import COMPANY_SAP_REGISTRY
+
+
+class Command(BaseCommand):
+    help = "Sync the local open PO line snapshot from SAP (POs changed since the last UpdateDate)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--company", action="append", choices=sorted(COMPANY_SAP_REGISTRY),
+            help="Company to sync (repeatable, default: all companies)"
+        )
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Reload every open PO instead of only the changed ones"
+        )
+
+    def handle(self, *args, **options):
+        failures = 0
+        try:
+            for company_code in options["company"] or sorted(COMPANY_SAP_REGISTRY):
+                try:
+                    result = sync_open_po_lines(company_code, full=options["full"])
+                except (SAPConnectionError, SAPDataError, SAPValidationError) as e:
+                    failures += 1
+                    self.stderr.write(self.style.ERROR(f"{company_code}: {e}"))
+                    continue
+
+                since = f" since {result['since']}" if result["since"] else ""
+                self.stdout.write(self.style.SUCCESS(
+                    f"{company_code}: {result['mode']}{since}, {result['purchase_orders']} POs, "
+                    f"{result['open_lines']} open lines"
+                ))
+        finally:
+            recorder.flush()
+
+        if failures:
+            raise CommandError(f"{failures} sync(s) failed")
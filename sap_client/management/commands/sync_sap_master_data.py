@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sap_client.exceptions import SAPConnectionError, SAPDataError, SAPValidationError
+from sap_client.master_data import MIRRORS, sync_entity
+from sap_client.metrics import recorder
+from sap_client.registry import COMPANY_SAP_REGISTRY
+
+
+class Command(BaseCommand):
+    help = "Sync the local vendor / warehouse mirror from SAP (rows changed since the last UpdateDate)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--company", action="append", choices=sorted(COMPANY_SAP_REGISTRY),
+            help="Company to sync (repeatable, default: all companies)"
+        )
+        parser.add_argument(
+            "--entity", action="append", choices=sorted(MIRRORS),
+            help="Master data to sync (repeatable, default: all)"
+        )
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Re-read everything and deactivate rows no longer returned by SAP"
+        )
+
+    def handle(self, *args, **options):
+        failures = 0
+        try:
+            for company_code in options["company"] or sorted(COMPANY_SAP_REGISTRY):
+                for entity in options["entity"] or MIRRORS:
+                    try:
+                        result = sync_entity(company_code, entity, full=options["full"])
+                    except (SAPConnectionError, SAPDataError, SAPValidationError) as e:
+                        failures += 1
+                        self.stderr.write(self.style.ERROR(f"{company_code} {entity}: {e}"))
+                        continue
+
+                    since = f" since {result['since']}" if result["since"] else ""
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{company_code} {entity}: {result['mode']}{since}, {result['rows']} rows, "
+                        f"{result['deactivated']} deactivated"
+                    ))
+        finally:
+            recorder.flush()
+
+        if failures:
+            raise CommandError(f"{failures} sync(s) failed")
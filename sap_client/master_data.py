@@ -0,0 +1,130 @@
+"""
+Local mirror of SAP vendor and warehouse master data.
+
+sync_master_data() pulls rows changed since the last synced UpdateDate
+(or everything with full=True) and upserts them into SAPVendor /
+SAPWarehouse. The vendor and warehouse list APIs read the mirror, so
+dropdowns do not wait for HANA.
+"""
+import logging
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .client import SAPClient
+from .models import SAPMasterDataSync, SAPVendor, SAPWarehouse
+
+logger = logging.getLogger(__name__)
+
+# entity -> (model, code field, name field, SAPClient method)
+MIRRORS = {
+    SAPMasterDataSync.VENDORS: (
+        SAPVendor, "vendor_code", "vendor_name", "get_vendors_changed_since"
+    ),
+    SAPMasterDataSync.WAREHOUSES: (
+        SAPWarehouse, "warehouse_code", "warehouse_name", "get_warehouses_changed_since"
+    ),
+}
+
+
+def sync_entity(company_code: str, entity: str, full: bool = False) -> dict:
+    """
+    Bring one company's mirror of ``entity`` up to date.
+
+    Incremental syncs re-read rows with UpdateDate >= the stored high-water
+    mark (SAP keeps a date, not a time, so the last day is read again).
+    Full syncs read everything and deactivate rows SAP no longer returned.
+    """
+    model, code_field, name_field, fetch = MIRRORS[entity]
+    state = SAPMasterDataSync.objects.filter(company_code=company_code, entity=entity).first()
+    since = None if full or state is None else state.last_update_date
+
+    rows = getattr(SAPClient(company_code), fetch)(since)
+
+    started_at = timezone.now()
+    objects = [
+        model(
+            company_code=company_code,
+            **{code_field: getattr(row, code_field), name_field: getattr(row, name_field)},
+            search_name=getattr(row, name_field).upper(),
+            search_code=getattr(row, code_field).upper(),
+            is_active=row.is_active,
+            sap_updated_at=row.update_date,
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        model.objects.bulk_create(
+            objects,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["company_code", code_field],
+            update_fields=[name_field, "search_name", "search_code", "is_active", "sap_updated_at", "synced_at"],
+        )
+
+        deactivated = 0
+        if since is None:
+            deactivated = model.objects.filter(
+                company_code=company_code, is_active=True, synced_at__lt=started_at
+            ).update(is_active=False)
+
+        last_update_date = model.objects.filter(
+            company_code=company_code
+        ).aggregate(last=Max("sap_updated_at"))["last"]
+
+        defaults = {
+            "last_update_date": last_update_date,
+            "last_synced_at": started_at,
+            "rows_synced": len(objects),
+        }
+        if since is None:
+            defaults["last_full_sync_at"] = started_at
+        SAPMasterDataSync.objects.update_or_create(
+            company_code=company_code, entity=entity, defaults=defaults
+        )
+
+    logger.info(
+        f"Synced {len(objects)} {entity} for {company_code} "
+        f"({'full' if since is None else f'since {since}'}, {deactivated} deactivated)"
+    )
+    return {
+        "company_code": company_code,
+        "entity": entity,
+        "mode": "full" if since is None else "incremental",
+        "since": since.isoformat() if since else None,
+        "rows": len(objects),
+        "deactivated": deactivated,
+    }
+
+
+def sync_master_data(company_code: str, entities: Optional[Iterable[str]] = None, full: bool = False) -> List[dict]:
+    return [sync_entity(company_code, entity, full=full) for entity in (entities or MIRRORS)]
+
+
+def is_mirrored(company_code: str, entity: str) -> bool:
+    """True once the company's mirror of ``entity`` has been synced at least once."""
+    return SAPMasterDataSync.objects.filter(company_code=company_code, entity=entity).exists()
+
+
+def _active_rows(company_code: str, entity: str, search: str = ""):
+    model, code_field, name_field, _ = MIRRORS[entity]
+    queryset = model.objects.filter(company_code=company_code, is_active=True)
+    search = search.strip().upper()
+    if search:
+        # Prefix lookups on the upper-cased columns only, so the
+        # (company_code, ...) pattern indexes apply
+        queryset = queryset.filter(Q(search_name__startswith=search) | Q(search_code__startswith=search))
+    return queryset.values(code_field, name_field)
+
+
+def active_vendors(company_code: str, search: str = ""):
+    """Active mirrored vendors ordered by name, optionally by name/code prefix."""
+    return _active_rows(company_code, SAPMasterDataSync.VENDORS, search).order_by("vendor_name")
+
+
+def active_warehouses(company_code: str, search: str = ""):
+    """Active mirrored warehouses ordered by code, optionally by name/code prefix."""
+    return _active_rows(company_code, SAPMasterDataSync.WAREHOUSES, search).order_by("warehouse_code")
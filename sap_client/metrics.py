@@ -0,0 +1,283 @@
+"""
+Tracing for SAP reader / writer calls.
+
+Every method decorated with @traced records one SAPCallSample: duration,
+rows returned, request / response bytes, pool acquire time and the error
+class. Samples are only buffered where the call happens, which may be a
+fan-out worker thread. They are written with bulk_create by the request or
+command thread: on request_finished (sap_client/signals.py) and when the
+management commands finish. Never inside an open transaction, where a
+rollback would drop them and a failed insert would break it. Each flush
+also deletes samples older than SAP_METRICS_RETENTION_HOURS, at most once
+per SAP_METRICS_PURGE_INTERVAL. latency_summary() turns the samples of the last N minutes
+into p50/p95/p99 and a latency histogram per company and operation.
+"""
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Span:
+    __slots__ = (
+        "company_code", "backend", "operation", "duration_ms", "acquire_ms",
+        "rows", "request_bytes", "response_bytes", "error_class", "created_at",
+    )
+
+    def __init__(self, company_code: str, backend: str, operation: str):
+        self.company_code = company_code
+        self.backend = backend
+        self.operation = operation
+        self.duration_ms = 0.0
+        self.acquire_ms = None
+        self.rows = None
+        self.request_bytes = None
+        self.response_bytes = None
+        self.error_class = ""
+        self.created_at = timezone.now()
+
+
+# Per thread and per asyncio task, so concurrent async calls keep their own span
+_current_span = contextvars.ContextVar("sap_current_span", default=None)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def annotate(**fields):
+    """Add fields (rows, acquire_ms, request_bytes, ...) to the running span, if any."""
+    span = current_span()
+    if span is None:
+        return
+    for name, value in fields.items():
+        if name == "acquire_ms" and span.acquire_ms is not None:
+            value += span.acquire_ms
+        setattr(span, name, value)
+
+
+def _count_rows(result):
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
+
+
+class MetricsRecorder:
+    """Per-process buffer of finished spans."""
+
+    def __init__(self):
+        self._buffer = deque(maxlen=settings.SAP_METRICS_BUFFER_MAX)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._last_purge = None
+
+    def record(self, span: Span):
+        """Buffer a span. Never touches the database, so any thread may call it."""
+        with self._lock:
+            self._buffer.append(span)
+
+    def flush_if_due(self) -> int:
+        with self._lock:
+            due = bool(self._buffer) and (
+                len(self._buffer) >= settings.SAP_METRICS_FLUSH_SIZE
+                or time.monotonic() - self._last_flush >= settings.SAP_METRICS_FLUSH_INTERVAL
+            )
+        return self.flush() if due else 0
+
+    def flush(self) -> int:
+        """Write buffered samples. Skipped while a transaction is open."""
+        if connection.in_atomic_block:
+            return 0
+
+        with self._lock:
+            spans = list(self._buffer)
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+        if not spans:
+            return 0
+
+        # Imported here: sap_client/__init__ loads this module before apps are ready
+        from .models import SAPCallSample
+
+        try:
+            SAPCallSample.objects.bulk_create([
+                SAPCallSample(**{name: getattr(span, name) for name in Span.__slots__})
+                for span in spans
+            ])
+        except DatabaseError as e:
+            logger.warning(f"Dropped {len(spans)} SAP call samples: {e}")
+            return 0
+        self._purge_if_due()
+        return len(spans)
+
+    def _purge_if_due(self):
+        now = time.monotonic()
+        if self._last_purge is not None and now - self._last_purge < settings.SAP_METRICS_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        try:
+            purge_samples(settings.SAP_METRICS_RETENTION_HOURS)
+        except DatabaseError as e:
+            logger.warning(f"Could not purge old SAP call samples: {e}")
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+
+recorder = MetricsRecorder()
+
+
+def traced(backend: str, operation: str):
+    """
+    Trace a reader / writer method. The instance must have ``company_code``.
+    Coroutine methods are traced too. Samples are only buffered, never
+    flushed here, so calls on fan-out threads or the event loop do not
+    open database connections.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                if not settings.SAP_METRICS_ENABLED:
+                    return await func(self, *args, **kwargs)
+
+                span = Span(str(getattr(self, "company_code", "") or ""), backend, operation)
+                token = _current_span.set(span)
+                started = time.perf_counter()
+                try:
+                    result = await func(self, *args, **kwargs)
+                    if span.rows is None:
+                        span.rows = _count_rows(result)
+                    return result
+                except Exception as e:
+                    span.error_class = type(e).__name__
+                    raise
+                finally:
+                    span.duration_ms = (time.perf_counter() - started) * 1000
+                    _current_span.reset(token)
+                    recorder.record(span)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not settings.SAP_METRICS_ENABLED:
+                return func(self, *args, **kwargs)
+
+            span = Span(str(getattr(self, "company_code", "") or ""), backend, operation)
+            token = _current_span.set(span)
+            started = time.perf_counter()
+            try:
+                result = func(self, *args, **kwargs)
+                if span.rows is None:
+                    span.rows = _count_rows(result)
+                return result
+            except Exception as e:
+                span.error_class = type(e).__name__
+                raise
+            finally:
+                span.duration_ms = (time.perf_counter() - started) * 1000
+                _current_span.reset(token)
+                recorder.record(span)
+        return wrapper
+    return decorator
+
+
+def latency_summary(minutes: int, company_code: str = None) -> list:
+    """
+    p50/p95/p99 latency, error classes, rows, bytes and acquire time per
+    (company, backend, operation) for samples of the last ``minutes``.
+    """
+    from .models import SAPCallSample
+
+    queryset = SAPCallSample.objects.filter(
+        created_at__gte=timezone.now() - timedelta(minutes=minutes)
+    )
+    if company_code:
+        queryset = queryset.filter(company_code=company_code)
+
+    groups = defaultdict(lambda: {
+        "durations": [], "acquire": [], "rows": 0, "request_bytes": 0,
+        "response_bytes": 0, "errors": defaultdict(int),
+    })
+    for (company, backend, operation, duration, acquire, rows,
+         request_bytes, response_bytes, error_class) in queryset.values_list(
+            "company_code", "backend", "operation", "duration_ms", "acquire_ms",
+            "rows", "request_bytes", "response_bytes", "error_class",
+    ).iterator():
+        group = groups[(company, backend, operation)]
+        group["durations"].append(duration)
+        if acquire is not None:
+            group["acquire"].append(acquire)
+        group["rows"] += rows or 0
+        group["request_bytes"] += request_bytes or 0
+        group["response_bytes"] += response_bytes or 0
+        if error_class:
+            group["errors"][error_class] += 1
+
+    summary = []
+    for (company, backend, operation), group in sorted(groups.items()):
+        durations = sorted(group["durations"])
+        acquire = sorted(group["acquire"])
+        count = len(durations)
+
+        histogram = {f"le_{bound}": 0 for bound in HISTOGRAM_BUCKETS_MS}
+        histogram["gt_10000"] = 0
+        for duration in durations:
+            for bound in HISTOGRAM_BUCKETS_MS:
+                if duration <= bound:
+                    histogram[f"le_{bound}"] += 1
+                    break
+            else:
+                histogram["gt_10000"] += 1
+
+        summary.append({
+            "company_code": company,
+            "backend": backend,
+            "operation": operation,
+            "count": count,
+            "error_count": sum(group["errors"].values()),
+            "errors": dict(group["errors"]),
+            "p50_ms": round(percentile(durations, 50), 2),
+            "p95_ms": round(percentile(durations, 95), 2),
+            "p99_ms": round(percentile(durations, 99), 2),
+            "max_ms": round(durations[-1], 2),
+            "acquire_p95_ms": round(percentile(acquire, 95), 2) if acquire else None,
+            "avg_rows": round(group["rows"] / count, 1),
+            "avg_request_bytes": round(group["request_bytes"] / count),
+            "avg_response_bytes": round(group["response_bytes"] / count),
+            "histogram": histogram,
+        })
+    return summary
+
+
+def purge_samples(older_than_hours: int) -> int:
+    from .models import SAPCallSample
+
+    deleted, _ = SAPCallSample.objects.filter(
+        created_at__lt=timezone.now() - timedelta(hours=older_than_hours)
+    ).delete()
+    return deleted
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SAPCallSample',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_code', models.CharField(max_length=50)),
+                ('backend', models.CharField(max_length=20)),
+                ('operation', models.CharField(max_length=100)),
+                ('duration_ms', models.FloatField()),
+                ('acquire_ms', models.FloatField(blank=True, help_text='Time spent waiting for a pooled HANA connection', null=True)),
+                ('rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('request_bytes', models.PositiveIntegerField(blank=True, null=True)),
+                ('response_bytes', models.PositiveIntegerField(blank=True, null=True)),
+                ('error_class', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
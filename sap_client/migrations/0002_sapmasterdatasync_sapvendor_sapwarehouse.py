@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sap_client', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SAPMasterDataSync',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_code', models.CharField(max_length=50)),
+                ('entity', models.CharField(choices=[('vendors', 'Vendors'), ('warehouses', 'Warehouses')], max_length=20)),
+                ('last_update_date', models.DateField(blank=True, null=True)),
+                ('last_synced_at', models.DateTimeField()),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('rows_synced', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('company_code', 'entity'), name='uniq_sap_master_data_sync')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SAPVendor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_code', models.CharField(max_length=50)),
+                ('vendor_code', models.CharField(max_length=50)),
+                ('vendor_name', models.CharField(max_length=200)),
+                ('search_name', models.CharField(help_text='Upper-cased vendor_name for indexed prefix search', max_length=200)),
+                ('is_active', models.BooleanField(default=True)),
+                ('sap_updated_at', models.DateField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['vendor_name'],
+                'indexes': [models.Index(fields=['company_code', 'search_name'], name='sap_vendor_name_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']), models.Index(fields=['company_code', 'vendor_code'], name='sap_vendor_code_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('company_code', 'vendor_code'), name='uniq_sap_vendor_per_company')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SAPWarehouse',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_code', models.CharField(max_length=50)),
+                ('warehouse_code', models.CharField(max_length=50)),
+                ('warehouse_name', models.CharField(max_length=200)),
+                ('search_name', models.CharField(help_text='Upper-cased warehouse_name for indexed prefix search', max_length=200)),
+                ('is_active', models.BooleanField(default=True)),
+                ('sap_updated_at', models.DateField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['warehouse_code'],
+                'indexes': [models.Index(fields=['company_code', 'search_name'], name='sap_warehouse_name_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']), models.Index(fields=['company_code', 'warehouse_code'], name='sap_warehouse_code_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('company_code', 'warehouse_code'), name='uniq_sap_warehouse_per_company')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-17 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sap_client', '0002_sapmasterdatasync_sapvendor_sapwarehouse'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sapmasterdatasync',
+            name='entity',
+            field=models.CharField(choices=[('vendors', 'Vendors'), ('warehouses', 'Warehouses'), ('open_po_lines', 'Open PO lines')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='OpenPOLine',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_code', models.CharField(max_length=50)),
+                ('doc_entry', models.IntegerField()),
+                ('line_num', models.IntegerField()),
+                ('po_number', models.CharField(max_length=20)),
+                ('supplier_code', models.CharField(max_length=50)),
+                ('supplier_name', models.CharField(max_length=200)),
+                ('item_code', models.CharField(max_length=50)),
+                ('item_name', models.CharField(blank=True, max_length=200)),
+                ('ordered_qty', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('remaining_qty', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('uom', models.CharField(blank=True, max_length=20)),
+                ('rate', models.DecimalField(decimal_places=6, default=0, max_digits=18)),
+                ('sap_updated_at', models.DateField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['doc_entry', 'line_num'],
+                'indexes': [models.Index(fields=['company_code', 'supplier_code'], name='open_po_line_supplier'), models.Index(fields=['company_code', 'po_number'], name='open_po_line_po_number')],
+                'constraints': [models.UniqueConstraint(fields=('company_code', 'doc_entry', 'line_num'), name='uniq_open_po_line')],
+            },
+        ),
+    ]
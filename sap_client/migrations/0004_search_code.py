@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:40
+
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+def fill_search_code(apps, schema_editor):
+    for model_name, code_field in (("SAPVendor", "vendor_code"), ("SAPWarehouse", "warehouse_code")):
+        apps.get_model("sap_client", model_name).objects.update(search_code=Upper(code_field))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sap_client', '0003_alter_sapmasterdatasync_entity_openpoline'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sapvendor',
+            name='sap_vendor_code_prefix',
+        ),
+        migrations.RemoveIndex(
+            model_name='sapwarehouse',
+            name='sap_warehouse_code_prefix',
+        ),
+        migrations.AddField(
+            model_name='sapvendor',
+            name='search_code',
+            field=models.CharField(default='', help_text='Upper-cased vendor_code for indexed prefix search', max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='sapwarehouse',
+            name='search_code',
+            field=models.CharField(default='', help_text='Upper-cased warehouse_code for indexed prefix search', max_length=50),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_search_code, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sapvendor',
+            index=models.Index(fields=['company_code', 'search_code'], name='sap_vendor_code_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='sapwarehouse',
+            index=models.Index(fields=['company_code', 'search_code'], name='sap_warehouse_code_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+    ]
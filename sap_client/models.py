@@ -1,3 +1,194 @@
 from django.db import models
 
-# Create your models here.
+
+class SAPCallSample(models.Model):
+    """
+    One traced SAP call (HANA query or Service Layer request).
+    Written in batches by sap_client.metrics; read by the sap_metrics
+    command and the SAP metrics endpoint.
+    """
+    company_code = models.CharField(max_length=50)
+    backend = models.CharField(max_length=20)  # "hana" / "service_layer"
+    operation = models.CharField(max_length=100)
+
+    duration_ms = models.FloatField()
+    acquire_ms = models.FloatField(
+        null=True, blank=True,
+        help_text="Time spent waiting for a pooled HANA connection"
+    )
+    rows = models.PositiveIntegerField(null=True, blank=True)
+    request_bytes = models.PositiveIntegerField(null=True, blank=True)
+    response_bytes = models.PositiveIntegerField(null=True, blank=True)
+    error_class = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.company_code} {self.backend}.{self.operation} {self.duration_ms:.1f} ms"
+
+
+class SAPVendor(models.Model):
+    """
+    Local mirror of an SAP supplier (OCRD, CardType 'S') for one company.
+    Kept current by the sync_sap_master_data command.
+    """
+    company_code = models.CharField(max_length=50)
+    vendor_code = models.CharField(max_length=50)
+    vendor_name = models.CharField(max_length=200)
+    search_name = models.CharField(
+        max_length=200,
+        help_text="Upper-cased vendor_name for indexed prefix search"
+    )
+    search_code = models.CharField(
+        max_length=50,
+        help_text="Upper-cased vendor_code for indexed prefix search"
+    )
+    is_active = models.BooleanField(default=True)
+    sap_updated_at = models.DateField(null=True, blank=True)  # OCRD.UpdateDate
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["vendor_name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company_code", "vendor_code"],
+                name="uniq_sap_vendor_per_company"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["company_code", "search_name"],
+                name="sap_vendor_name_prefix",
+                opclasses=["varchar_pattern_ops", "varchar_pattern_ops"],
+            ),
+            models.Index(
+                fields=["company_code", "search_code"],
+                name="sap_vendor_code_prefix",
+                opclasses=["varchar_pattern_ops", "varchar_pattern_ops"],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.company_code} {self.vendor_code} - {self.vendor_name}"
+
+
+class SAPWarehouse(models.Model):
+    """
+    Local mirror of an SAP warehouse (OWHS) for one company.
+    Kept current by the sync_sap_master_data command.
+    """
+    company_code = models.CharField(max_length=50)
+    warehouse_code = models.CharField(max_length=50)
+    warehouse_name = models.CharField(max_length=200)
+    search_name = models.CharField(
+        max_length=200,
+        help_text="Upper-cased warehouse_name for indexed prefix search"
+    )
+    search_code = models.CharField(
+        max_length=50,
+        help_text="Upper-cased warehouse_code for indexed prefix search"
+    )
+    is_active = models.BooleanField(default=True)
+    sap_updated_at = models.DateField(null=True, blank=True)  # OWHS.UpdateDate
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["warehouse_code"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company_code", "warehouse_code"],
+                name="uniq_sap_warehouse_per_company"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["company_code", "search_name"],
+                name="sap_warehouse_name_prefix",
+                opclasses=["varchar_pattern_ops", "varchar_pattern_ops"],
+            ),
+            models.Index(
+                fields=["company_code", "search_code"],
+                name="sap_warehouse_code_prefix",
+                opclasses=["varchar_pattern_ops", "varchar_pattern_ops"],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.company_code} {self.warehouse_code} - {self.warehouse_name}"
+
+
+class SAPMasterDataSync(models.Model):
+    """
+    High-water mark of a local SAP mirror per company and entity.
+    The next incremental sync pulls rows with UpdateDate >= last_update_date.
+    """
+    VENDORS = "vendors"
+    WAREHOUSES = "warehouses"
+    OPEN_PO_LINES = "open_po_lines"
+    ENTITY_CHOICES = [
+        (VENDORS, "Vendors"),
+        (WAREHOUSES, "Warehouses"),
+        (OPEN_PO_LINES, "Open PO lines"),
+    ]
+
+    company_code = models.CharField(max_length=50)
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    last_update_date = models.DateField(null=True, blank=True)
+    last_synced_at = models.DateTimeField()
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    rows_synced = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company_code", "entity"],
+                name="uniq_sap_master_data_sync"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.company_code} {self.entity} synced {self.last_synced_at}"
+
+
+class OpenPOLine(models.Model):
+    """
+    Local snapshot of one open SAP PO line (OPOR/POR1) for one company.
+    Kept current by the sync_open_po_lines command and refreshed per
+    supplier after our own GRPO postings; read by SAPClient.get_open_pos
+    and SAPClient.get_po.
+    """
+    company_code = models.CharField(max_length=50)
+    doc_entry = models.IntegerField()
+    line_num = models.IntegerField()
+    po_number = models.CharField(max_length=20)  # OPOR.DocNum
+
+    supplier_code = models.CharField(max_length=50)
+    supplier_name = models.CharField(max_length=200)
+    item_code = models.CharField(max_length=50)
+    item_name = models.CharField(max_length=200, blank=True)
+    ordered_qty = models.DecimalField(max_digits=12, decimal_places=3)
+    remaining_qty = models.DecimalField(max_digits=12, decimal_places=3)
+    uom = models.CharField(max_length=20, blank=True)
+    rate = models.DecimalField(max_digits=18, decimal_places=6, default=0)
+
+    sap_updated_at = models.DateField(null=True, blank=True)  # OPOR.UpdateDate
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["doc_entry", "line_num"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company_code", "doc_entry", "line_num"],
+                name="uniq_open_po_line"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["company_code", "supplier_code"], name="open_po_line_supplier"),
+            models.Index(fields=["company_code", "po_number"], name="open_po_line_po_number"),
+        ]
+
+    def __str__(self):
+        return f"{self.company_code} PO {self.po_number}/{self.line_num} {self.item_code}"
@@ -0,0 +1,130 @@
+"""
+Local snapshot of open SAP PO lines (OpenPOLine).
+
+sync_open_po_lines() re-reads the POs whose OPOR.UpdateDate is on or after
+the last synced date and replaces their lines (closed lines drop out);
+full=True reloads every open PO. The incremental read has no DocStatus
+filter, so POs closed since the last run come back and their lines are
+deleted without being re-created. refresh_supplier() re-reads one supplier
+live after we post a GRPO for it. That is one extra HANA query per posted
+GRPO, run on commit in the posting thread. It is traced as
+get_supplier_po_lines, so `sap_metrics` shows its cost.
+SAPClient.get_open_pos / get_po read the snapshot while it is fresh.
+"""
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .client import SAPClient
+from .models import OpenPOLine, SAPMasterDataSync
+
+logger = logging.getLogger(__name__)
+
+DELETE_CHUNK_SIZE = 500
+
+
+def _as_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _snapshot_state(company_code: str) -> Optional[SAPMasterDataSync]:
+    return SAPMasterDataSync.objects.filter(
+        company_code=company_code, entity=SAPMasterDataSync.OPEN_PO_LINES
+    ).first()
+
+
+def _snapshot_line(company_code: str, row) -> OpenPOLine:
+    return OpenPOLine(
+        company_code=company_code,
+        doc_entry=row.doc_entry,
+        line_num=row.line_num,
+        po_number=row.po_number,
+        supplier_code=row.supplier_code,
+        supplier_name=row.supplier_name,
+        item_code=row.item_code,
+        item_name=row.item_name or "",
+        ordered_qty=row.ordered_qty,
+        remaining_qty=row.remaining_qty,
+        uom=row.uom or "",
+        rate=row.rate,
+        sap_updated_at=_as_date(row.update_date),
+    )
+
+
+def sync_open_po_lines(company_code: str, full: bool = False) -> dict:
+    """
+    Bring one company's open PO line snapshot up to date. The first sync
+    of a company is always full.
+    """
+    state = _snapshot_state(company_code)
+    since = None if full or state is None else state.last_update_date
+
+    rows = SAPClient(company_code).get_po_lines_changed_since(since)
+
+    started_at = timezone.now()
+    doc_entries = sorted({row.doc_entry for row in rows})
+    open_lines = [_snapshot_line(company_code, row) for row in rows if row.is_open]
+
+    changed_dates = [line.sap_updated_at for line in open_lines if line.sap_updated_at]
+    changed_dates += [_as_date(row.update_date) for row in rows if not row.is_open and row.update_date]
+    if since is not None:
+        changed_dates.append(since)
+
+    with transaction.atomic():
+        lines = OpenPOLine.objects.filter(company_code=company_code)
+        if since is None:
+            lines.delete()
+        else:
+            for start in range(0, len(doc_entries), DELETE_CHUNK_SIZE):
+                lines.filter(doc_entry__in=doc_entries[start:start + DELETE_CHUNK_SIZE]).delete()
+        OpenPOLine.objects.bulk_create(open_lines, batch_size=1000)
+
+        defaults = {
+            "last_update_date": max(changed_dates, default=None),
+            "last_synced_at": started_at,
+            "rows_synced": len(rows),
+        }
+        if since is None:
+            defaults["last_full_sync_at"] = started_at
+        SAPMasterDataSync.objects.update_or_create(
+            company_code=company_code,
+            entity=SAPMasterDataSync.OPEN_PO_LINES,
+            defaults=defaults,
+        )
+
+    logger.info(
+        f"Synced {len(doc_entries)} POs ({len(open_lines)} open lines) for {company_code} "
+        f"({'full' if since is None else f'since {since}'})"
+    )
+    return {
+        "company_code": company_code,
+        "mode": "full" if since is None else "incremental",
+        "since": since.isoformat() if since else None,
+        "purchase_orders": len(doc_entries),
+        "open_lines": len(open_lines),
+    }
+
+
+def refresh_supplier(company_code: str, supplier_code: str) -> Optional[int]:
+    """
+    Replace a supplier's snapshot lines with a live read from SAP (after a
+    GRPO posting changed its open quantities). Returns the number of open
+    lines, or None when the company has no snapshot.
+    """
+    if _snapshot_state(company_code) is None:
+        return None
+
+    rows = SAPClient(company_code).get_supplier_po_lines(supplier_code)
+    open_lines = [_snapshot_line(company_code, row) for row in rows if row.is_open]
+
+    with transaction.atomic():
+        OpenPOLine.objects.filter(company_code=company_code, supplier_code=supplier_code).delete()
+        OpenPOLine.objects.bulk_create(open_lines)
+    return len(open_lines)
@@ -51,6 +51,19 @@ COMPANY_SAP_REGISTRY = {
 }
 
 
+if settings.SAP_STANDIN_ENABLED:
+    # Point every company at the local SAP stand-in (sap_client/standin)
+    for company_config in COMPANY_SAP_REGISTRY.values():
+        company_config["hana"].update({
+            "driver": "standin",
+            "host": "standin",
+            "port": 0,
+            "user": "standin",
+            "password": "",
+        })
+        company_config["service_layer"]["base_url"] = settings.SAP_STANDIN_SL_URL
+
+
 def get_company_config(company_code: str) -> dict:
     try:
         return COMPANY_SAP_REGISTRY[company_code]
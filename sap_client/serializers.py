@@ -11,6 +11,14 @@ class VendorSerializer(serializers.Serializer):
     vendor_name = serializers.CharField()
 
 
+class ConsolidatedWarehouseSerializer(WarehouseSerializer):
+    company_code = serializers.CharField()
+
+
+class ConsolidatedVendorSerializer(VendorSerializer):
+    company_code = serializers.CharField()
+
+
 class POItemSerializer(serializers.Serializer):
     po_item_code = serializers.CharField()
     item_name = serializers.CharField()
@@ -28,6 +36,10 @@ class POSerializer(serializers.Serializer):
     supplier_name = serializers.CharField()
     doc_entry = serializers.IntegerField()
     items = POItemSerializer(many=True)
+    synced_at = serializers.DateTimeField(
+        allow_null=True, required=False,
+        help_text="When the local snapshot was last synced; null when read live from SAP"
+    )
 
 
 # ---- GRPO Serializers ----
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+
+import httpx
+from django.conf import settings
+
+from .auth import SESSION_EXPIRY_MARGIN
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncServiceLayerSession:
+    """
+    Logged-in Service Layer session for ONE company database on a shared
+    AsyncServiceLayer client. Same rules as ServiceLayerSession: cookies are
+    reused until SessionTimeout runs out and a 401 triggers one re-login and
+    retry. The cookies are sent per request, since several company databases
+    share one client (and one HTTP/2 connection).
+    """
+
+    def __init__(self, http: httpx.AsyncClient, sl_config: dict):
+        self.http = http
+        self.sl = sl_config
+        self.base_url = f"{sl_config['base_url']}/b1s/v2"
+
+        self._lock = asyncio.Lock()
+        self._cookie_header = ""
+        self._expires_at = 0.0
+        self._session_timeout = settings.SL_SESSION_TIMEOUT * 60
+        self._login_count = 0
+
+    async def login(self):
+        response = await self.http.post(
+            f"{self.base_url}/Login",
+            json={
+                "CompanyDB": self.sl["company_db"],
+                "UserName": self.sl["username"],
+                "Password": self.sl["password"],
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+
+        try:
+            timeout_minutes = int(response.json().get("SessionTimeout", settings.SL_SESSION_TIMEOUT))
+        except (ValueError, TypeError, AttributeError):
+            timeout_minutes = settings.SL_SESSION_TIMEOUT
+        self._session_timeout = timeout_minutes * 60
+        self._cookie_header = "; ".join(f"{name}={value}" for name, value in response.cookies.items())
+        self._touch()
+        self._login_count += 1
+        logger.info(f"Logged in to SAP Service Layer (async) for {self.sl['company_db']}")
+
+    def _touch(self):
+        self._expires_at = time.monotonic() + self._session_timeout - SESSION_EXPIRY_MARGIN
+
+    async def _ensure_login(self) -> int:
+        if time.monotonic() < self._expires_at:
+            return self._login_count
+        async with self._lock:
+            if time.monotonic() >= self._expires_at:
+                await self.login()
+            return self._login_count
+
+    async def _relogin(self, stale_generation: int):
+        async with self._lock:
+            if self._login_count == stale_generation:
+                self._expires_at = 0.0
+                await self.login()
+
+    async def request(self, method: str, path: str, headers=None, **kwargs) -> httpx.Response:
+        """
+        Send a request to ``/b1s/v2/<path>``.
+        Login failures raise httpx.HTTPStatusError.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        generation = await self._ensure_login()
+        response = await self.http.request(
+            method, url, headers={**(headers or {}), "Cookie": self._cookie_header}, **kwargs
+        )
+
+        if response.status_code == 401:
+            logger.info(f"SAP Service Layer session expired for {self.sl['company_db']}; logging in again")
+            await self._relogin(generation)
+            response = await self.http.request(
+                method, url, headers={**(headers or {}), "Cookie": self._cookie_header}, **kwargs
+            )
+
+        if response.status_code != 401:
+            self._touch()
+        return response
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+
+class AsyncServiceLayer:
+    """
+    One httpx.AsyncClient (HTTP/2 where the server offers it, bounded
+    connections, timeouts) shared by the Service Layer sessions of every
+    company. Create it inside the event loop that uses it:
+
+        async with AsyncServiceLayer() as service_layer:
+            await asyncio.gather(*(
+                SAPClient(code).acreate_grpo(payload, service_layer) for ...
+            ))
+    """
+
+    def __init__(self, max_connections: int = None, timeout: float = None):
+        max_connections = max_connections or settings.SL_ASYNC_MAX_CONNECTIONS
+        self.http = httpx.AsyncClient(
+            http2=True,
+            verify=False,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(timeout or settings.SL_ASYNC_TIMEOUT, connect=10),
+        )
+        self._sessions = {}
+
+    def session(self, sl_config: dict) -> AsyncServiceLayerSession:
+        key = (sl_config["base_url"], sl_config["company_db"], sl_config["username"])
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = AsyncServiceLayerSession(self.http, sl_config)
+        return session
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -1,21 +1,132 @@
+import logging
+import threading
+import time
+
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Log in again this many seconds before SAP would expire the session
+SESSION_EXPIRY_MARGIN = 60
 
 
 class ServiceLayerSession:
+    """
+    Logged-in Service Layer session for ONE company database.
+
+    One instance is shared per company (see get_session). The B1SESSION and
+    ROUTEID cookies live in a pooled keep-alive requests.Session and are reused
+    until they expire; a 401 triggers one transparent re-login and retry.
+    """
 
     def __init__(self, sl_config: dict):
         self.sl = sl_config
+        self.base_url = f"{sl_config['base_url']}/b1s/v2"
+
+        self.http = requests.Session()
+        self.http.verify = False
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.SL_POOL_MAX_SIZE,
+        )
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._session_timeout = settings.SL_SESSION_TIMEOUT * 60
+        self._login_count = 0
 
     def login(self):
-        response = requests.post(
-            f"{self.sl['base_url']}/b1s/v2/Login",
+        response = self.http.post(
+            f"{self.base_url}/Login",
             json={
                 "CompanyDB": self.sl["company_db"],
                 "UserName": self.sl["username"],
                 "Password": self.sl["password"],
             },
             timeout=10,
-            verify=False
         )
         response.raise_for_status()
+
+        try:
+            timeout_minutes = int(response.json().get("SessionTimeout", settings.SL_SESSION_TIMEOUT))
+        except (ValueError, TypeError, AttributeError):
+            timeout_minutes = settings.SL_SESSION_TIMEOUT
+        self._session_timeout = timeout_minutes * 60
+        self._touch()
+        self._login_count += 1
+        logger.info(f"Logged in to SAP Service Layer for {self.sl['company_db']}")
         return response.cookies
+
+    def _touch(self):
+        # Service Layer sessions expire after SessionTimeout minutes of inactivity
+        self._expires_at = time.monotonic() + self._session_timeout - SESSION_EXPIRY_MARGIN
+
+    def _ensure_login(self) -> int:
+        """Log in if the session is missing or expired; returns the login generation used."""
+        if time.monotonic() < self._expires_at:
+            return self._login_count
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self.login()
+            return self._login_count
+
+    def _relogin(self, stale_generation: int):
+        with self._lock:
+            # Another thread may already have logged in again
+            if self._login_count == stale_generation:
+                self._expires_at = 0.0
+                self.login()
+
+    def request(self, method: str, path: str, timeout: float = 30, **kwargs) -> requests.Response:
+        """
+        Send a request to ``/b1s/v2/<path>`` on the shared session.
+        Login failures raise requests.exceptions.HTTPError.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        generation = self._ensure_login()
+        response = self.http.request(method, url, timeout=timeout, **kwargs)
+
+        if response.status_code == 401:
+            logger.info(f"SAP Service Layer session expired for {self.sl['company_db']}; logging in again")
+            self._relogin(generation)
+            response = self.http.request(method, url, timeout=timeout, **kwargs)
+
+        if response.status_code != 401:
+            self._touch()
+        return response
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(sl_config: dict) -> ServiceLayerSession:
+    """Return the shared Service Layer session for a company database."""
+    key = (sl_config["base_url"], sl_config["company_db"], sl_config["username"])
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = ServiceLayerSession(sl_config)
+                _sessions[key] = session
+    return session
+
+
+def reset_sessions():
+    """Drop all shared sessions (next call logs in again)."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.http.close()
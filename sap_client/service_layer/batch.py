@@ -0,0 +1,187 @@
+"""
+OData $batch (multipart/mixed) helpers for the SAP Service Layer.
+
+Every operation is wrapped in its own changeset, so SAP commits or rolls back
+each document independently, and is numbered with a Content-ID (1, 2, ...)
+that SAP echoes in its response. Requests are sent with
+"Prefer: odata.continue-on-error" (BATCH_PREFER); without it SAP stops at
+the first failed changeset and leaves the rest unanswered.
+
+parse_batch_request / build_batch_response are the server side of the same
+format, used by the local SAP stand-in (sap_client.standin).
+"""
+import json
+import re
+import uuid
+from typing import List, Optional, Tuple
+
+BASE_PATH = "/b1s/v2"
+
+# Keep processing the changesets after a failed one
+BATCH_PREFER = "odata.continue-on-error"
+
+_BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+
+
+def new_boundary(prefix: str = "batch") -> str:
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+
+def build_batch_body(operations: List[Tuple[str, str, Optional[dict]]], boundary: str) -> str:
+    """
+    Build a $batch request body.
+
+    Args:
+        operations: (method, entity path, json body) per operation,
+            e.g. ("POST", "PurchaseDeliveryNotes", {...})
+        boundary: batch boundary, also used in the request Content-Type
+    """
+    lines = []
+    for index, (method, path, body) in enumerate(operations, start=1):
+        changeset = new_boundary("changeset")
+        lines += [
+            f"--{boundary}",
+            f"Content-Type: multipart/mixed;boundary={changeset}",
+            "",
+            f"--{changeset}",
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            f"Content-ID: {index}",
+            "",
+            f"{method} {BASE_PATH}/{path.lstrip('/')}",
+            "Content-Type: application/json",
+            "",
+            json.dumps(body) if body is not None else "",
+            "",
+            f"--{changeset}--",
+        ]
+    lines.append(f"--{boundary}--")
+    lines.append("")
+    return "\r\n".join(lines)
+
+
+def build_batch_response(results: List[Tuple[int, str, Optional[dict]]], boundary: str) -> str:
+    """
+    Build a $batch response body.
+
+    Args:
+        results: (status code, reason, json body) per operation, in request order
+        boundary: batch boundary, also used in the response Content-Type
+    """
+    lines = []
+    for index, (status_code, reason, body) in enumerate(results, start=1):
+        changeset = new_boundary("changesetresponse")
+        lines += [
+            f"--{boundary}",
+            f"Content-Type: multipart/mixed;boundary={changeset}",
+            "",
+            f"--{changeset}",
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            f"Content-ID: {index}",
+            "",
+            f"HTTP/1.1 {status_code} {reason}",
+            "Content-Type: application/json;odata.metadata=minimal;charset=utf-8",
+            "",
+            json.dumps(body) if body is not None else "",
+            f"--{changeset}--",
+        ]
+    lines.append(f"--{boundary}--")
+    lines.append("")
+    return "\r\n".join(lines)
+
+
+def get_boundary(content_type: str) -> Optional[str]:
+    match = _BOUNDARY_RE.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def _split_parts(body: str, boundary: str) -> List[str]:
+    parts = []
+    for chunk in body.split(f"--{boundary}")[1:]:
+        if chunk.startswith("--"):
+            break
+        parts.append(chunk.lstrip("\n"))
+    return parts
+
+
+def _split_headers(block: str) -> Tuple[dict, str]:
+    """Split a MIME block into (lower-cased headers, content)."""
+    head, _, content = block.partition("\n\n")
+    headers = {}
+    for line in head.split("\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return headers, content
+
+
+def _parse_http_part(content: str) -> dict:
+    status_line, _, rest = content.strip("\n").partition("\n")
+    try:
+        status_code = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        status_code = 0
+    _, payload = _split_headers(rest)
+    payload = payload.strip()
+    try:
+        data = json.loads(payload) if payload else None
+    except ValueError:
+        data = None
+    return {"status_code": status_code, "data": data, "text": payload}
+
+
+def _parse_request_part(content: str) -> Tuple[str, str, Optional[dict]]:
+    request_line, _, rest = content.strip("\n").partition("\n")
+    method, _, path = request_line.strip().partition(" ")
+    path = path.split(" ")[0]
+    if path.startswith(BASE_PATH):
+        path = path[len(BASE_PATH):]
+    _, payload = _split_headers(rest)
+    payload = payload.strip()
+    try:
+        body = json.loads(payload) if payload else None
+    except ValueError:
+        body = None
+    return method.upper(), path.lstrip("/"), body
+
+
+def parse_batch_request(content_type: str, body: str) -> List[Tuple[str, str, Optional[dict]]]:
+    """Parse a $batch request into (method, entity path, json body) per operation."""
+    boundary = get_boundary(content_type)
+    if not boundary:
+        return []
+
+    operations = []
+    for part in _split_parts(body.replace("\r\n", "\n"), boundary):
+        headers, content = _split_headers(part)
+        part_type = headers.get("content-type", "")
+        if part_type.lower().startswith("multipart/mixed"):
+            operations.extend(parse_batch_request(part_type, content))
+        else:
+            operations.append(_parse_request_part(content))
+    return operations
+
+
+def parse_batch_response(content_type: str, body: str) -> List[dict]:
+    """
+    Parse a $batch response into one dict per operation response, in the
+    order SAP returned them:
+    {"status_code": int, "data": parsed JSON or None, "text": raw body,
+     "content_id": the part's Content-ID or None}
+    """
+    boundary = get_boundary(content_type)
+    if not boundary:
+        return []
+
+    results = []
+    for part in _split_parts(body.replace("\r\n", "\n"), boundary):
+        headers, content = _split_headers(part)
+        part_type = headers.get("content-type", "")
+        if part_type.lower().startswith("multipart/mixed"):
+            results.extend(parse_batch_response(part_type, content))
+        else:
+            result = _parse_http_part(content)
+            result["content_id"] = headers.get("content-id")
+            results.append(result)
+    return results
@@ -1,9 +1,15 @@
 import logging
+
+import httpx
 import requests
 from decimal import Decimal
+from typing import List
 
 from ..exceptions import SAPConnectionError, SAPDataError, SAPValidationError
-from .auth import ServiceLayerSession
+from ..metrics import annotate, traced
+from .async_client import AsyncServiceLayer
+from .auth import get_session
+from .batch import BATCH_PREFER, build_batch_body, new_boundary, parse_batch_response
 
 logger = logging.getLogger(__name__)
 
@@ -19,28 +25,25 @@ def _convert_decimals(obj):
     return obj
 
 
+def _payload_sizes(response) -> dict:
+    """Request / response body sizes for tracing"""
+    request = response.request
+    body = getattr(request, "body", None)  # requests
+    if body is None:
+        body = getattr(request, "content", None)  # httpx
+    body = body or b""
+    return {"request_bytes": len(body), "response_bytes": len(response.content or b"")}
+
+
 class GRPOWriter:
     """Goods Receipt PO Writer for SAP Service Layer"""
 
     def __init__(self, context):
         self.context = context
+        self.company_code = context.company_code
         self.sl_config = context.service_layer
 
-    def _get_session_cookies(self):
-        """Get authenticated session cookies from Service Layer"""
-        try:
-            session = ServiceLayerSession(self.sl_config)
-            return session.login()
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Failed to connect to SAP Service Layer: {e}")
-            raise SAPConnectionError("Unable to connect to SAP Service Layer")
-        except requests.exceptions.Timeout as e:
-            logger.error(f"SAP Service Layer connection timeout: {e}")
-            raise SAPConnectionError("SAP Service Layer connection timeout")
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"SAP Service Layer authentication failed: {e}")
-            raise SAPConnectionError("SAP Service Layer authentication failed")
-
+    @traced("service_layer", "create_grpo")
     def create(self, payload: dict) -> dict:
         """
         Create GRPO (Purchase Delivery Note) in SAP Business One
@@ -60,9 +63,7 @@ class GRPOWriter:
         Returns:
             dict: Created GRPO document response from SAP
         """
-        cookies = self._get_session_cookies()
-
-        url = f"{self.sl_config['base_url']}/b1s/v2/PurchaseDeliveryNotes"
+        session = get_session(self.sl_config)
 
         # Convert Decimal objects to float for JSON serialization
         payload = _convert_decimals(payload)
@@ -72,33 +73,14 @@ class GRPOWriter:
         }
 
         try:
-            response = requests.post(
-                url,
+            response = session.post(
+                "PurchaseDeliveryNotes",
                 json=payload,
-                cookies=cookies,
                 headers=headers,
                 timeout=30,
-                verify=False
             )
-
-            if response.status_code == 201:
-                logger.info(f"GRPO created successfully: {response.json().get('DocNum')}")
-                return response.json()
-
-            # Handle SAP error responses
-            if response.status_code == 400:
-                error_msg = self._extract_error_message(response)
-                logger.error(f"SAP validation error: {error_msg}")
-                raise SAPValidationError(error_msg)
-
-            if response.status_code in (401, 403):
-                logger.error("SAP authentication/authorization error")
-                raise SAPConnectionError("SAP authentication failed")
-
-            # Other errors
-            error_msg = self._extract_error_message(response)
-            logger.error(f"SAP error creating GRPO: {error_msg}")
-            raise SAPDataError(f"Failed to create GRPO: {error_msg}")
+            annotate(**_payload_sizes(response))
+            return self._parse_create_response(response)
 
         except requests.exceptions.ConnectionError as e:
             logger.error(f"Connection error while creating GRPO: {e}")
@@ -106,12 +88,150 @@ class GRPOWriter:
         except requests.exceptions.Timeout as e:
             logger.error(f"Timeout while creating GRPO: {e}")
             raise SAPConnectionError("SAP Service Layer request timeout")
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"SAP Service Layer authentication failed: {e}")
+            raise SAPConnectionError("SAP Service Layer authentication failed")
         except (SAPConnectionError, SAPDataError, SAPValidationError):
             raise
         except Exception as e:
             logger.error(f"Unexpected error creating GRPO: {e}")
             raise SAPDataError(f"Unexpected error: {str(e)}")
 
+    @traced("service_layer", "create_grpo_batch")
+    def create_batch(self, payloads: List[dict]) -> List[dict]:
+        """
+        Create several GRPOs in ONE Service Layer $batch round trip.
+
+        Each document is sent in its own changeset, so a rejected document
+        does not roll back the others, and SAP is asked to continue after
+        one fails.
+
+        Args:
+            payloads: list of GRPO payloads (same shape as create())
+
+        Returns:
+            list: one result per payload, in the same order:
+                {"success": True, "data": <created document>}
+                {"success": False, "status_code": int, "error": str}
+                {"success": False, "status_code": None, "error": str, "missing": True}
+            The last form is a document SAP sent no response for. It may
+            or may not have been created, so retry it (the retry looks it
+            up by idempotency key first).
+        """
+        if not payloads:
+            return []
+
+        session = get_session(self.sl_config)
+        boundary = new_boundary()
+        body = build_batch_body(
+            [("POST", "PurchaseDeliveryNotes", _convert_decimals(payload)) for payload in payloads],
+            boundary,
+        )
+
+        try:
+            response = session.post(
+                "$batch",
+                data=body.encode("utf-8"),
+                headers={
+                    "Content-Type": f"multipart/mixed;boundary={boundary}",
+                    "Prefer": BATCH_PREFER,
+                },
+                timeout=max(30, 10 * len(payloads)),
+            )
+        except requests.exceptions.ConnectionError as e:
+            logger.error(f"Connection error while creating GRPO batch: {e}")
+            raise SAPConnectionError("Unable to connect to SAP Service Layer")
+        except requests.exceptions.Timeout as e:
+            logger.error(f"Timeout while creating GRPO batch: {e}")
+            raise SAPConnectionError("SAP Service Layer request timeout")
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"SAP Service Layer authentication failed: {e}")
+            raise SAPConnectionError("SAP Service Layer authentication failed")
+
+        annotate(**_payload_sizes(response))
+        return self._parse_batch_response(response, len(payloads))
+
+    def _parse_create_response(self, response) -> dict:
+        """Created document, or the SAP error mapped to our exceptions"""
+        if response.status_code == 201:
+            logger.info(f"GRPO created successfully: {response.json().get('DocNum')}")
+            return response.json()
+
+        # Handle SAP error responses
+        if response.status_code == 400:
+            error_msg = self._extract_error_message(response)
+            logger.error(f"SAP validation error: {error_msg}")
+            raise SAPValidationError(error_msg)
+
+        if response.status_code in (401, 403):
+            logger.error("SAP authentication/authorization error")
+            raise SAPConnectionError("SAP authentication failed")
+
+        # Other errors
+        error_msg = self._extract_error_message(response)
+        logger.error(f"SAP error creating GRPO: {error_msg}")
+        raise SAPDataError(f"Failed to create GRPO: {error_msg}")
+
+    def _parse_batch_response(self, response, count: int) -> List[dict]:
+        """One result per document of a $batch response (see create_batch)"""
+        if response.status_code in (401, 403):
+            logger.error("SAP authentication/authorization error")
+            raise SAPConnectionError("SAP authentication failed")
+
+        if response.status_code not in (200, 202):
+            error_msg = self._extract_error_message(response)
+            logger.error(f"SAP error creating GRPO batch: {error_msg}")
+            raise SAPDataError(f"Failed to create GRPO batch: {error_msg}")
+
+        parts = parse_batch_response(response.headers.get("Content-Type", ""), response.text)
+
+        # Content-ID n answers the n-th document (build_batch_body); a part
+        # without one is taken by its position
+        by_index = {}
+        for position, part in enumerate(parts):
+            content_id = (part.get("content_id") or "").strip()
+            index = int(content_id) - 1 if content_id.isdigit() else position
+            if 0 <= index < count and index not in by_index:
+                by_index[index] = part
+            else:
+                logger.warning(f"Ignoring unexpected SAP $batch response part {content_id or position + 1}")
+        if len(by_index) < count:
+            logger.error(f"SAP $batch returned {len(by_index)} responses for {count} GRPOs")
+
+        results = []
+        for index in range(count):
+            part = by_index.get(index)
+            if part is None:
+                results.append({
+                    "success": False,
+                    "status_code": None,
+                    "error": "No response from SAP for this GRPO, retry it",
+                    "missing": True,
+                })
+                continue
+
+            if part["status_code"] == 201 and isinstance(part["data"], dict):
+                logger.info(f"GRPO created successfully: {part['data'].get('DocNum')}")
+                results.append({"success": True, "data": part["data"]})
+                continue
+
+            error_msg = self._extract_batch_error(part)
+            logger.error(f"SAP error creating GRPO in batch: {error_msg}")
+            results.append({
+                "success": False,
+                "status_code": part["status_code"],
+                "error": error_msg,
+            })
+
+        return results
+
+    def _extract_batch_error(self, part: dict) -> str:
+        """Extract error message from one $batch operation response"""
+        data = part.get("data")
+        if isinstance(data, dict) and "error" in data:
+            return data["error"].get("message", {}).get("value", str(data))
+        return part.get("text") or f"HTTP {part.get('status_code')}"
+
     def _extract_error_message(self, response) -> str:
         """Extract error message from SAP response"""
         try:
@@ -121,3 +241,80 @@ class GRPOWriter:
             return str(error_data)
         except Exception:
             return response.text or f"HTTP {response.status_code}"
+
+
+class AsyncGRPOWriter(GRPOWriter):
+    """
+    GRPOWriter for asyncio callers: same payloads, results and exceptions,
+    sent over a shared AsyncServiceLayer (httpx, HTTP/2) so one worker can
+    keep many postings in flight.
+    """
+
+    def __init__(self, context, service_layer: AsyncServiceLayer):
+        super().__init__(context)
+        self.service_layer = service_layer
+
+    @traced("service_layer", "create_grpo")
+    async def acreate(self, payload: dict) -> dict:
+        """Async create(); see GRPOWriter.create"""
+        session = self.service_layer.session(self.sl_config)
+        try:
+            response = await session.post(
+                "PurchaseDeliveryNotes",
+                json=_convert_decimals(payload),
+                timeout=30,
+            )
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout while creating GRPO: {e}")
+            raise SAPConnectionError("SAP Service Layer request timeout")
+        except httpx.TransportError as e:
+            logger.error(f"Connection error while creating GRPO: {e}")
+            raise SAPConnectionError("Unable to connect to SAP Service Layer")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"SAP Service Layer authentication failed: {e}")
+            raise SAPConnectionError("SAP Service Layer authentication failed")
+
+        annotate(**_payload_sizes(response))
+        try:
+            return self._parse_create_response(response)
+        except (SAPConnectionError, SAPDataError, SAPValidationError):
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error creating GRPO: {e}")
+            raise SAPDataError(f"Unexpected error: {str(e)}")
+
+    @traced("service_layer", "create_grpo_batch")
+    async def acreate_batch(self, payloads: List[dict]) -> List[dict]:
+        """Async create_batch(); see GRPOWriter.create_batch"""
+        if not payloads:
+            return []
+
+        session = self.service_layer.session(self.sl_config)
+        boundary = new_boundary()
+        body = build_batch_body(
+            [("POST", "PurchaseDeliveryNotes", _convert_decimals(payload)) for payload in payloads],
+            boundary,
+        )
+
+        try:
+            response = await session.post(
+                "$batch",
+                content=body.encode("utf-8"),
+                headers={
+                    "Content-Type": f"multipart/mixed;boundary={boundary}",
+                    "Prefer": BATCH_PREFER,
+                },
+                timeout=max(30, 10 * len(payloads)),
+            )
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout while creating GRPO batch: {e}")
+            raise SAPConnectionError("SAP Service Layer request timeout")
+        except httpx.TransportError as e:
+            logger.error(f"Connection error while creating GRPO batch: {e}")
+            raise SAPConnectionError("Unable to connect to SAP Service Layer")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"SAP Service Layer authentication failed: {e}")
+            raise SAPConnectionError("SAP Service Layer authentication failed")
+
+        annotate(**_payload_sizes(response))
+        return self._parse_batch_response(response, len(payloads))
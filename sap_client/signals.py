@@ -0,0 +1,16 @@
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.dispatch import receiver
+
+from .metrics import recorder
+
+
+@receiver(request_finished)
+def flush_sap_metrics(sender, **kwargs):
+    """
+    Write SAP call samples buffered during this and earlier requests, from
+    the request thread. Django's own request_finished handler has already
+    run, so connections opened by the flush are closed here.
+    """
+    if recorder.flush_if_due():
+        close_old_connections()
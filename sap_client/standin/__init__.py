@@ -0,0 +1,9 @@
+"""
+Local SAP stand-in for load testing the SAP-bound code paths.
+
+    hana.py           SQLite-backed fake HANA driver (OPOR/POR1/OCRD/OWHS)
+    service_layer.py  fake Service Layer HTTP server (Login, GRPO, $batch)
+
+Set SAP_STANDIN_ENABLED=True to point COMPANY_SAP_REGISTRY at it; see
+sap_client/README.md.
+"""
@@ -0,0 +1,294 @@
+"""
+Fake SAP HANA backend (SQLite) for the local SAP stand-in.
+
+Each company schema is one SQLite file, <SAP_STANDIN_DATA_DIR>/<schema>.sqlite3,
+holding the OPOR/POR1/OCRD/OWHS columns the HANA readers select plus the
+OPDN/PDN1 documents written by the stand-in Service Layer. The file is
+ATTACHed under the schema name, so the readers' "<schema>"."OPOR" SQL runs
+unchanged. Errors are raised as hdbcli dbapi errors so the readers' error
+handling is exercised as well.
+"""
+import logging
+import random
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from hdbcli import dbapi
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS "OCRD" (
+        "CardCode"   TEXT PRIMARY KEY,
+        "CardName"   TEXT NOT NULL,
+        "CardType"   TEXT NOT NULL DEFAULT 'S',
+        "frozenFor"  TEXT NOT NULL DEFAULT 'N',
+        "UpdateDate" TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "OWHS" (
+        "WhsCode"    TEXT PRIMARY KEY,
+        "WhsName"    TEXT NOT NULL,
+        "Inactive"   TEXT NOT NULL DEFAULT 'N',
+        "UpdateDate" TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "OPOR" (
+        "DocEntry"   INTEGER PRIMARY KEY,
+        "DocNum"     INTEGER NOT NULL UNIQUE,
+        "CardCode"   TEXT NOT NULL,
+        "CardName"   TEXT NOT NULL,
+        "DocDate"    TEXT,
+        "DocStatus"  TEXT NOT NULL DEFAULT 'O',
+        "UpdateDate" TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "POR1" (
+        "DocEntry"   INTEGER NOT NULL,
+        "LineNum"    INTEGER NOT NULL,
+        "ItemCode"   TEXT NOT NULL,
+        "Dscription" TEXT,
+        "Quantity"   REAL NOT NULL,
+        "OpenQty"    REAL NOT NULL,
+        "unitMsr"    TEXT,
+        "Price"      REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY ("DocEntry", "LineNum")
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "OPOR_CardCode" ON "OPOR" ("CardCode")',
+    """
+    CREATE TABLE IF NOT EXISTS "OPDN" (
+        "DocEntry"   INTEGER PRIMARY KEY,
+        "DocNum"     INTEGER NOT NULL UNIQUE,
+        "CardCode"   TEXT NOT NULL,
+        "CardName"   TEXT,
+        "DocDate"    TEXT,
+        "DocTotal"   REAL NOT NULL DEFAULT 0,
+        "Comments"   TEXT,
+        "BPLId"      INTEGER,
+        "CANCELED"   TEXT NOT NULL DEFAULT 'N',
+        "CreateDate" TEXT,
+        "U_GRPO_KEY" TEXT
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "OPDN_U_GRPO_KEY" ON "OPDN" ("U_GRPO_KEY")',
+    """
+    CREATE TABLE IF NOT EXISTS "PDN1" (
+        "DocEntry"   INTEGER NOT NULL,
+        "LineNum"    INTEGER NOT NULL,
+        "ItemCode"   TEXT NOT NULL,
+        "Dscription" TEXT,
+        "Quantity"   REAL NOT NULL,
+        "WhsCode"    TEXT,
+        "Price"      REAL NOT NULL DEFAULT 0,
+        "BaseType"   INTEGER,
+        "BaseEntry"  INTEGER,
+        "BaseLine"   INTEGER,
+        PRIMARY KEY ("DocEntry", "LineNum")
+    )
+    """,
+]
+
+UOMS = ["KG", "LTR", "NOS", "MT"]
+
+
+def data_dir() -> Path:
+    return Path(settings.SAP_STANDIN_DATA_DIR)
+
+
+def schema_path(schema: str) -> Path:
+    return data_dir() / f"{schema}.sqlite3"
+
+
+def open_schema(schema: str) -> sqlite3.Connection:
+    """Plain sqlite3 connection to a schema file (tables unqualified)."""
+    path = schema_path(schema)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No stand-in data for schema {schema}; run `manage.py seed_sap_standin`"
+        )
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def seed(
+    schema: str,
+    suppliers: int = 50,
+    pos_per_supplier: int = 5,
+    lines_per_po: int = 4,
+    warehouses: int = 10,
+    items: int = 200,
+    random_seed=None,
+) -> dict:
+    """
+    (Re)create a schema file with a generated dataset.
+    About 10% of PO lines are fully received (OpenQty 0) and 5% of
+    suppliers are frozen, so the readers' filters have something to skip.
+    """
+    rng = random.Random(random_seed)
+    data_dir().mkdir(parents=True, exist_ok=True)
+    path = schema_path(schema)
+    if path.exists():
+        path.unlink()
+
+    conn = sqlite3.connect(str(path))
+    try:
+        for statement in SCHEMA_SQL:
+            conn.execute(statement)
+
+        today = date.today()
+        conn.executemany(
+            'INSERT INTO "OCRD" VALUES (?, ?, ?, ?, ?)',
+            [
+                (
+                    f"V{n:05d}",
+                    f"Stand-in Supplier {n}",
+                    "S",
+                    "Y" if rng.random() < 0.05 else "N",
+                    (today - timedelta(days=rng.randint(0, 365))).isoformat(),
+                )
+                for n in range(1, suppliers + 1)
+            ],
+        )
+        conn.executemany(
+            'INSERT INTO "OWHS" VALUES (?, ?, ?, ?)',
+            [
+                (f"WH{n:03d}", f"Stand-in Warehouse {n}", "N", today.isoformat())
+                for n in range(1, warehouses + 1)
+            ],
+        )
+
+        po_rows = []
+        line_rows = []
+        doc_entry = 0
+        for supplier in range(1, suppliers + 1):
+            for _ in range(pos_per_supplier):
+                doc_entry += 1
+                doc_date = (today - timedelta(days=rng.randint(0, 90))).isoformat()
+                po_rows.append((
+                    doc_entry, 100000 + doc_entry, f"V{supplier:05d}",
+                    f"Stand-in Supplier {supplier}", doc_date, "O", doc_date,
+                ))
+                for line_num in range(lines_per_po):
+                    item = rng.randint(1, items)
+                    quantity = float(rng.randint(10, 1000))
+                    roll = rng.random()
+                    if roll < 0.1:
+                        open_qty = 0.0
+                    elif roll < 0.4:
+                        open_qty = float(rng.randint(1, int(quantity)))
+                    else:
+                        open_qty = quantity
+                    line_rows.append((
+                        doc_entry, line_num, f"RM{item:05d}", f"Raw Material {item}",
+                        quantity, open_qty, rng.choice(UOMS), round(rng.uniform(5, 500), 2),
+                    ))
+
+        conn.executemany('INSERT INTO "OPOR" VALUES (?, ?, ?, ?, ?, ?, ?)', po_rows)
+        conn.executemany('INSERT INTO "POR1" VALUES (?, ?, ?, ?, ?, ?, ?, ?)', line_rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        "schema": schema,
+        "path": str(path),
+        "suppliers": suppliers,
+        "warehouses": warehouses,
+        "purchase_orders": len(po_rows),
+        "po_lines": len(line_rows),
+    }
+
+
+def _inject_faults(action: str):
+    latency_ms = settings.SAP_STANDIN_HANA_LATENCY_MS
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+    if settings.SAP_STANDIN_HANA_ERROR_RATE > 0 and random.random() < settings.SAP_STANDIN_HANA_ERROR_RATE:
+        raise dbapi.OperationalError(-10709, f"Stand-in injected failure during {action}")
+
+
+class StandinCursor:
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def execute(self, query: str, params=()):
+        _inject_faults("execute")
+        try:
+            self._cursor.execute(query, tuple(params or ()))
+        except sqlite3.OperationalError as e:
+            # Bad SQL / unknown table: the readers map this to a query error
+            raise dbapi.ProgrammingError(257, str(e)) from e
+        except sqlite3.Error as e:
+            raise dbapi.DatabaseError(-1, str(e)) from e
+        return True
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int = 1):
+        return self._cursor.fetchmany(size)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandinConnection:
+    """Just enough of hdbcli's Connection for the HANA readers and the pool."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._lock = threading.Lock()
+        self._open = True
+
+    def cursor(self) -> StandinCursor:
+        if not self._open:
+            raise dbapi.OperationalError(-10807, "Connection is closed")
+        return StandinCursor(self._conn.cursor())
+
+    def isconnected(self) -> bool:
+        return self._open
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        with self._lock:
+            if self._open:
+                self._open = False
+                self._conn.close()
+
+
+def connect(hana_config: dict) -> StandinConnection:
+    """Open a stand-in connection with the company schema attached."""
+    _inject_faults("connect")
+    schema = hana_config["schema"]
+    path = schema_path(schema)
+    if not path.exists():
+        raise dbapi.OperationalError(
+            -10709, f"Stand-in schema {schema} not found; run `manage.py seed_sap_standin`"
+        )
+
+    conn = sqlite3.connect(":memory:", timeout=30, check_same_thread=False)
+    conn.execute("ATTACH DATABASE ? AS ?", (str(path), schema))
+    return StandinConnection(conn)
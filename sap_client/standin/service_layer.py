@@ -0,0 +1,317 @@
+"""
+Fake SAP Service Layer HTTP server for the local SAP stand-in.
+
+Implements just what GRPOWriter and ServiceLayerSession use:
+
+    POST /b1s/v2/Login
+    POST /b1s/v2/Logout
+    POST /b1s/v2/PurchaseDeliveryNotes
+    POST /b1s/v2/$batch
+
+Documents are written to the OPDN/PDN1 tables of the stand-in HANA schema
+files, and lines with BaseEntry/BaseLine reduce the PO line's OpenQty and
+touch the PO's UpdateDate (closing it when nothing is open), so open PO
+reads and snapshot syncs see the postings. The U_GRPO_KEY user field is
+stored too (GRPO_IDEMPOTENCY_FIELD=U_GRPO_KEY). Latency, HTTP 500 errors
+and dropped connections can be injected per request.
+"""
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..service_layer.batch import (
+    build_batch_response,
+    new_boundary,
+    parse_batch_request,
+)
+from . import hana
+
+logger = logging.getLogger(__name__)
+
+BASE_PATH = "/b1s/v2/"
+
+
+def sap_error(code: int, message: str) -> dict:
+    return {"error": {"code": code, "message": {"lang": "en-us", "value": message}}}
+
+
+class StandinServiceLayer(ThreadingHTTPServer):
+    """Threaded stand-in server; one instance serves every company schema."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        session_timeout: int = 30,
+    ):
+        super().__init__(server_address, StandinRequestHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.session_timeout = session_timeout
+
+        self.sessions = {}  # B1SESSION -> company db (schema)
+        self.sessions_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+        self.request_count = 0
+        self.login_count = 0
+        self.documents_created = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # ---- Documents ----
+    def create_delivery_note(self, schema: str, payload) -> tuple:
+        """Validate and store one GRPO. Returns (status code, reason, body)."""
+        if not isinstance(payload, dict):
+            return 400, "Bad Request", sap_error(-1000, "Invalid JSON payload")
+
+        card_code = payload.get("CardCode")
+        lines = payload.get("DocumentLines") or []
+        if not card_code:
+            return 400, "Bad Request", sap_error(-5002, "Business partner (CardCode) is missing")
+        if not lines:
+            return 400, "Bad Request", sap_error(-5002, "Document has no lines")
+
+        with self.write_lock:
+            conn = hana.open_schema(schema)
+            try:
+                partner = conn.execute(
+                    'SELECT "CardName" FROM "OCRD" WHERE "CardCode" = ? AND "CardType" = \'S\'',
+                    (card_code,),
+                ).fetchone()
+                if partner is None:
+                    return 400, "Bad Request", sap_error(
+                        -2028, f"No matching records found for business partner '{card_code}'"
+                    )
+
+                line_rows = []
+                doc_total = 0.0
+                for line_num, line in enumerate(lines):
+                    item_code = line.get("ItemCode")
+                    try:
+                        quantity = float(line.get("Quantity", 0))
+                    except (TypeError, ValueError):
+                        quantity = 0
+                    if not item_code or quantity <= 0:
+                        conn.rollback()
+                        return 400, "Bad Request", sap_error(
+                            -5002, f"Line {line_num + 1}: ItemCode and a positive Quantity are required"
+                        )
+
+                    price = float(line.get("UnitPrice") or 0)
+                    base_entry = line.get("BaseEntry")
+                    base_line = line.get("BaseLine")
+                    if base_entry is not None and base_line is not None:
+                        po_line = conn.execute(
+                            'SELECT "OpenQty", "Price" FROM "POR1" WHERE "DocEntry" = ? AND "LineNum" = ?',
+                            (base_entry, base_line),
+                        ).fetchone()
+                        if po_line is None or po_line[0] < quantity:
+                            conn.rollback()
+                            return 400, "Bad Request", sap_error(
+                                -10, f"Line {line_num + 1}: quantity exceeds open quantity of base document"
+                            )
+                        price = price or po_line[1]
+                        conn.execute(
+                            'UPDATE "POR1" SET "OpenQty" = "OpenQty" - ? WHERE "DocEntry" = ? AND "LineNum" = ?',
+                            (quantity, base_entry, base_line),
+                        )
+                        # Like SAP: the base PO is updated, and closed once nothing is open
+                        conn.execute(
+                            'UPDATE "OPOR" SET "UpdateDate" = ?, "DocStatus" = CASE WHEN EXISTS ('
+                            'SELECT 1 FROM "POR1" WHERE "DocEntry" = ? AND "OpenQty" > 0'
+                            ') THEN "DocStatus" ELSE \'C\' END WHERE "DocEntry" = ?',
+                            (date.today().isoformat(), base_entry, base_entry),
+                        )
+
+                    doc_total += quantity * price
+                    line_rows.append((
+                        line_num, item_code, line.get("ItemDescription"), quantity,
+                        line.get("WarehouseCode"), price,
+                        line.get("BaseType"), base_entry, base_line,
+                    ))
+
+                next_entry = conn.execute('SELECT COALESCE(MAX("DocEntry"), 0) + 1 FROM "OPDN"').fetchone()[0]
+                doc_num = 500000 + next_entry
+                today = date.today().isoformat()
+                conn.execute(
+                    'INSERT INTO "OPDN" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        next_entry, doc_num, card_code, partner[0], today, round(doc_total, 2),
+                        payload.get("Comments"), payload.get("BPL_IDAssignedToInvoice"), "N", today,
+                        payload.get("U_GRPO_KEY"),
+                    ),
+                )
+                conn.executemany(
+                    'INSERT INTO "PDN1" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(next_entry, *row) for row in line_rows],
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+        self.documents_created += 1
+        return 201, "Created", {
+            "DocEntry": next_entry,
+            "DocNum": doc_num,
+            "CardCode": card_code,
+            "CardName": partner[0],
+            "DocDate": today,
+            "DocTotal": round(doc_total, 2),
+            "Comments": payload.get("Comments"),
+            "DocumentLines": [
+                {"LineNum": row[0], "ItemCode": row[1], "Quantity": row[3], "WarehouseCode": row[4]}
+                for row in line_rows
+            ],
+        }
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real Service Layer
+    server: StandinServiceLayer
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    # ---- Helpers ----
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status_code: int, body=None, content_type: str = "application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            data = json.dumps(body).encode("utf-8")
+        elif isinstance(body, str):
+            data = body.encode("utf-8")
+        else:
+            data = body or b""
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or []):
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _session_schema(self):
+        cookies = {}
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            cookies[name] = value
+        with self.server.sessions_lock:
+            return self.server.sessions.get(cookies.get("B1SESSION"))
+
+    def _inject_faults(self) -> bool:
+        """Apply latency / faults. Returns False when the request was dropped."""
+        server = self.server
+        server.request_count += 1
+        delay = server.latency_ms + (random.uniform(0, server.jitter_ms) if server.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if server.drop_rate and random.random() < server.drop_rate:
+            self.close_connection = True
+            return False
+        if server.error_rate and random.random() < server.error_rate:
+            self._send(500, sap_error(-1, "Stand-in injected internal error"))
+            return False
+        return True
+
+    # ---- Routes ----
+    def do_POST(self):
+        body = self._read_body()
+        if not self._inject_faults():
+            return
+
+        if not self.path.startswith(BASE_PATH):
+            self._send(404, sap_error(-1, f"Resource not found: {self.path}"))
+            return
+        resource = self.path[len(BASE_PATH):].split("?")[0]
+
+        if resource == "Login":
+            self._login(body)
+            return
+
+        schema = self._session_schema()
+        if schema is None:
+            self._send(401, sap_error(301, "Invalid session or session already timeout."))
+            return
+
+        if resource == "Logout":
+            self._send(204)
+        elif resource == "PurchaseDeliveryNotes":
+            try:
+                payload = json.loads(body or b"null")
+            except ValueError:
+                payload = None
+            status_code, _, result = self.server.create_delivery_note(schema, payload)
+            self._send(status_code, result)
+        elif resource == "$batch":
+            self._batch(schema, body)
+        else:
+            self._send(404, sap_error(-1, f"Resource not found: {resource}"))
+
+    def _login(self, body: bytes):
+        try:
+            credentials = json.loads(body or b"{}")
+        except ValueError:
+            credentials = {}
+
+        schema = credentials.get("CompanyDB")
+        if not schema or not hana.schema_path(schema).exists():
+            self._send(401, sap_error(-304, f"Fail to get DB Credentials from SLD for {schema}"))
+            return
+
+        session_id = uuid.uuid4().hex
+        with self.server.sessions_lock:
+            self.server.sessions[session_id] = schema
+        self.server.login_count += 1
+
+        self._send(
+            200,
+            {
+                "odata.metadata": "$metadata#B1Sessions/@Element",
+                "SessionId": session_id,
+                "Version": "1000000",
+                "SessionTimeout": self.server.session_timeout,
+            },
+            headers=[
+                ("Set-Cookie", f"B1SESSION={session_id}; path=/b1s; HttpOnly"),
+                ("Set-Cookie", "ROUTEID=.node1; path=/b1s"),
+            ],
+        )
+
+    def _batch(self, schema: str, body: bytes):
+        operations = parse_batch_request(self.headers.get("Content-Type", ""), body.decode("utf-8"))
+        if not operations:
+            self._send(400, sap_error(-1000, "Invalid $batch request"))
+            return
+
+        results = []
+        for method, path, payload in operations:
+            if method == "POST" and path == "PurchaseDeliveryNotes":
+                results.append(self.server.create_delivery_note(schema, payload))
+            else:
+                results.append((404, "Not Found", sap_error(-1, f"Resource not found: {path}")))
+
+        boundary = new_boundary("batchresponse")
+        self._send(
+            202,
+            build_batch_response(results, boundary),
+            content_type=f"multipart/mixed;boundary={boundary}",
+        )
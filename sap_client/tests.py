@@ -1,13 +1,40 @@
+import asyncio
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
 from company.models import Company, UserCompany, UserRole
-from .serializers import GRPORequestSerializer, GRPOLineRequestSerializer
-from .service_layer.grpo_writer import GRPOWriter
-from .exceptions import SAPConnectionError, SAPValidationError, SAPDataError
+from .serializers import GRPORequestSerializer, GRPOLineRequestSerializer, POSerializer, VendorSerializer
+from .service_layer.async_client import AsyncServiceLayer
+from .service_layer.grpo_writer import AsyncGRPOWriter, GRPOWriter
+from .service_layer.auth import ServiceLayerSession, get_session, reset_sessions
+from .service_layer.batch import build_batch_response
+from .hana.connection import HanaConnectionPool, close_all_pools
+from .hana.grpo_reader import HanaGRPOReader
+from .hana.po_reader import HanaPOReader
+from .hana.vendor_reader import HanaVendorReader
+from .hana.warehouse_reader import HanaWarehouseReader
+from .standin import hana as standin_hana
+from .standin.service_layer import StandinServiceLayer
+from .cache import SingleFlight, TTLCache
+from .circuit_breaker import CircuitBreaker, get_breaker, get_breaker_stats, reset_breakers
+from .client import SAPClient, open_po_cache, read_flights
+from .encoders import pos_data, render_json, rows_data
+from .dtos import PODTO, POItemDTO, POLineDTO, VendorDTO, VendorMasterDTO
+from .exceptions import SAPConnectionError, SAPPoolTimeout, SAPValidationError, SAPDataError
+from .metrics import MetricsRecorder, annotate, latency_summary, traced
+from .master_data import sync_entity
+from .models import OpenPOLine, SAPCallSample, SAPMasterDataSync, SAPVendor
+from .open_po_snapshot import refresh_supplier, sync_open_po_lines
 
 User = get_user_model()
 
@@ -98,15 +125,9 @@ class GRPOWriterTests(TestCase):
         }
         self.writer = GRPOWriter(self.mock_context)
 
-    @patch("sap_client.service_layer.grpo_writer.ServiceLayerSession")
-    @patch("sap_client.service_layer.grpo_writer.requests.post")
-    def test_create_grpo_success(self, mock_post, mock_session_class):
+    @patch("sap_client.service_layer.grpo_writer.get_session")
+    def test_create_grpo_success(self, mock_get_session):
         """Test successful GRPO creation"""
-        # Mock session login
-        mock_session = MagicMock()
-        mock_session.login.return_value = {"session_cookie": "abc123"}
-        mock_session_class.return_value = mock_session
-
         # Mock SAP response
         mock_response = MagicMock()
         mock_response.status_code = 201
@@ -116,7 +137,7 @@ class GRPOWriterTests(TestCase):
             "CardCode": "V001",
             "CardName": "Test Vendor"
         }
-        mock_post.return_value = mock_response
+        mock_get_session.return_value.post.return_value = mock_response
 
         payload = {
             "CardCode": "V001",
@@ -129,16 +150,11 @@ class GRPOWriterTests(TestCase):
 
         self.assertEqual(result["DocEntry"], 123)
         self.assertEqual(result["DocNum"], 456)
-        mock_post.assert_called_once()
+        mock_get_session.return_value.post.assert_called_once()
 
-    @patch("sap_client.service_layer.grpo_writer.ServiceLayerSession")
-    @patch("sap_client.service_layer.grpo_writer.requests.post")
-    def test_create_grpo_validation_error(self, mock_post, mock_session_class):
+    @patch("sap_client.service_layer.grpo_writer.get_session")
+    def test_create_grpo_validation_error(self, mock_get_session):
         """Test GRPO creation with SAP validation error"""
-        mock_session = MagicMock()
-        mock_session.login.return_value = {}
-        mock_session_class.return_value = mock_session
-
         mock_response = MagicMock()
         mock_response.status_code = 400
         mock_response.json.return_value = {
@@ -146,7 +162,7 @@ class GRPOWriterTests(TestCase):
                 "message": {"value": "Item 'INVALID' does not exist"}
             }
         }
-        mock_post.return_value = mock_response
+        mock_get_session.return_value.post.return_value = mock_response
 
         payload = {"CardCode": "V001", "DocumentLines": [{"ItemCode": "INVALID", "Quantity": 1}]}
 
@@ -155,13 +171,22 @@ class GRPOWriterTests(TestCase):
 
         self.assertIn("does not exist", str(context.exception))
 
-    @patch("sap_client.service_layer.grpo_writer.ServiceLayerSession")
-    def test_create_grpo_connection_error(self, mock_session_class):
+    @patch("sap_client.service_layer.grpo_writer.get_session")
+    def test_create_grpo_connection_error(self, mock_get_session):
         """Test GRPO creation with connection error"""
         import requests
-        mock_session = MagicMock()
-        mock_session.login.side_effect = requests.exceptions.ConnectionError("Connection refused")
-        mock_session_class.return_value = mock_session
+        mock_get_session.return_value.post.side_effect = requests.exceptions.ConnectionError("Connection refused")
+
+        payload = {"CardCode": "V001", "DocumentLines": [{"ItemCode": "ITEM001", "Quantity": 1}]}
+
+        with self.assertRaises(SAPConnectionError):
+            self.writer.create(payload)
+
+    @patch("sap_client.service_layer.grpo_writer.get_session")
+    def test_create_grpo_login_failed(self, mock_get_session):
+        """Test GRPO creation when Service Layer login is rejected"""
+        import requests
+        mock_get_session.return_value.post.side_effect = requests.exceptions.HTTPError("401 Unauthorized")
 
         payload = {"CardCode": "V001", "DocumentLines": [{"ItemCode": "ITEM001", "Quantity": 1}]}
 
@@ -169,6 +194,162 @@ class GRPOWriterTests(TestCase):
             self.writer.create(payload)
 
 
+class GRPOWriterBatchTests(TestCase):
+    """Tests for posting several GRPOs through the $batch endpoint"""
+
+    BATCH_RESPONSE = (
+        "--batchresponse_1\r\n"
+        "Content-Type: multipart/mixed;boundary=changesetresponse_a\r\n"
+        "\r\n"
+        "--changesetresponse_a\r\n"
+        "Content-Type: application/http\r\n"
+        "Content-Transfer-Encoding: binary\r\n"
+        "\r\n"
+        "HTTP/1.1 201 Created\r\n"
+        "Content-Type: application/json\r\n"
+        "\r\n"
+        '{"DocEntry": 10, "DocNum": 500, "DocTotal": 99.5}\r\n'
+        "--changesetresponse_a--\r\n"
+        "--batchresponse_1\r\n"
+        "Content-Type: application/http\r\n"
+        "Content-Transfer-Encoding: binary\r\n"
+        "\r\n"
+        "HTTP/1.1 400 Bad Request\r\n"
+        "Content-Type: application/json\r\n"
+        "\r\n"
+        '{"error": {"code": -10, "message": {"lang": "en-us", "value": "Invalid item"}}}\r\n'
+        "--batchresponse_1--\r\n"
+    )
+
+    def setUp(self):
+        self.mock_context = MagicMock()
+        self.mock_context.service_layer = {
+            "base_url": "https://test-server:50000",
+            "company_db": "TEST_DB",
+            "username": "test_user",
+            "password": "test_pass"
+        }
+        self.writer = GRPOWriter(self.mock_context)
+        self.payloads = [
+            {"CardCode": "V001", "DocumentLines": [{"ItemCode": "ITEM001", "Quantity": 1}]},
+            {"CardCode": "V002", "DocumentLines": [{"ItemCode": "BAD", "Quantity": 1}]},
+        ]
+
+    @patch("sap_client.service_layer.grpo_writer.get_session")
+    def test_batch_results_mapped_per_document(self, mock_get_session):
+        """Test one $batch call returns one result per GRPO, in order"""
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        mock_response.headers = {"Content-Type": "multipart/mixed;boundary=batchresponse_1"}
+        mock_response.text = self.BATCH_RESPONSE
+        mock_get_session.return_value.post.return_value = mock_response
+
+        results = self.writer.create_batch(self.payloads)
+
+        mock_get_session.return_value.post.assert_called_once()
+        path = mock_get_session.return_value.post.call_args[0][0]
+        body = mock_get_session.return_value.post.call_args[1]["data"].decode()
+        headers = mock_get_session.return_value.post.call_args[1]["headers"]
+        self.assertEqual(path, "$batch")
+        self.assertEqual(headers["Prefer"], "odata.continue-on-error")
+        self.assertEqual(body.count("POST /b1s/v2/PurchaseDeliveryNotes"), 2)
+
+        self.assertTrue(results[0]["success"])
+        self.assertEqual(results[0]["data"]["DocNum"], 500)
+        self.assertFalse(results[1]["success"])
+        self.assertEqual(results[1]["status_code"], 400)
+        self.assertEqual(results[1]["error"], "Invalid item")
+
+    @patch("sap_client.service_layer.grpo_writer.get_session")
+    def test_short_batch_response_keeps_answered_documents(self, mock_get_session):
+        """Test documents missing from a $batch response are reported for retry, the rest kept"""
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        mock_response.headers = {"Content-Type": "multipart/mixed;boundary=batchresponse_1"}
+        mock_response.text = self.BATCH_RESPONSE
+        mock_get_session.return_value.post.return_value = mock_response
+
+        results = self.writer.create_batch(self.payloads + [{"CardCode": "V003", "DocumentLines": []}])
+
+        self.assertEqual([result["success"] for result in results], [True, False, False])
+        self.assertEqual(results[1]["status_code"], 400)
+        self.assertEqual((results[2]["status_code"], results[2]["missing"]), (None, True))
+
+    @patch("sap_client.service_layer.grpo_writer.get_session")
+    def test_batch_parts_matched_by_content_id(self, mock_get_session):
+        """Test a response part is mapped to its document by Content-ID, not position"""
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        mock_response.headers = {"Content-Type": "multipart/mixed;boundary=batchresponse_2"}
+        mock_response.text = build_batch_response(
+            [(201, "Created", {"DocEntry": 11, "DocNum": 501, "DocTotal": 1})], "batchresponse_2"
+        ).replace("Content-ID: 1", "Content-ID: 2")
+        mock_get_session.return_value.post.return_value = mock_response
+
+        results = self.writer.create_batch(self.payloads)
+
+        self.assertTrue(results[0]["missing"])
+        self.assertEqual(results[1]["data"]["DocNum"], 501)
+
+
+class ServiceLayerSessionTests(TestCase):
+    """Tests for the shared, keep-alive Service Layer session"""
+
+    def setUp(self):
+        self.sl_config = {
+            "base_url": "https://test-server:50000",
+            "company_db": "TEST_DB",
+            "username": "test_user",
+            "password": "test_pass"
+        }
+        self.session = ServiceLayerSession(self.sl_config)
+        self.session.http = MagicMock()
+
+    def _response(self, status_code, body=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.json.return_value = body or {}
+        return response
+
+    def test_login_reused_across_requests(self):
+        """Test the session logs in once and reuses its cookies"""
+        self.session.http.post.return_value = self._response(200, {"SessionTimeout": 30})
+        self.session.http.request.return_value = self._response(201)
+
+        self.session.post("PurchaseDeliveryNotes", json={})
+        self.session.post("PurchaseDeliveryNotes", json={})
+
+        self.session.http.post.assert_called_once()
+        self.assertEqual(self.session.http.request.call_count, 2)
+
+    def test_relogin_on_401(self):
+        """Test an expired session logs in again and retries the call once"""
+        self.session.http.post.return_value = self._response(200, {"SessionTimeout": 30})
+        self.session.http.request.side_effect = [self._response(401), self._response(201)]
+
+        response = self.session.post("PurchaseDeliveryNotes", json={})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.session.http.post.call_count, 2)
+
+    def test_expired_session_logs_in_again(self):
+        """Test the session logs in again once SessionTimeout has passed"""
+        self.session.http.post.return_value = self._response(200, {"SessionTimeout": 30})
+        self.session.http.request.return_value = self._response(201)
+
+        self.session.post("PurchaseDeliveryNotes", json={})
+        with patch("sap_client.service_layer.auth.time.monotonic", return_value=10**9):
+            self.session.post("PurchaseDeliveryNotes", json={})
+
+        self.assertEqual(self.session.http.post.call_count, 2)
+
+    def test_shared_per_company(self):
+        self.assertIs(get_session(self.sl_config), get_session(dict(self.sl_config)))
+        other = dict(self.sl_config, company_db="OTHER_DB")
+        self.assertIsNot(get_session(self.sl_config), get_session(other))
+        reset_sessions()
+
+
 class GRPOAPITests(APITestCase):
     """Integration tests for GRPO API endpoint"""
 
@@ -317,3 +498,1032 @@ class GRPOAPITests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class HanaConnectionPoolTests(TestCase):
+    """Tests for the pooled HANA connections"""
+
+    def setUp(self):
+        self.hana_config = {
+            "host": "hana-test",
+            "port": 30015,
+            "user": "test_user",
+            "password": "test_pass",
+            "schema": "TEST_DB",
+        }
+
+    def _pool(self, **kwargs):
+        options = {"max_size": 2, "idle_timeout": 300, "acquire_timeout": 0.05}
+        options.update(kwargs)
+        return HanaConnectionPool(self.hana_config, **options)
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_connection_reused_after_release(self, mock_connect):
+        """Test a released connection is handed out again instead of reconnecting"""
+        mock_connect.return_value = MagicMock()
+        pool = self._pool()
+
+        conn = pool.acquire()
+        pool.release(conn)
+        again = pool.acquire()
+
+        self.assertIs(conn, again)
+        mock_connect.assert_called_once()
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_unhealthy_connection_replaced_on_checkout(self, mock_connect):
+        """Test a dead idle connection is discarded and a fresh one opened"""
+        dead, fresh = MagicMock(), MagicMock()
+        dead.isconnected.return_value = False
+        mock_connect.side_effect = [dead, fresh]
+        pool = self._pool()
+
+        pool.release(pool.acquire())
+        conn = pool.acquire()
+
+        self.assertIs(conn, fresh)
+        dead.close.assert_called_once()
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_idle_connection_recycled(self, mock_connect):
+        """Test connections idle past the timeout are closed rather than reused"""
+        old, new = MagicMock(), MagicMock()
+        mock_connect.side_effect = [old, new]
+        pool = self._pool(idle_timeout=0)
+
+        pool.release(pool.acquire())
+        conn = pool.acquire()
+
+        self.assertIs(conn, new)
+        old.close.assert_called_once()
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_pool_size_capped(self, mock_connect):
+        """Test checkout fails fast with SAPConnectionError when the pool is exhausted"""
+        mock_connect.side_effect = lambda **kwargs: MagicMock()
+        pool = self._pool()
+
+        pool.acquire()
+        pool.acquire()
+        with self.assertRaises(SAPConnectionError):
+            pool.acquire()
+
+        stats = pool.stats()
+        self.assertEqual(stats["in_use"], 2)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(mock_connect.call_count, 2)
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_failed_connect_frees_slot(self, mock_connect):
+        """Test a failed dbapi.connect does not leak a pool slot"""
+        from hdbcli import dbapi
+        mock_connect.side_effect = dbapi.Error("connection refused")
+        pool = self._pool()
+
+        with self.assertRaises(dbapi.Error):
+            pool.acquire()
+
+        self.assertEqual(pool.stats()["in_use"], 0)
+
+
+class TTLCacheTests(TestCase):
+    """Tests for the in-process TTL/LRU cache"""
+
+    def test_expired_entry_is_a_miss(self):
+        cache = TTLCache(ttl=0.01, max_size=10)
+        cache.set("k", [1])
+        self.assertEqual(cache.get("k"), [1])
+
+        with patch("sap_client.cache.time.monotonic", return_value=10**9):
+            self.assertIsNone(cache.get("k"))
+
+    def test_least_recently_used_evicted(self):
+        cache = TTLCache(ttl=60, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_invalidated_read_not_written_back(self):
+        """Test a read that raced an invalidation does not repopulate the cache"""
+        cache = TTLCache(ttl=60, max_size=10)
+        generation = cache.generation("k")
+        cache.invalidate("k")
+        cache.set("k", "stale", generation=generation)
+
+        self.assertIsNone(cache.get("k"))
+
+        generation = cache.generation("k")
+        cache.clear()
+        cache.set("k", "stale", generation=generation)
+        self.assertIsNone(cache.get("k"))
+
+    def test_invalidation_records_bounded(self):
+        """Test invalidation bookkeeping stays within max_size"""
+        cache = TTLCache(ttl=60, max_size=2)
+        generation = cache.generation("k")
+        for n in range(10):
+            cache.invalidate(f"other-{n}")
+        self.assertEqual(len(cache._invalidations), 2)
+
+        # "k" was never invalidated, but its read predates forgotten invalidations
+        cache.set("k", "maybe stale", generation=generation)
+        self.assertIsNone(cache.get("k"))
+        cache.set("k", "fresh", generation=cache.generation("k"))
+        self.assertEqual(cache.get("k"), "fresh")
+
+
+class SAPClientOpenPOCacheTests(TestCase):
+    """Tests for open PO caching in SAPClient"""
+
+    def setUp(self):
+        open_po_cache.clear()
+        self.addCleanup(open_po_cache.clear)
+        self.po = PODTO(po_number="1001", supplier_code="SUP001", supplier_name="Supplier", items=[])
+
+    @patch("sap_client.client.HanaPOReader")
+    def test_open_pos_served_from_cache(self, mock_reader_class):
+        mock_reader_class.return_value.get_open_pos.return_value = [self.po]
+        client = SAPClient("JIVO_OIL")
+
+        client.get_open_pos("SUP001")
+        result = client.get_open_pos("SUP001")
+
+        self.assertEqual(result, [self.po])
+        mock_reader_class.return_value.get_open_pos.assert_called_once_with("SUP001")
+
+    @patch("sap_client.client.HanaPOReader")
+    def test_cache_keyed_by_company(self, mock_reader_class):
+        mock_reader_class.return_value.get_open_pos.return_value = [self.po]
+
+        SAPClient("JIVO_OIL").get_open_pos("SUP001")
+        SAPClient("JIVO_MART").get_open_pos("SUP001")
+
+        self.assertEqual(mock_reader_class.return_value.get_open_pos.call_count, 2)
+
+    @patch("sap_client.client.HanaPOReader")
+    def test_invalidate_forces_reload(self, mock_reader_class):
+        mock_reader_class.return_value.get_open_pos.return_value = [self.po]
+        client = SAPClient("JIVO_OIL")
+
+        client.get_open_pos("SUP001")
+        client.invalidate_open_pos("SUP001")
+        client.get_open_pos("SUP001")
+
+        self.assertEqual(mock_reader_class.return_value.get_open_pos.call_count, 2)
+
+
+class SingleFlightTests(TestCase):
+    """Tests for coalescing identical concurrent SAP reads"""
+
+    def setUp(self):
+        open_po_cache.clear()
+        self.addCleanup(open_po_cache.clear)
+        reset_breakers()
+        self.addCleanup(reset_breakers)
+        self.po = PODTO(po_number="1001", supplier_code="SUP001", supplier_name="Supplier", items=[])
+
+    def _run_concurrently(self, target, count):
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(target())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_waiters_share_leader_result_and_error(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        threads, results, _ = self._run_concurrently(lambda: flights.do("k", slow), 4)
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 4)
+        self.assertEqual(flights.stats(), {"in_flight": 0, "calls": 1, "shared": 3})
+
+        with self.assertRaises(SAPConnectionError):
+            flights.do("k", MagicMock(side_effect=SAPConnectionError("down")))
+        self.assertEqual(flights.do("k", lambda: "fresh"), "fresh")
+
+    @patch("sap_client.client.HanaPOReader")
+    def test_concurrent_open_po_reads_hit_hana_once(self, mock_reader_class):
+        release = threading.Event()
+
+        def slow_read(supplier_code):
+            release.wait(5)
+            return [self.po]
+
+        mock_reader_class.return_value.get_open_pos.side_effect = slow_read
+        threads, results, errors = self._run_concurrently(
+            lambda: SAPClient("JIVO_OIL").get_open_pos("SUP001"), 3
+        )
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [[self.po]] * 3)
+        mock_reader_class.return_value.get_open_pos.assert_called_once_with("SUP001")
+
+    @patch("sap_client.client.HanaPOReader")
+    def test_invalidate_detaches_in_flight_read(self, mock_reader_class):
+        """Test a read started after invalidation does not join an older flight"""
+        release = threading.Event()
+        mock_reader_class.return_value.get_open_pos.side_effect = lambda code: release.wait(5) and [self.po]
+
+        threads, _, _ = self._run_concurrently(lambda: SAPClient("JIVO_OIL").get_open_pos("SUP001"), 1)
+        time.sleep(0.1)
+        SAPClient("JIVO_OIL").invalidate_open_pos("SUP001")
+        threads += self._run_concurrently(lambda: SAPClient("JIVO_OIL").get_open_pos("SUP001"), 1)[0]
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(mock_reader_class.return_value.get_open_pos.call_count, 2)
+
+
+class CircuitBreakerTests(TestCase):
+    """Tests for the SAP circuit breaker"""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker("SAP HANA (TEST)", failure_threshold=2, reset_timeout=30)
+
+    def _fail(self):
+        with self.assertRaises(SAPConnectionError):
+            with self.breaker.guard():
+                raise SAPConnectionError("down")
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        called = MagicMock()
+        with self.assertRaises(SAPConnectionError) as ctx:
+            with self.breaker.guard():
+                called()
+        called.assert_not_called()
+        self.assertIn("circuit open", str(ctx.exception))
+        self.assertEqual(self.breaker.stats()["rejected"], 1)
+
+    def test_success_resets_failure_count(self):
+        self._fail()
+        with self.breaker.guard():
+            pass
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_data_errors_do_not_count(self):
+        for _ in range(3):
+            with self.assertRaises(SAPDataError):
+                with self.breaker.guard():
+                    raise SAPDataError("bad query")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_pool_acquire_timeouts_do_not_count(self, mock_connect):
+        """Test an exhausted local connection pool does not open the circuit"""
+        pool = HanaConnectionPool(
+            {"host": "hana-test", "port": 30015, "user": "u", "password": "p", "schema": "TEST_DB"},
+            max_size=1, idle_timeout=300, acquire_timeout=0.01
+        )
+        held = pool.acquire()
+        self.addCleanup(pool.release, held)
+
+        for _ in range(3):
+            with self.assertRaises(SAPPoolTimeout):
+                with self.breaker.guard():
+                    pool.acquire()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.stats()["consecutive_failures"], 0)
+
+        # A half-open probe that timed out on the pool frees its slot
+        self._fail()
+        self._fail()
+        with patch("sap_client.circuit_breaker.time.monotonic", return_value=10**9):
+            with self.assertRaises(SAPPoolTimeout):
+                with self.breaker.guard():
+                    raise SAPPoolTimeout("no free connection")
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            with self.breaker.guard():
+                pass
+            self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_closes_circuit(self):
+        self._fail()
+        self._fail()
+
+        with patch("sap_client.circuit_breaker.time.monotonic", return_value=10**9):
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            with self.breaker.guard():
+                # Only one probe at a time while half-open
+                with self.assertRaises(SAPConnectionError):
+                    with self.breaker.guard():
+                        pass
+            self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens_circuit(self):
+        self._fail()
+        self._fail()
+
+        with patch("sap_client.circuit_breaker.time.monotonic", return_value=10**9):
+            self._fail()
+            self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.stats()["times_opened"], 2)
+
+    @patch("sap_client.client.HanaVendorReader")
+    def test_sap_client_breaker_per_company_and_backend(self, mock_reader_class):
+        reset_breakers()
+        self.addCleanup(reset_breakers)
+        mock_reader_class.return_value.get_active_vendors.side_effect = SAPConnectionError("down")
+
+        with self.settings(SAP_CIRCUIT_FAILURE_THRESHOLD=1):
+            with self.assertRaises(SAPConnectionError):
+                SAPClient("JIVO_OIL").get_active_vendors()
+            with self.assertRaises(SAPConnectionError):
+                SAPClient("JIVO_OIL").get_active_vendors()
+
+        self.assertEqual(mock_reader_class.return_value.get_active_vendors.call_count, 1)
+        self.assertEqual(get_breaker("JIVO_OIL", "hana").state, CircuitBreaker.OPEN)
+        self.assertEqual(get_breaker("JIVO_OIL", "service_layer").state, CircuitBreaker.CLOSED)
+        self.assertEqual(get_breaker("JIVO_MART", "hana").state, CircuitBreaker.CLOSED)
+        self.assertIn(
+            ("JIVO_OIL", "hana", "OPEN"),
+            [(b["company_code"], b["backend"], b["state"]) for b in get_breaker_stats()]
+        )
+
+
+class HanaPOReaderGetPOTests(TestCase):
+    """Tests for single-PO lookup by DocNum"""
+
+    def setUp(self):
+        self.context = MagicMock()
+        self.context.hana = {
+            "host": "hana-test", "port": 30015, "user": "u", "password": "p", "schema": "TEST_DB",
+        }
+        self.addCleanup(close_all_pools)
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_get_po_queries_by_docnum(self, mock_connect):
+        from .hana.po_reader import HanaPOReader
+        cursor = mock_connect.return_value.cursor.return_value
+        cursor.fetchmany.side_effect = [[
+            (1001, "SUP001", "Supplier", "ITEM001", "Item 1", 100, 40, 60, "KG", 12.5, 55, 0),
+            (1001, "SUP001", "Supplier", "ITEM002", "Item 2", 10, 0, 10, "KG", 3.0, 55, 1),
+        ], []]
+
+        po = HanaPOReader(self.context).get_po("1001")
+
+        query, params = cursor.execute.call_args[0]
+        self.assertIn('T0."DocNum" = ?', query)
+        self.assertEqual(params, (1001,))
+        self.assertEqual(po.po_number, "1001")
+        self.assertEqual(po.doc_entry, 55)
+        self.assertEqual(len(po.items), 2)
+
+    @patch("sap_client.hana.connection.dbapi.connect")
+    def test_get_po_non_numeric_skips_query(self, mock_connect):
+        from .hana.po_reader import HanaPOReader
+
+        self.assertIsNone(HanaPOReader(self.context).get_po("PO-001"))
+        mock_connect.assert_not_called()
+
+
+class SAPStandinTests(TestCase):
+    """Tests for the local SAP stand-in (fake HANA + Service Layer)"""
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        override = self.settings(SAP_STANDIN_DATA_DIR=data_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(close_all_pools)
+
+        standin_hana.seed("STANDIN_TEST", suppliers=3, pos_per_supplier=2, lines_per_po=3, random_seed=1)
+        self.context = MagicMock(
+            hana={
+                "driver": "standin", "host": "standin", "port": 0,
+                "user": "standin", "password": "", "schema": "STANDIN_TEST",
+            },
+        )
+
+    def _start_service_layer(self, **kwargs):
+        server = StandinServiceLayer(("127.0.0.1", 0), **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(reset_sessions)
+        self.context.service_layer = {
+            "base_url": server.base_url,
+            "company_db": "STANDIN_TEST",
+            "username": "standin",
+            "password": "standin",
+        }
+        return server
+
+    def test_hana_readers_run_against_standin(self):
+        pos = HanaPOReader(self.context).get_open_pos("V00001")
+
+        self.assertTrue(pos)
+        self.assertTrue(all(po.supplier_code == "V00001" for po in pos))
+        self.assertTrue(all(item.remaining_qty > 0 for po in pos for item in po.items))
+        self.assertEqual(HanaPOReader(self.context).get_po(pos[0].po_number).po_number, pos[0].po_number)
+
+    def test_open_pos_stream_in_pages(self):
+        reader = HanaPOReader(self.context)
+        all_pos = reader.get_open_pos("V00001")
+        self.assertEqual([po.doc_entry for po in all_pos], sorted(po.doc_entry for po in all_pos))
+
+        with self.settings(HANA_FETCH_SIZE=2):
+            first = reader.get_open_pos("V00001", limit=1)
+            rest = reader.get_open_pos(
+                "V00001", after=(first[0].doc_entry, first[0].items[-1].line_num)
+            )
+        self.assertEqual(first, all_pos[:1])
+        self.assertEqual(first + rest, all_pos)
+
+    def test_pos_by_numbers_reads_several_pos_in_one_query(self):
+        reader = HanaPOReader(self.context)
+        wanted = [po.po_number for po in reader.get_open_pos("V00001")] + [
+            reader.get_open_pos("V00002")[0].po_number, "999999", "PO-1"
+        ]
+
+        with patch.object(reader, "_read_open_pos", wraps=reader._read_open_pos) as read:
+            pos = reader.get_pos_by_numbers(wanted)
+
+        read.assert_called_once()
+        self.assertEqual(sorted(po.po_number for po in pos), sorted(wanted[:-2]))
+        self.assertEqual(reader.get_pos_by_numbers(["PO-1"]), [])
+
+    def test_master_data_changed_since(self):
+        vendors = HanaVendorReader(self.context).get_vendors_changed_since()
+        self.assertEqual(len(vendors), 3)
+
+        future = date.today() + timedelta(days=1)
+        self.assertEqual(HanaVendorReader(self.context).get_vendors_changed_since(future), [])
+        warehouses = HanaWarehouseReader(self.context).get_warehouses_changed_since(date.today())
+        self.assertTrue(warehouses)
+        self.assertTrue(all(warehouse.is_active for warehouse in warehouses))
+
+    def test_po_line_changes_include_closed_lines(self):
+        lines = HanaPOReader(self.context).get_po_lines_changed_since()
+        open_lines = [line for line in lines if line.is_open]
+
+        self.assertEqual(len(lines), 3 * 2 * 3)
+        self.assertEqual(
+            sum(len(po.items) for code in ("V00001", "V00002", "V00003")
+                for po in HanaPOReader(self.context).get_open_pos(code)),
+            len(open_lines)
+        )
+
+    @patch("sap_client.open_po_snapshot.SAPClient")
+    def test_incremental_snapshot_sync_drops_closed_pos(self, mock_client_class):
+        reader = HanaPOReader(self.context)
+        mock_client_class.return_value.get_po_lines_changed_since.side_effect = reader.get_po_lines_changed_since
+        sync_open_po_lines("STANDIN_TEST")
+        closed = OpenPOLine.objects.values_list("doc_entry", flat=True).first()
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+
+        conn = standin_hana.open_schema("STANDIN_TEST")
+        try:
+            conn.execute(
+                'UPDATE "OPOR" SET "DocStatus" = \'C\', "UpdateDate" = ? WHERE "DocEntry" = ?', (tomorrow, closed)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        result = sync_open_po_lines("STANDIN_TEST")
+
+        self.assertEqual(result["mode"], "incremental")
+        self.assertFalse(OpenPOLine.objects.filter(doc_entry=closed).exists())
+        self.assertTrue(OpenPOLine.objects.exists())
+
+    def test_injected_hana_failure_raises_connection_error(self):
+        with self.settings(SAP_STANDIN_HANA_ERROR_RATE=1.0):
+            with self.assertRaises(SAPConnectionError):
+                HanaVendorReader(self.context).get_active_vendors()
+
+    def test_service_layer_creates_grpo_and_reduces_open_qty(self):
+        server = self._start_service_layer()
+        po = HanaPOReader(self.context).get_open_pos("V00001")[0]
+        line = po.items[0]
+
+        result = GRPOWriter(self.context).create({
+            "CardCode": "V00001",
+            "DocumentLines": [{
+                "ItemCode": line.po_item_code,
+                "Quantity": "1",
+                "BaseType": 22,
+                "BaseEntry": po.doc_entry,
+                "BaseLine": line.line_num,
+            }],
+        })
+
+        self.assertIn("DocNum", result)
+        self.assertEqual(server.login_count, 1)
+        updated = HanaPOReader(self.context).get_po(po.po_number)
+        remaining = {item.line_num: item.remaining_qty for item in updated.items} if updated else {}
+        self.assertEqual(remaining.get(line.line_num, 0), line.remaining_qty - 1)
+
+        notes = HanaGRPOReader(self.context).get_delivery_notes(date.today(), date.today())
+        self.assertEqual([note.doc_num for note in notes], [result["DocNum"]])
+        self.assertEqual(
+            [(n.item_code, n.quantity, n.base_entry) for n in notes[0].lines],
+            [(line.po_item_code, 1.0, po.doc_entry)]
+        )
+
+    def test_grpo_found_by_idempotency_key(self):
+        self._start_service_layer()
+        po = HanaPOReader(self.context).get_open_pos("V00001")[0]
+        line = po.items[0]
+
+        result = GRPOWriter(self.context).create({
+            "CardCode": "V00001",
+            "U_GRPO_KEY": "key-1",
+            "DocumentLines": [{"ItemCode": line.po_item_code, "Quantity": "1"}],
+        })
+
+        found = HanaGRPOReader(self.context).get_delivery_notes_by_key("U_GRPO_KEY", ["key-1", "key-2"])
+        self.assertEqual(list(found), ["key-1"])
+        self.assertEqual(found["key-1"].doc_entry, result["DocEntry"])
+        with self.assertRaises(SAPDataError):
+            HanaGRPOReader(self.context).get_delivery_notes_by_key('U_X" OR 1=1 --', ["key-1"])
+
+    def test_service_layer_batch_reports_each_document(self):
+        self._start_service_layer()
+
+        results = GRPOWriter(self.context).create_batch([
+            {"CardCode": "V00001", "DocumentLines": [{"ItemCode": "RM00001", "Quantity": "5"}]},
+            {"CardCode": "UNKNOWN", "DocumentLines": [{"ItemCode": "RM00001", "Quantity": "5"}]},
+        ])
+
+        self.assertTrue(results[0]["success"])
+        self.assertFalse(results[1]["success"])
+        self.assertEqual(results[1]["status_code"], 400)
+        self.assertIn("UNKNOWN", results[1]["error"])
+
+    def test_async_writer_shares_session_and_maps_errors(self):
+        server = self._start_service_layer(latency_ms=50)
+        payload = {"CardCode": "V00001", "DocumentLines": [{"ItemCode": "RM00001", "Quantity": "1"}]}
+
+        async def post_all():
+            async with AsyncServiceLayer() as service_layer:
+                writer = AsyncGRPOWriter(self.context, service_layer)
+                results = list(await asyncio.gather(*(writer.acreate(payload) for _ in range(5))))
+                server.sessions.clear()  # session expired on the SAP side
+                results.append(await writer.acreate(payload))
+                rejected = await asyncio.gather(
+                    writer.acreate({**payload, "CardCode": "UNKNOWN"}), return_exceptions=True
+                )
+                return results, rejected[0]
+
+        results, rejected = asyncio.run(post_all())
+
+        self.assertTrue(all("DocNum" in result for result in results))
+        self.assertEqual(server.documents_created, 6)
+        self.assertEqual(server.login_count, 2)  # one shared login, one after the 401
+        self.assertIsInstance(rejected, SAPValidationError)
+
+        self.context.service_layer = {**self.context.service_layer, "base_url": "http://127.0.0.1:1"}
+
+        async def post_unreachable():
+            async with AsyncServiceLayer() as service_layer:
+                await AsyncGRPOWriter(self.context, service_layer).acreate(payload)
+
+        with self.assertRaises(SAPConnectionError):
+            asyncio.run(post_unreachable())
+
+    def test_dropped_connection_raises_connection_error(self):
+        self._start_service_layer(drop_rate=1.0)
+
+        with self.assertRaises(SAPConnectionError):
+            GRPOWriter(self.context).create(
+                {"CardCode": "V00001", "DocumentLines": [{"ItemCode": "RM00001", "Quantity": "1"}]}
+            )
+
+
+class SAPMetricsTests(APITestCase):
+    """Tests for SAP call tracing and latency summaries"""
+
+    def setUp(self):
+        self.recorder = MetricsRecorder()
+        patcher = patch("sap_client.metrics.recorder", self.recorder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _sample(self, duration_ms, operation="get_open_pos", error_class=""):
+        return SAPCallSample(
+            company_code="JIVO_OIL", backend="hana", operation=operation,
+            duration_ms=duration_ms, rows=2, error_class=error_class,
+            created_at=timezone.now(),
+        )
+
+    def test_traced_records_rows_errors_and_acquire_time(self):
+        class Reader:
+            company_code = "JIVO_OIL"
+
+            @traced("hana", "get_things")
+            def get_things(self, fail=False):
+                annotate(acquire_ms=1.5)
+                if fail:
+                    raise SAPDataError("bad")
+                return [1, 2, 3]
+
+        Reader().get_things()
+        with self.assertRaises(SAPDataError):
+            Reader().get_things(fail=True)
+
+        ok, failed = list(self.recorder._buffer)
+        self.assertEqual((ok.company_code, ok.backend, ok.operation), ("JIVO_OIL", "hana", "get_things"))
+        self.assertEqual(ok.rows, 3)
+        self.assertEqual(ok.acquire_ms, 1.5)
+        self.assertEqual(ok.error_class, "")
+        self.assertEqual(failed.error_class, "SAPDataError")
+        self.assertGreater(ok.duration_ms, 0)
+
+    def test_flush_waits_for_open_transaction(self):
+        @traced("hana", "noop")
+        def noop(self):
+            return None
+
+        noop(MagicMock(company_code="JIVO_OIL"))
+        # TestCase wraps every test in a transaction
+        self.assertEqual(self.recorder.flush(), 0)
+        self.assertEqual(self.recorder.pending(), 1)
+
+        with patch("sap_client.metrics.connection") as mock_connection:
+            mock_connection.in_atomic_block = False
+            self.assertEqual(self.recorder.flush(), 1)
+        self.assertEqual(SAPCallSample.objects.get().operation, "noop")
+
+    @override_settings(SAP_METRICS_FLUSH_SIZE=1, SAP_METRICS_RETENTION_HOURS=1)
+    def test_traced_only_buffers_and_flush_purges_old_samples(self):
+        @traced("hana", "noop")
+        def noop(self):
+            return None
+
+        old = self._sample(1.0)
+        old.created_at = timezone.now() - timedelta(hours=2)
+        old.save()
+
+        with patch("sap_client.metrics.connection") as mock_connection:
+            mock_connection.in_atomic_block = False
+            worker = threading.Thread(target=noop, args=(MagicMock(company_code="JIVO_OIL"),))
+            worker.start()
+            worker.join()
+            # Over the flush size, but a traced call never writes itself
+            self.assertEqual(self.recorder.pending(), 1)
+            self.assertFalse(SAPCallSample.objects.filter(operation="noop").exists())
+
+            self.assertEqual(self.recorder.flush_if_due(), 1)
+
+        self.assertEqual(list(SAPCallSample.objects.values_list("operation", flat=True)), ["noop"])
+
+    def test_latency_summary_percentiles(self):
+        SAPCallSample.objects.bulk_create(
+            [self._sample(float(ms)) for ms in range(1, 101)]
+            + [self._sample(5000.0, error_class="SAPConnectionError")]
+        )
+        old = self._sample(99999.0)
+        old.created_at = timezone.now() - timedelta(hours=2)
+        old.save()
+
+        (row,) = latency_summary(15)
+
+        self.assertEqual(row["count"], 101)
+        self.assertEqual(row["p50_ms"], 51.0)
+        self.assertEqual(row["p99_ms"], 100.0)
+        self.assertEqual(row["max_ms"], 5000.0)
+        self.assertEqual(row["errors"], {"SAPConnectionError": 1})
+        self.assertEqual(row["histogram"]["le_10"], 10)
+        self.assertEqual(row["histogram"]["le_5000"], 1)
+
+    def test_metrics_endpoint_staff_only(self):
+        SAPCallSample.objects.bulk_create([self._sample(12.0)])
+        user = User.objects.create_user(
+            email="metrics@example.com", password="testpass123",
+            full_name="Metrics User", employee_code="EMP900"
+        )
+        self.client.force_authenticate(user=user)
+        url = reverse("sap-metrics")
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(url, {"minutes": 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["operations"][0]["operation"], "get_open_pos")
+        self.assertEqual(self.client.get(url, {"minutes": "x"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SAPConsolidatedTests(APITestCase):
+    """Tests for parallel multi-company (consolidated) SAP calls"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="consolidated@example.com",
+            password="testpass123",
+            full_name="Consolidated User",
+            employee_code="EMP300"
+        )
+        role = UserRole.objects.create(name="Purchase")
+        for code in ("JIVO_OIL", "JIVO_MART"):
+            company = Company.objects.create(name=code, code=code, is_active=True)
+            UserCompany.objects.create(user=self.user, company=company, role=role, is_active=True)
+        Company.objects.create(name="JIVO_BEVERAGES", code="JIVO_BEVERAGES", is_active=True)
+        self.client.force_authenticate(user=self.user)
+
+    @staticmethod
+    def _fake_vendors(client):
+        time.sleep(0.2)
+        code = client.context.company_code
+        if code == "JIVO_MART":
+            raise SAPConnectionError("down")
+        return [VendorDTO(vendor_code=f"V-{code}", vendor_name="Vendor")]
+
+    def test_fan_out_runs_in_parallel_and_isolates_failures(self):
+        with patch.object(SAPClient, "get_active_vendors", autospec=True, side_effect=self._fake_vendors):
+            started = time.monotonic()
+            rows, errors = SAPClient.get_active_vendors_consolidated()
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.5)  # three 0.2s calls, not 0.6s
+        self.assertEqual(
+            sorted((row["company_code"], row["vendor_code"]) for row in rows),
+            [("JIVO_BEVERAGES", "V-JIVO_BEVERAGES"), ("JIVO_OIL", "V-JIVO_OIL")]
+        )
+        self.assertEqual(list(errors), ["JIVO_MART"])
+        self.assertIsInstance(errors["JIVO_MART"], SAPConnectionError)
+
+    def test_fan_out_skips_unknown_and_empty_company_lists(self):
+        with patch.object(SAPClient, "get_active_vendors", autospec=True, side_effect=self._fake_vendors):
+            self.assertEqual(SAPClient.get_active_vendors_consolidated([]), ([], {}))
+            rows, errors = SAPClient.get_active_vendors_consolidated(["JIVO_OIL", "NOPE"])
+
+        self.assertEqual([row["company_code"] for row in rows], ["JIVO_OIL"])
+        self.assertEqual(errors, {})
+
+    def test_consolidated_view_limited_to_user_companies(self):
+        with patch.object(SAPClient, "get_active_vendors", autospec=True, side_effect=self._fake_vendors) as mock_get:
+            response = self.client.get(
+                "/api/v1/po/vendors/", {"consolidated": "true"}, HTTP_COMPANY_CODE="JIVO_OIL"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(mock_get.call_count, 2)  # not JIVO_BEVERAGES
+        self.assertEqual(response.data["results"], [
+            {"vendor_code": "V-JIVO_OIL", "vendor_name": "Vendor", "company_code": "JIVO_OIL"}
+        ])
+        self.assertEqual(response.data["errors"][0]["company_code"], "JIVO_MART")
+
+
+class SAPMasterDataMirrorTests(APITestCase):
+    """Tests for the local vendor / warehouse mirror"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="mirror@example.com",
+            password="testpass123",
+            full_name="Mirror User",
+            employee_code="EMP400"
+        )
+        company = Company.objects.create(name="Jivo Oil", code="JIVO_OIL", is_active=True)
+        UserCompany.objects.create(
+            user=self.user, company=company, role=UserRole.objects.create(name="Gate"), is_active=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @staticmethod
+    def _vendor(code, name, active=True, updated="2026-01-10"):
+        return VendorMasterDTO(vendor_code=code, vendor_name=name, is_active=active, update_date=updated)
+
+    @patch("sap_client.master_data.SAPClient")
+    def test_incremental_sync_reads_from_last_update_date(self, mock_client_class):
+        fetch = mock_client_class.return_value.get_vendors_changed_since
+        fetch.return_value = [self._vendor("V001", "Alpha Oils"), self._vendor("V002", "Beta Seeds")]
+        self.assertEqual(sync_entity("JIVO_OIL", SAPMasterDataSync.VENDORS)["mode"], "full")
+
+        fetch.return_value = [self._vendor("V002", "Beta Seeds Ltd", active=False, updated="2026-02-01")]
+        result = sync_entity("JIVO_OIL", SAPMasterDataSync.VENDORS)
+
+        self.assertEqual(fetch.call_args_list[0].args, (None,))
+        self.assertEqual(fetch.call_args_list[1].args, (date(2026, 1, 10),))
+        self.assertEqual(result["rows"], 1)
+        vendor = SAPVendor.objects.get(company_code="JIVO_OIL", vendor_code="V002")
+        self.assertEqual((vendor.vendor_name, vendor.search_name, vendor.is_active), ("Beta Seeds Ltd", "BETA SEEDS LTD", False))
+        self.assertEqual(
+            SAPMasterDataSync.objects.get(company_code="JIVO_OIL", entity="vendors").last_update_date,
+            date(2026, 2, 1)
+        )
+
+    @patch("sap_client.master_data.SAPClient")
+    def test_full_sync_deactivates_rows_missing_in_sap(self, mock_client_class):
+        fetch = mock_client_class.return_value.get_vendors_changed_since
+        fetch.return_value = [self._vendor("V001", "Alpha Oils"), self._vendor("V002", "Beta Seeds")]
+        sync_entity("JIVO_OIL", SAPMasterDataSync.VENDORS)
+
+        fetch.return_value = [self._vendor("V001", "Alpha Oils")]
+        result = sync_entity("JIVO_OIL", SAPMasterDataSync.VENDORS, full=True)
+
+        self.assertEqual(result["deactivated"], 1)
+        self.assertFalse(SAPVendor.objects.get(vendor_code="V002").is_active)
+
+    @patch("sap_client.views.SAPClient")
+    @patch("sap_client.master_data.SAPClient")
+    def test_vendor_list_served_from_mirror_with_prefix_search(self, mock_sync_client, mock_view_client):
+        mock_sync_client.return_value.get_vendors_changed_since.return_value = [
+            self._vendor("V001", "Alpha Oils"),
+            self._vendor("V002", "Beta Seeds"),
+            self._vendor("V003", "Alpine Agro", active=False),
+            self._vendor("v-low", "Gamma Traders"),
+        ]
+        sync_entity("JIVO_OIL", SAPMasterDataSync.VENDORS)
+
+        response = self.client.get("/api/v1/po/vendors/", {"search": "al"}, HTTP_COMPANY_CODE="JIVO_OIL")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"vendor_code": "V001", "vendor_name": "Alpha Oils"}])
+
+        response = self.client.get("/api/v1/po/vendors/", {"search": "v002"}, HTTP_COMPANY_CODE="JIVO_OIL")
+        self.assertEqual([row["vendor_code"] for row in response.data], ["V002"])
+
+        # Codes match case-insensitively, like the live _prefix_filter
+        response = self.client.get("/api/v1/po/vendors/", {"search": "V-L"}, HTTP_COMPANY_CODE="JIVO_OIL")
+        self.assertEqual([row["vendor_code"] for row in response.data], ["v-low"])
+        mock_view_client.assert_not_called()
+
+    @patch("sap_client.views.SAPClient")
+    def test_vendor_list_falls_back_to_sap_until_synced(self, mock_client_class):
+        mock_client_class.return_value.get_active_vendors.return_value = [
+            VendorDTO(vendor_code="V001", vendor_name="Alpha Oils"),
+            VendorDTO(vendor_code="V002", vendor_name="Beta Seeds"),
+        ]
+
+        response = self.client.get("/api/v1/po/vendors/", {"search": "beta"}, HTTP_COMPANY_CODE="JIVO_OIL")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"vendor_code": "V002", "vendor_name": "Beta Seeds"}])
+
+
+class SAPEncoderTests(TestCase):
+    """Tests for the direct DTO JSON encoder"""
+
+    def test_matches_drf_serializer_output(self):
+        po = PODTO(
+            po_number="1001", supplier_code="SUP001", supplier_name="Fournisseur \u00e9\u2028", doc_entry=7,
+            synced_at=timezone.now(),
+            items=[
+                POItemDTO(po_item_code="RM1", item_name="Item", ordered_qty=100.0, received_qty=33.3335,
+                          remaining_qty=66.6665, uom=None, rate=12.1234565, line_num=0),
+            ],
+        )
+        live_po = PODTO(po_number="1002", supplier_code="SUP001", supplier_name="S", items=[])
+        vendors = [VendorDTO(vendor_code="V001", vendor_name="Alpha"), VendorDTO(vendor_code="V002", vendor_name=None)]
+
+        self.assertFalse(hasattr(po, "__dict__"))
+        self.assertEqual(
+            render_json(pos_data([po, live_po])),
+            JSONRenderer().render(POSerializer([po, live_po], many=True).data)
+        )
+        self.assertEqual(
+            render_json(rows_data(vendors, ("vendor_code", "vendor_name"))),
+            JSONRenderer().render(VendorSerializer(vendors, many=True).data)
+        )
+
+
+class OpenPOSnapshotTests(TestCase):
+    """Tests for the local open PO line snapshot"""
+
+    def setUp(self):
+        open_po_cache.clear()
+        self.addCleanup(open_po_cache.clear)
+
+    @staticmethod
+    def _line(doc_entry, line_num, remaining, supplier="SUP001", is_open=True, updated="2026-03-01"):
+        return POLineDTO(
+            po_number=str(1000 + doc_entry), doc_entry=doc_entry, line_num=line_num,
+            supplier_code=supplier, supplier_name="Supplier", item_code=f"RM{line_num}",
+            item_name="Item", ordered_qty=100.0, remaining_qty=remaining, uom="KG",
+            rate=10.0, is_open=is_open, update_date=updated,
+        )
+
+    @patch("sap_client.open_po_snapshot.SAPClient")
+    def test_delta_sync_replaces_changed_pos(self, mock_client_class):
+        fetch = mock_client_class.return_value.get_po_lines_changed_since
+        fetch.return_value = [self._line(1, 0, 100), self._line(1, 1, 40), self._line(2, 0, 5)]
+        self.assertEqual(sync_open_po_lines("JIVO_OIL")["open_lines"], 3)
+
+        # PO 1 line 1 fully received in SAP, PO 2 closed
+        fetch.return_value = [
+            self._line(1, 0, 100, updated="2026-03-05"),
+            self._line(1, 1, 0, is_open=False, updated="2026-03-05"),
+            self._line(2, 0, 5, is_open=False, updated="2026-03-04"),
+        ]
+        result = sync_open_po_lines("JIVO_OIL")
+
+        self.assertEqual(fetch.call_args.args, (date(2026, 3, 1),))
+        self.assertEqual(result["mode"], "incremental")
+        self.assertEqual(
+            list(OpenPOLine.objects.values_list("doc_entry", "line_num")), [(1, 0)]
+        )
+        self.assertEqual(
+            SAPMasterDataSync.objects.get(entity=SAPMasterDataSync.OPEN_PO_LINES).last_update_date,
+            date(2026, 3, 5)
+        )
+
+    @patch("sap_client.client.HanaPOReader")
+    @patch("sap_client.open_po_snapshot.SAPClient")
+    def test_reads_use_fresh_snapshot_unless_forced_live(self, mock_sync_client, mock_reader_class):
+        mock_sync_client.return_value.get_po_lines_changed_since.return_value = [
+            self._line(1, 0, 60), self._line(1, 1, 0, is_open=False), self._line(2, 0, 5, supplier="SUP002"),
+        ]
+        sync_open_po_lines("JIVO_OIL")
+        client = SAPClient("JIVO_OIL")
+
+        pos = client.get_open_pos("SUP001")
+        self.assertEqual([(po.po_number, len(po.items)) for po in pos], [("1001", 1)])
+        self.assertEqual(pos[0].items[0].received_qty, 40.0)
+        self.assertIsNotNone(pos[0].synced_at)
+        self.assertEqual(client.get_po("1002").supplier_code, "SUP002")
+        self.assertIsNone(client.get_po("9999"))
+        mock_reader_class.assert_not_called()
+
+        mock_reader_class.return_value.get_open_pos.return_value = []
+        client.get_open_pos("SUP001", force_live=True)
+        SAPMasterDataSync.objects.update(last_synced_at=timezone.now() - timedelta(hours=1))
+        client.get_open_pos("SUP002")
+        self.assertEqual(mock_reader_class.return_value.get_open_pos.call_count, 2)
+
+    @patch("sap_client.open_po_snapshot.SAPClient")
+    def test_open_po_list_pages_by_cursor(self, mock_sync_client):
+        mock_sync_client.return_value.get_po_lines_changed_since.return_value = [
+            self._line(1, 0, 60), self._line(1, 1, 10), self._line(2, 0, 5),
+            self._line(3, 0, 7), self._line(4, 0, 9, supplier="SUP002"),
+        ]
+        sync_open_po_lines("JIVO_OIL")
+        user = User.objects.create_user(
+            email="pages@example.com", password="testpass123", full_name="Pages User", employee_code="EMP500"
+        )
+        UserCompany.objects.create(
+            user=user, company=Company.objects.create(name="Jivo Oil", code="JIVO_OIL", is_active=True),
+            role=UserRole.objects.create(name="Gate"), is_active=True,
+        )
+        api = APIClient()
+        api.force_authenticate(user=user)
+        query = {"supplier_code": "SUP001", "page_size": 2}
+
+        response = api.get("/api/v1/po/open-pos/", query, HTTP_COMPANY_CODE="JIVO_OIL")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([len(po["items"]) for po in response.data["results"]], [2, 1])
+
+        response = api.get(
+            "/api/v1/po/open-pos/", {**query, "cursor": response.data["next_cursor"]},
+            HTTP_COMPANY_CODE="JIVO_OIL"
+        )
+        self.assertEqual([po["doc_entry"] for po in response.data["results"]], [3])
+        self.assertIsNone(response.data["next_cursor"])
+
+        response = api.get("/api/v1/po/open-pos/", {**query, "cursor": "bogus"}, HTTP_COMPANY_CODE="JIVO_OIL")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("sap_client.open_po_snapshot.SAPClient")
+    def test_refresh_supplier_replaces_its_lines(self, mock_client_class):
+        self.assertIsNone(refresh_supplier("JIVO_OIL", "SUP001"))  # no snapshot yet
+
+        mock_client_class.return_value.get_po_lines_changed_since.return_value = [
+            self._line(1, 0, 60), self._line(2, 0, 5, supplier="SUP002"),
+        ]
+        sync_open_po_lines("JIVO_OIL")
+        mock_client_class.return_value.get_supplier_po_lines.return_value = [
+            self._line(1, 0, 30, updated="2026-03-07"), self._line(1, 1, 0, is_open=False, updated="2026-03-07"),
+        ]
+
+        self.assertEqual(refresh_supplier("JIVO_OIL", "SUP001"), 1)
+        mock_client_class.return_value.get_supplier_po_lines.assert_called_once_with("SUP001")
+        line = OpenPOLine.objects.get(supplier_code="SUP001")
+        self.assertEqual((line.remaining_qty, line.sap_updated_at), (30, date(2026, 3, 7)))
+        self.assertTrue(OpenPOLine.objects.filter(supplier_code="SUP002").exists())
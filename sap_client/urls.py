@@ -1,5 +1,14 @@
 from django.urls import path
-from .views import OpenPOListAPI, POItemListAPI, CreateGRPOAPI, ActiveWarehouseListAPI, ActiveVendorListAPI
+from .views import (
+    OpenPOListAPI,
+    POItemListAPI,
+    CreateGRPOAPI,
+    ActiveWarehouseListAPI,
+    ActiveVendorListAPI,
+    HanaPoolStatsAPI,
+    CircuitBreakerStatsAPI,
+    SAPMetricsAPI,
+)
 
 urlpatterns = [
     path("open-pos/", OpenPOListAPI.as_view()),
@@ -7,4 +16,7 @@ urlpatterns = [
     path("grpo/", CreateGRPOAPI.as_view(), name="create-grpo"),
     path("warehouses/", ActiveWarehouseListAPI.as_view(), name="active-warehouses"),
     path("vendors/", ActiveVendorListAPI.as_view(), name="active-vendors"),
+    path("health/hana-pool/", HanaPoolStatsAPI.as_view(), name="hana-pool-stats"),
+    path("health/circuit-breakers/", CircuitBreakerStatsAPI.as_view(), name="circuit-breaker-stats"),
+    path("health/metrics/", SAPMetricsAPI.as_view(), name="sap-metrics"),
 ]
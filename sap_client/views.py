@@ -1,21 +1,115 @@
+import base64
+import binascii
 import logging
 
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
+from company.models import UserCompany
 from company.permissions import HasCompanyContext
+from .circuit_breaker import get_breaker_stats
 from .client import SAPClient
+from .encoders import EncodedJSONResponse, po_data, pos_data, rows_data
 from .exceptions import SAPConnectionError, SAPDataError, SAPValidationError
-from .serializers import POSerializer, GRPORequestSerializer, GRPOResponseSerializer, WarehouseSerializer, VendorSerializer
+from .hana.connection import get_pool_stats
+from . import master_data
+from .metrics import latency_summary, recorder
+from .models import SAPMasterDataSync
+from .serializers import (
+    GRPORequestSerializer,
+    GRPOResponseSerializer,
+    WarehouseSerializer,
+    VendorSerializer,
+    ConsolidatedWarehouseSerializer,
+    ConsolidatedVendorSerializer,
+)
 
 logger = logging.getLogger(__name__)
 
+# Read-only SAP lists are encoded directly (sap_client/encoders.py), in serializer field order
+WAREHOUSE_FIELDS = tuple(WarehouseSerializer().fields)
+VENDOR_FIELDS = tuple(VendorSerializer().fields)
+
+
+def _flag(request, name: str) -> bool:
+    return request.GET.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _is_consolidated(request) -> bool:
+    return _flag(request, "consolidated")
+
+
+def _prefix_filter(rows, search: str, code_attr: str, name_attr: str):
+    """Same name/code prefix match as the mirror, for live SAP rows."""
+    search = search.strip().upper()
+    if not search:
+        return rows
+    return [
+        row for row in rows
+        if getattr(row, name_attr).upper().startswith(search)
+        or getattr(row, code_attr).upper().startswith(search)
+    ]
+
+
+def _encode_cursor(position) -> str:
+    return base64.urlsafe_b64encode(f"{position[0]}:{position[1]}".encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    """(doc_entry, line_num) from an open PO page cursor; raises ValueError if invalid."""
+    try:
+        doc_entry, line_num = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(doc_entry), int(line_num)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _consolidated_response(request, fetch, serializer_class):
+    """
+    Run a consolidated SAPClient call for every active company of the user
+    and report per-company failures next to the rows that did come back.
+    """
+    company_codes = UserCompany.objects.filter(
+        user=request.user,
+        is_active=True,
+        company__is_active=True
+    ).values_list("company__code", flat=True)
+
+    rows, errors = fetch(list(company_codes))
+    error_list = [
+        {
+            "company_code": company_code,
+            "detail": (
+                "SAP system is currently unavailable. Please try again later."
+                if isinstance(error, SAPConnectionError)
+                else "Failed to retrieve data from SAP."
+            ),
+        }
+        for company_code, error in errors.items()
+    ]
+
+    response_data = {
+        "results": serializer_class(rows, many=True).data,
+        "errors": error_list,
+    }
+    if errors and not rows:
+        response_data["detail"] = "SAP system is currently unavailable. Please try again later."
+        return Response(response_data, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response(response_data)
+
 
 class OpenPOListAPI(APIView):
     """
     Returns list of open POs for a supplier
+
+    Served from the local open PO line snapshot while it is fresh;
+    GET ?live=true reads SAP directly.
+
+    GET ?page_size=N (and ?cursor=<next_cursor>) returns one page of POs in
+    SAP document order as {"results": [...], "next_cursor": ...}.
     """
     permission_classes = [IsAuthenticated, HasCompanyContext]
 
@@ -27,9 +121,32 @@ class OpenPOListAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        paginated = "page_size" in request.GET or "cursor" in request.GET
+        after = None
+        page_size = settings.SAP_OPEN_PO_PAGE_SIZE
+        if paginated:
+            try:
+                if request.GET.get("cursor"):
+                    after = _decode_cursor(request.GET["cursor"])
+                if request.GET.get("page_size"):
+                    page_size = int(request.GET["page_size"])
+                if page_size < 1:
+                    raise ValueError
+            except ValueError:
+                return Response(
+                    {"detail": "Invalid cursor or page_size"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            page_size = min(page_size, settings.SAP_OPEN_PO_PAGE_MAX_SIZE)
+
         try:
             client = SAPClient(company_code=request.company.company.code)
-            po_list = client.get_open_pos(supplier_code)
+            if paginated:
+                po_list, next_position = client.get_open_pos_page(
+                    supplier_code, after=after, limit=page_size, force_live=_flag(request, "live")
+                )
+            else:
+                po_list = client.get_open_pos(supplier_code, force_live=_flag(request, "live"))
         except SAPConnectionError as e:
             logger.error(f"SAP connection error in OpenPOListAPI: {e}")
             return Response(
@@ -43,20 +160,27 @@ class OpenPOListAPI(APIView):
                 status=status.HTTP_502_BAD_GATEWAY
             )
 
-        serializer = POSerializer(po_list, many=True)
-        return Response(serializer.data)
+        if not paginated:
+            return EncodedJSONResponse(pos_data(po_list))
+        return EncodedJSONResponse({
+            "results": pos_data(po_list),
+            "next_cursor": _encode_cursor(next_position) if next_position else None,
+        })
 
 
 class POItemListAPI(APIView):
     """
     Returns items for a specific PO
+
+    Served from the local open PO line snapshot while it is fresh;
+    GET ?live=true reads SAP directly.
     """
     permission_classes = [IsAuthenticated, HasCompanyContext]
 
     def get(self, request, po_number):
         try:
             client = SAPClient(company_code=request.company.company.code)
-            pos = client.get_open_pos(supplier_code=None)
+            po = client.get_po(po_number, force_live=_flag(request, "live"))
         except SAPConnectionError as e:
             logger.error(f"SAP connection error in POItemListAPI: {e}")
             return Response(
@@ -70,16 +194,13 @@ class POItemListAPI(APIView):
                 status=status.HTTP_502_BAD_GATEWAY
             )
 
-        for po in pos:
-            if po.po_number == po_number:
-                return Response(
-                    POSerializer(po).data
-                )
+        if po is None:
+            return Response(
+                {"detail": "PO not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        return Response(
-            {"detail": "PO not found"},
-            status=status.HTTP_404_NOT_FOUND
-        )
+        return EncodedJSONResponse(po_data(po))
 
 
 class CreateGRPOAPI(APIView):
@@ -145,14 +266,34 @@ class CreateGRPOAPI(APIView):
 
 class ActiveWarehouseListAPI(APIView):
     """
-    Returns list of all active warehouses from SAP
+    Returns list of all active warehouses
+
+    Served from the local warehouse mirror once it has been synced
+    (sync_sap_master_data), live from SAP before that.
+    GET ?search=<prefix> filters by warehouse name or code prefix.
+    GET ?consolidated=true queries every company the user belongs to in
+    parallel; rows carry company_code and failed companies are listed in
+    "errors".
     """
     permission_classes = [IsAuthenticated, HasCompanyContext]
 
     def get(self, request):
+        if _is_consolidated(request):
+            return _consolidated_response(
+                request,
+                SAPClient.get_active_warehouses_consolidated,
+                ConsolidatedWarehouseSerializer
+            )
+
+        company_code = request.company.company.code
+        search = request.GET.get("search", "")
+        if master_data.is_mirrored(company_code, SAPMasterDataSync.WAREHOUSES):
+            # Mirror rows are already .values() dicts in serializer field order
+            return EncodedJSONResponse(list(master_data.active_warehouses(company_code, search)))
+
         try:
-            client = SAPClient(company_code=request.company.company.code)
-            warehouses = client.get_active_warehouses()
+            client = SAPClient(company_code=company_code)
+            warehouses = _prefix_filter(client.get_active_warehouses(), search, "warehouse_code", "warehouse_name")
         except SAPConnectionError as e:
             logger.error(f"SAP connection error in ActiveWarehouseListAPI: {e}")
             return Response(
@@ -166,20 +307,39 @@ class ActiveWarehouseListAPI(APIView):
                 status=status.HTTP_502_BAD_GATEWAY
             )
 
-        serializer = WarehouseSerializer(warehouses, many=True)
-        return Response(serializer.data)
+        return EncodedJSONResponse(rows_data(warehouses, WAREHOUSE_FIELDS))
 
 
 class ActiveVendorListAPI(APIView):
     """
-    Returns list of all active vendors from SAP
+    Returns list of all active vendors
+
+    Served from the local vendor mirror once it has been synced
+    (sync_sap_master_data), live from SAP before that.
+    GET ?search=<prefix> filters by vendor name or code prefix.
+    GET ?consolidated=true queries every company the user belongs to in
+    parallel; rows carry company_code and failed companies are listed in
+    "errors".
     """
     permission_classes = [IsAuthenticated, HasCompanyContext]
 
     def get(self, request):
+        if _is_consolidated(request):
+            return _consolidated_response(
+                request,
+                SAPClient.get_active_vendors_consolidated,
+                ConsolidatedVendorSerializer
+            )
+
+        company_code = request.company.company.code
+        search = request.GET.get("search", "")
+        if master_data.is_mirrored(company_code, SAPMasterDataSync.VENDORS):
+            # Mirror rows are already .values() dicts in serializer field order
+            return EncodedJSONResponse(list(master_data.active_vendors(company_code, search)))
+
         try:
-            client = SAPClient(company_code=request.company.company.code)
-            vendors = client.get_active_vendors()
+            client = SAPClient(company_code=company_code)
+            vendors = _prefix_filter(client.get_active_vendors(), search, "vendor_code", "vendor_name")
         except SAPConnectionError as e:
             logger.error(f"SAP connection error in ActiveVendorListAPI: {e}")
             return Response(
@@ -193,5 +353,53 @@ class ActiveVendorListAPI(APIView):
                 status=status.HTTP_502_BAD_GATEWAY
             )
 
-        serializer = VendorSerializer(vendors, many=True)
-        return Response(serializer.data)
+        return EncodedJSONResponse(rows_data(vendors, VENDOR_FIELDS))
+
+
+class HanaPoolStatsAPI(APIView):
+    """
+    Returns HANA connection pool stats (in use, idle, wait time) for this process
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(get_pool_stats())
+
+
+class CircuitBreakerStatsAPI(APIView):
+    """
+    Returns SAP circuit breaker state per company and backend for this process
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(get_breaker_stats())
+
+
+class SAPMetricsAPI(APIView):
+    """
+    Returns SAP call latency (p50/p95/p99, histogram), errors, rows and
+    payload sizes per company and operation for the last N minutes
+
+    GET /api/v1/po/health/metrics/?minutes=15&company_code=JIVO_OIL
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        try:
+            minutes = int(request.GET.get("minutes", 15))
+        except ValueError:
+            minutes = 0
+        if not 1 <= minutes <= 1440:
+            return Response(
+                {"detail": "minutes must be a number between 1 and 1440"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Include this process's buffered samples
+        recorder.flush()
+
+        return Response({
+            "minutes": minutes,
+            "operations": latency_summary(minutes, company_code=request.GET.get("company_code")),
+        })